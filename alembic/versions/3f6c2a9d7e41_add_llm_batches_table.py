@@ -0,0 +1,36 @@
+"""Add llm_batches table
+
+Revision ID: 3f6c2a9d7e41
+Revises: 1b9cb8489732
+Create Date: 2026-10-17 10:12:31.204518
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "3f6c2a9d7e41"
+down_revision = "1b9cb8489732"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "llm_batches",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("result_ids", postgresql.ARRAY(sa.UUID()), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("llm_batches")
@@ -0,0 +1,23 @@
+"""Add options to llm_results
+
+Revision ID: 5d2e8f1a9c37
+Revises: 3f6c2a9d7e41
+Create Date: 2026-10-17 11:02:47.518230
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d2e8f1a9c37"
+down_revision = "3f6c2a9d7e41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("llm_results", sa.Column("options", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("llm_results", "options")
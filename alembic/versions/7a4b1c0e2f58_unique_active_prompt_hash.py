@@ -0,0 +1,48 @@
+"""Unique prompt_hash among pending, running and completed results
+
+Revision ID: 7a4b1c0e2f58
+Revises: 5d2e8f1a9c37
+Create Date: 2026-10-17 11:48:09.631504
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7a4b1c0e2f58"
+down_revision = "5d2e8f1a9c37"
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('pending', 'running', 'completed')"
+
+
+def upgrade():
+    # Keep one result per hash (the newest completed one, else the newest
+    # in-flight one); the others stay retrievable by ID but are uncached
+    op.execute(
+        f"""
+        WITH ranked AS (
+            SELECT id, row_number() OVER (
+                PARTITION BY prompt_hash
+                ORDER BY (status = 'completed') DESC, created_at DESC
+            ) AS rank
+            FROM llm_results
+            WHERE prompt_hash IS NOT NULL AND {ACTIVE}
+        )
+        UPDATE llm_results SET prompt_hash = NULL
+        FROM ranked
+        WHERE llm_results.id = ranked.id AND ranked.rank > 1
+        """
+    )
+    op.create_index(
+        "uq_llm_results_prompt_hash_active",
+        "llm_results",
+        ["prompt_hash"],
+        unique=True,
+        postgresql_where=sa.text(ACTIVE),
+    )
+
+
+def downgrade():
+    op.drop_index("uq_llm_results_prompt_hash_active", table_name="llm_results")
@@ -0,0 +1,183 @@
+"""Partition llm_results by month and move prompt hash claims to llm_result_keys
+
+Revision ID: b3e7d2a41c96
+Revises: 7a4b1c0e2f58
+Create Date: 2026-10-17 12:31:52.204719
+
+"""
+from datetime import date
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3e7d2a41c96"
+down_revision = "7a4b1c0e2f58"
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('pending', 'running', 'completed')"
+COLUMNS = "id, model, prompt, prompt_hash, options, response, status, created_at, completed_at"
+
+# Frozen copies of the partition layout at this revision; later changes to
+# app.db.partitions or the settings must not change what it creates
+DEFAULT_PARTITION = "llm_results_default"
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month):
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS llm_results_p{month:%Y%m} "
+        f"PARTITION OF llm_results "
+        f"FOR VALUES FROM ('{month.isoformat()}+00') "
+        f"TO ('{_add_months(month, 1).isoformat()}+00')"
+    )
+
+
+def upgrade():
+    op.rename_table("llm_results", "llm_results_unpartitioned")
+    op.execute(
+        "ALTER TABLE llm_results_unpartitioned "
+        "RENAME CONSTRAINT llm_results_pkey TO llm_results_unpartitioned_pkey"
+    )
+
+    # Prompts and responses become bytes so large ones can be stored
+    # zstd-compressed (see app.db.types.CompressedText)
+    op.create_table(
+        "llm_results",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("prompt", sa.LargeBinary(), nullable=True),
+        sa.Column("prompt_hash", sa.String(length=64), nullable=True),
+        sa.Column("options", sa.JSON(), nullable=True),
+        sa.Column("response", sa.LargeBinary(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    first = op.get_bind().scalar(
+        sa.text("SELECT min(created_at) FROM llm_results_unpartitioned")
+    )
+    # One partition per month from the oldest result to MONTHS_AHEAD months
+    # from now; app.scripts.manage_partitions keeps creating them afterwards
+    month = (first.date() if first else date.today()).replace(day=1)
+    last = _add_months(date.today(), MONTHS_AHEAD)
+    while month <= last:
+        _create_partition(month)
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF llm_results DEFAULT")
+
+    op.execute(
+        f"""
+        INSERT INTO llm_results ({COLUMNS})
+        SELECT id, model, convert_to(prompt, 'UTF8'), prompt_hash, options,
+               convert_to(response, 'UTF8'), status,
+               coalesce(created_at, now()), completed_at
+        FROM llm_results_unpartitioned
+        """
+    )
+    op.drop_table("llm_results_unpartitioned")
+
+    # Indexes on the parent are created on every partition
+    op.create_index("ix_llm_results_model", "llm_results", ["model"])
+    op.create_index("ix_llm_results_status", "llm_results", ["status"])
+
+    op.create_table(
+        "llm_result_keys",
+        sa.Column("prompt_hash", sa.String(length=64), nullable=False),
+        sa.Column("result_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("prompt_hash"),
+    )
+    op.create_index("ix_llm_result_keys_result_id", "llm_result_keys", ["result_id"])
+    op.create_index("ix_llm_result_keys_created_at", "llm_result_keys", ["created_at"])
+    # Hashes were unique among active results (uq_llm_results_prompt_hash_active)
+    op.execute(
+        f"""
+        INSERT INTO llm_result_keys (prompt_hash, result_id, created_at)
+        SELECT prompt_hash, id, created_at FROM llm_results
+        WHERE prompt_hash IS NOT NULL AND {ACTIVE}
+        """
+    )
+
+
+def downgrade():
+    compressed = op.get_bind().scalar(
+        sa.text(
+            "SELECT count(*) FROM llm_results "
+            "WHERE substring(prompt FROM 1 FOR 4) = '\\x28b52ffd'::bytea "
+            "OR substring(response FROM 1 FOR 4) = '\\x28b52ffd'::bytea"
+        )
+    )
+    if compressed:
+        raise RuntimeError(
+            f"{compressed} results are stored zstd-compressed and cannot be "
+            "converted back to text in SQL"
+        )
+
+    op.drop_table("llm_result_keys")
+    op.rename_table("llm_results", "llm_results_partitioned")
+    op.execute(
+        "ALTER TABLE llm_results_partitioned "
+        "RENAME CONSTRAINT llm_results_pkey TO llm_results_partitioned_pkey"
+    )
+    op.drop_index("ix_llm_results_model", table_name="llm_results_partitioned")
+    op.drop_index("ix_llm_results_status", table_name="llm_results_partitioned")
+
+    op.create_table(
+        "llm_results",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("prompt", sa.Text(), nullable=True),
+        sa.Column("prompt_hash", sa.String(length=64), nullable=True),
+        sa.Column("options", sa.JSON(), nullable=True),
+        sa.Column("response", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        f"""
+        INSERT INTO llm_results ({COLUMNS})
+        SELECT id, model, convert_from(prompt, 'UTF8'), prompt_hash, options,
+               convert_from(response, 'UTF8'), status, created_at, completed_at
+        FROM llm_results_partitioned
+        """
+    )
+    # Dropping the parent drops every partition
+    op.drop_table("llm_results_partitioned")
+
+    op.create_index("ix_llm_results_id", "llm_results", ["id"])
+    op.create_index("ix_llm_results_model", "llm_results", ["model"])
+    op.create_index("ix_llm_results_prompt_hash", "llm_results", ["prompt_hash"])
+    op.create_index("ix_llm_results_status", "llm_results", ["status"])
+    op.create_index(
+        "uq_llm_results_prompt_hash_active",
+        "llm_results",
+        ["prompt_hash"],
+        unique=True,
+        postgresql_where=sa.text(ACTIVE),
+    )
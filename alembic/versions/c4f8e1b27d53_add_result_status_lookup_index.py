@@ -0,0 +1,27 @@
+"""Add covering index for result status polling
+
+Revision ID: c4f8e1b27d53
+Revises: b3e7d2a41c96
+Create Date: 2026-10-17 13:20:06.417392
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4f8e1b27d53"
+down_revision = "b3e7d2a41c96"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_llm_results_status_lookup",
+        "llm_results",
+        ["id"],
+        postgresql_include=["model", "status", "created_at", "completed_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_llm_results_status_lookup", table_name="llm_results")
@@ -0,0 +1,38 @@
+"""Add user_id to llm_results
+
+Revision ID: d91a6e3f5b20
+Revises: c4f8e1b27d53
+Create Date: 2026-10-17 13:52:41.083914
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d91a6e3f5b20"
+down_revision = "c4f8e1b27d53"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("llm_results", sa.Column("user_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "fk_llm_results_user_id_users",
+        "llm_results",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index(
+        "ix_llm_results_user_history", "llm_results", ["user_id", "created_at", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_llm_results_user_history", table_name="llm_results")
+    op.drop_constraint(
+        "fk_llm_results_user_id_users", "llm_results", type_="foreignkey"
+    )
+    op.drop_column("llm_results", "user_id")
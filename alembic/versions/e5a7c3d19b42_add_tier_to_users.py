@@ -0,0 +1,23 @@
+"""Add tier to users
+
+Revision ID: e5a7c3d19b42
+Revises: d91a6e3f5b20
+Create Date: 2026-10-17 16:20:08.417352
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5a7c3d19b42"
+down_revision = "d91a6e3f5b20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("tier", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("users", "tier")
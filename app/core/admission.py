@@ -0,0 +1,201 @@
+import math
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import HTTPException
+
+from app.core.affinity import model_queues, queue_for_model
+from app.core.config import settings
+from app.core.logger import log_info
+from app.core.scheduling import QueueStats, task_scheduler
+
+# Reported per queue: "open" admits every lane, "shedding" refuses batch
+# submissions, "closed" refuses everything, "unknown" has no service rate yet
+OPEN, SHEDDING, CLOSED, UNKNOWN = "open", "shedding", "closed", "unknown"
+
+
+class Admission(NamedTuple):
+    admitted: bool
+    state: str
+    projected_wait: Optional[float]  # Seconds until a new task would start
+    retry_after: Optional[float]  # Seconds until it would be admitted
+
+
+def parse_max_waits(value: str) -> Dict[str, float]:
+    """Parse ADMISSION_QUEUE_MAX_WAIT ("group=seconds,...")."""
+    max_waits = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            group, seconds = entry.split("=", 1)
+            max_waits[group.strip()] = float(seconds)
+    return max_waits
+
+
+class AdmissionPolicy:
+    """
+    Decides whether a queue can take another generation.
+
+    A new task is projected to start after the tasks ahead of it have
+    started, at the queue's recent interval between task starts. If no
+    task has started for longer than that interval while tasks wait, the
+    time since the last start is used instead, so a stalled Ollama closes
+    the queue rather than leaving it open on a stale rate. Past
+    `stall_intervals` intervals without a start, the waiting tasks are more
+    likely lost (their ledger entries not yet swept) than stuck behind a
+    busy worker, so the estimate falls back to the interval and the depth
+    alone decides; a leaked task cannot keep the queue closed. Interactive
+    requests only queue behind the interactive lane and are refused past
+    the queue's maximum wait; batch submissions queue behind everything and
+    are shed once the wait exceeds `batch_share` of the maximum.
+    """
+
+    def __init__(
+        self,
+        max_wait: float = settings.ADMISSION_MAX_WAIT,
+        queue_max_waits: Dict[str, float] = parse_max_waits(
+            settings.ADMISSION_QUEUE_MAX_WAIT
+        ),
+        batch_share: float = settings.ADMISSION_BATCH_SHARE,
+        stall_intervals: float = settings.ADMISSION_STALL_INTERVALS,
+    ):
+        self.default_max_wait = max_wait
+        self.queue_max_waits = queue_max_waits
+        self.batch_share = batch_share
+        self.stall_intervals = stall_intervals
+
+    def max_wait(self, queue: str) -> float:
+        group = queue[len(settings.CELERY_QUEUE_PREFIX) + 1 :]
+        return self.queue_max_waits.get(group, self.default_max_wait)
+
+    def projected_wait(
+        self, stats: Optional[QueueStats], lane: str, count: int = 1
+    ) -> Optional[float]:
+        """Seconds until the last of `count` new tasks would start."""
+        if stats is None or stats.interval is None:
+            return None
+        interval = stats.interval
+        if (
+            stats.depth
+            and stats.since_start is not None
+            and stats.since_start <= self.stall_intervals * interval
+        ):
+            interval = max(interval, stats.since_start)
+        ahead = stats.interactive_depth if lane == "interactive" else stats.depth
+        return (ahead + count) * interval
+
+    def decide(
+        self, queue: str, stats: Optional[QueueStats], lane: str, count: int = 1
+    ) -> Admission:
+        """
+        Args:
+            queue: The Celery queue the tasks would go to.
+            stats: The queue's backlog and service rate, None if unknown.
+            lane: "interactive" or "batch".
+            count: The number of tasks to admit together.
+
+        Returns:
+            Admission: Whether to admit the tasks, and the queue's state.
+        """
+        wait = self.projected_wait(stats, lane, count)
+        if wait is None:
+            return Admission(True, UNKNOWN, None, None)
+        state = self.state(queue, stats)
+        limit = self.max_wait(queue)
+        if lane == "batch":
+            limit *= self.batch_share
+        if wait <= limit:
+            return Admission(True, state, wait, None)
+        return Admission(False, state, wait, wait - limit)
+
+    def state(self, queue: str, stats: Optional[QueueStats]) -> str:
+        if self.projected_wait(stats, "batch") is None:
+            return UNKNOWN
+        limit = self.max_wait(queue)
+        if self.projected_wait(stats, "interactive") > limit:
+            return CLOSED
+        if self.projected_wait(stats, "batch") > limit * self.batch_share:
+            return SHEDDING
+        return OPEN
+
+
+class AdmissionController:
+    """
+    Refuses generations that would wait in their model's queue for longer
+    than its maximum wait, so an overloaded Ollama sheds new work instead
+    of queueing results nobody waits for anymore.
+
+    Queue backlogs and service rates come from the task scheduler's queue
+    ledgers. Without them (scheduler disabled, Redis unavailable, or no
+    task started yet) everything is admitted.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[AdmissionPolicy] = None,
+        queue_stats: Optional[Callable[[str], Awaitable[Optional[QueueStats]]]] = None,
+        enabled: bool = settings.ADMISSION_ENABLED,
+    ):
+        self.policy = policy or AdmissionPolicy()
+        self.queue_stats = queue_stats or task_scheduler.queue_stats
+        self.enabled = enabled
+        self.counts = {"admitted": 0, "shed": 0, "rejected": 0}
+
+    async def check(self, model: str, lane: str, count: int = 1) -> Admission:
+        """Decide whether to admit `count` tasks of `model` in `lane`."""
+        if not self.enabled:
+            return Admission(True, UNKNOWN, None, None)
+        queue = queue_for_model(model)
+        admission = self.policy.decide(
+            queue, await self.queue_stats(queue), lane, count
+        )
+        if admission.admitted:
+            self.counts["admitted"] += 1
+        else:
+            self.counts["shed" if lane == "batch" else "rejected"] += 1
+            log_info(
+                "Generation refused",
+                queue=queue,
+                lane=lane,
+                count=count,
+                projected_wait=round(admission.projected_wait, 1),
+            )
+        return admission
+
+    async def queue_states(self) -> Dict[str, dict]:
+        """The admission state of every model queue."""
+        states = {}
+        for queue in model_queues():
+            stats = await self.queue_stats(queue) if self.enabled else None
+            states[queue] = {
+                "state": self.policy.state(queue, stats),
+                "depth": stats.depth if stats else None,
+                "interactive_depth": stats.interactive_depth if stats else None,
+                "start_interval": stats.interval if stats else None,
+                "projected_wait": self.policy.projected_wait(stats, "batch"),
+                "max_wait": self.policy.max_wait(queue),
+            }
+        return states
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+admission_controller = AdmissionController()
+
+
+async def enforce_admission(model: str, lane: str, count: int = 1) -> None:
+    """
+    Refuse `count` new generations the queue cannot take in time: batch
+    submissions with 429, interactive requests with 503, both with
+    Retry-After. Only work that would be enqueued counts; cached and
+    in-flight results need no admission.
+    """
+    admission = await admission_controller.check(model, lane, count)
+    if not admission.admitted:
+        raise HTTPException(
+            status_code=429 if lane == "batch" else 503,
+            detail=(
+                f"The {model} queue is overloaded: projected wait "
+                f"{admission.projected_wait:.0f}s"
+            ),
+            headers={"Retry-After": str(max(1, math.ceil(admission.retry_after)))},
+        )
@@ -0,0 +1,178 @@
+import time
+from typing import Dict, List, Optional
+
+from celery import bootsteps
+from celery.signals import task_received
+
+from app.core.config import settings
+from app.core.logger import log_error, log_info
+
+DEFAULT_GROUP = "default"
+
+
+def _model_groups() -> Dict[str, str]:
+    """Parse CELERY_MODEL_QUEUE_GROUPS ("model=group,...") into a mapping."""
+    groups = {}
+    for entry in settings.CELERY_MODEL_QUEUE_GROUPS.split(","):
+        if "=" in entry:
+            model, group = entry.split("=", 1)
+            groups[model.strip()] = group.strip()
+    return groups
+
+
+def queue_for_model(model: str) -> str:
+    """
+    Return the Celery queue that generation tasks for `model` are routed to.
+
+    Models are grouped by name without their tag, so "llama3:latest" and
+    "llama3:8b" share a queue. Models outside AVAILABLE_MODELS and the
+    configured groups go to the default queue, which every worker consumes.
+    """
+    name = model.split(":", 1)[0]
+    group = _model_groups().get(name)
+    if group is None:
+        group = name if name in settings.AVAILABLE_MODELS else DEFAULT_GROUP
+    return f"{settings.CELERY_QUEUE_PREFIX}.{group}"
+
+
+def model_queues() -> List[str]:
+    """Every queue a generation task can be routed to."""
+    queues = {queue_for_model(model) for model in settings.AVAILABLE_MODELS}
+    queues.update(queue_for_model(model) for model in _model_groups())
+    queues.add(f"{settings.CELERY_QUEUE_PREFIX}.{DEFAULT_GROUP}")
+    return sorted(queues)
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Celery router sending generation tasks to their model's queue."""
+    if name == "app.core.tasks.generate_text":
+        model = kwargs.get("model") or args[1]
+        return {"queue": queue_for_model(model)}
+    return None
+
+
+class AffinityPolicy:
+    """
+    Decides which model queue a worker should consume next.
+
+    The worker stays on its current queue until the queue is empty, so it
+    drains one model's backlog before Ollama has to swap weights. To keep a
+    minority model from starving, it moves on once it has taken
+    `max_consecutive` tasks or spent `max_seconds` on the queue while another
+    queue has work; the queue that has waited longest is served next.
+    """
+
+    def __init__(
+        self,
+        max_consecutive: int = settings.CELERY_AFFINITY_MAX_CONSECUTIVE,
+        max_seconds: float = settings.CELERY_AFFINITY_MAX_SECONDS,
+    ):
+        self.max_consecutive = max_consecutive
+        self.max_seconds = max_seconds
+        self.last_served: Dict[str, float] = {}
+
+    def next_queue(
+        self,
+        current: Optional[str],
+        depths: Dict[str, int],
+        consecutive: int,
+        elapsed: float,
+    ) -> Optional[str]:
+        """
+        Args:
+            current: The queue currently consumed, if any.
+            depths: Number of waiting messages per queue.
+            consecutive: Tasks taken from `current` since switching to it.
+            elapsed: Seconds since switching to `current`.
+
+        Returns:
+            Optional[str]: The queue to consume; `current` to stay put.
+        """
+        waiting = [q for q, depth in depths.items() if depth > 0 and q != current]
+        if not waiting:
+            return current
+        if current is None or depths.get(current, 0) == 0:
+            # Nothing left here: go to the longest backlog
+            return max(waiting, key=lambda q: depths[q])
+        if consecutive >= self.max_consecutive or elapsed >= self.max_seconds:
+            return min(waiting, key=lambda q: self.last_served.get(q, 0.0))
+        return current
+
+    def mark_served(self, queue: str) -> None:
+        self.last_served[queue] = time.monotonic()
+
+
+class ModelAffinity(bootsteps.StartStopStep):
+    """
+    Consumer bootstep that keeps the worker subscribed to one model queue at
+    a time and switches queues according to AffinityPolicy.
+    """
+
+    requires = {"celery.worker.consumer.tasks:Tasks"}
+
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.policy = AffinityPolicy()
+        self.queues = model_queues()
+        self.current: Optional[str] = None
+        self.consecutive = 0
+        self.switched_at = time.monotonic()
+        self._timer = None
+
+    def start(self, c):
+        task_received.connect(self._on_task_received, weak=False)
+        for queue in self.queues:
+            c.cancel_task_queue(queue)
+        self.current = None
+        self.tick(c)
+        self._timer = c.timer.call_repeatedly(
+            settings.CELERY_AFFINITY_CHECK_INTERVAL, self.tick, (c,), priority=10
+        )
+
+    def stop(self, c):
+        task_received.disconnect(self._on_task_received)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _on_task_received(self, request=None, **kwargs):
+        routing_key = (request.delivery_info or {}).get("routing_key")
+        if routing_key == self.current:
+            self.consecutive += 1
+
+    def _depth(self, c, queue: str) -> int:
+        try:
+            return c.connection.default_channel.queue_declare(
+                queue=queue, passive=True
+            ).message_count
+        except Exception:
+            # Redis drops empty queues, which makes a passive declare fail
+            return 0
+
+    def tick(self, c):
+        try:
+            depths = {queue: self._depth(c, queue) for queue in self.queues}
+            elapsed = time.monotonic() - self.switched_at
+            target = self.policy.next_queue(
+                self.current, depths, self.consecutive, elapsed
+            )
+            if target is not None and target != self.current:
+                self.switch(c, target, depths)
+        except Exception as e:
+            log_error(e, operation="model_affinity_tick")
+
+    def switch(self, c, target: str, depths: Dict[str, int]):
+        if self.current is not None:
+            self.policy.mark_served(self.current)
+            c.cancel_task_queue(self.current)
+        c.add_task_queue(target)
+        log_info(
+            "Worker switched model queue",
+            previous=self.current,
+            queue=target,
+            backlog=depths.get(target, 0),
+            consecutive=self.consecutive,
+        )
+        self.current = target
+        self.consecutive = 0
+        self.switched_at = time.monotonic()
@@ -1,64 +1,189 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
 from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.exc import SQLAlchemyError
-from starlette.status import HTTP_401_UNAUTHORIZED
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
 
-from app.core.logger import log_error
-from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.config import settings
+from app.core.events import event_bus, publish
+from app.core.logger import log_error, log_info
+from app.core.security import TokenData, oauth2_scheme, verify_token
 from app.db import crud
 from app.db.base import AsyncSessionLocal
-from app.schemas.token import TokenData
+from app.schemas.user import User
+
+# Tells every process to drop a user from its user cache
+USERS_CHANNEL = "llm_hub:users"
+
+
+class TokenCache:
+    """
+    Verified access tokens, so a token's signature is checked once rather
+    than on every request.
+
+    Entries are keyed by the token's SHA-256 digest, so raw tokens are not
+    kept, and evicted least recently used beyond `max_entries`. A cached
+    token is served only until its own expiry.
+    """
 
-# Initialize OAuth2 scheme for token authentication
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+    def __init__(self, max_entries: int = settings.AUTH_TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        # digest -> (token data, expires_at), least recently used first
+        self._entries: "OrderedDict[bytes, Tuple[TokenData, float]]" = OrderedDict()
+        self.counters = dict.fromkeys(("hits", "misses"), 0)
 
+    def verify(self, token: str) -> TokenData:
+        """
+        Return the token's data, verifying the token if it is not cached.
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+        Raises:
+            HTTPException: If the token is invalid or expired.
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(digest)
+        if entry is not None and entry[1] > time.time():
+            self._entries.move_to_end(digest)
+            self.counters["hits"] += 1
+            return entry[0]
+        self._entries.pop(digest, None)
+        self.counters["misses"] += 1
+        token_data = verify_token(token)
+        if token_data.exp is not None and self.max_entries > 0:
+            self._entries[digest] = (token_data, token_data.exp)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token_data
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "entries": len(self._entries)}
+
+
+class UserCache:
+    """
+    Users by username for `ttl` seconds, so authenticated requests need no
+    database round trip.
+
+    Deactivating a user must go through `invalidate()`, which drops the
+    user from the cache of every process; otherwise the change takes effect
+    within `ttl`.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.AUTH_USER_CACHE_TTL,
+        max_entries: int = settings.AUTH_USER_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # username -> (user, expires_at), least recently used first
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self.counters = dict.fromkeys(("hits", "misses"), 0)
+
+    def get(self, username: str) -> Optional[User]:
+        entry = self._entries.get(username)
+        if entry is None or entry[1] <= time.monotonic():
+            self._entries.pop(username, None)
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(username)
+        self.counters["hits"] += 1
+        return entry[0]
+
+    def put(self, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[user.username] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user.username)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def drop(self, username: str) -> None:
+        self._entries.pop(username, None)
+
+    async def invalidate(self, username: str) -> None:
+        """Drop a user from the cache of every process."""
+        self.drop(username)
+        await publish(USERS_CHANNEL, {"username": username})
+
+    def handle_invalidation(self, payload: Dict[str, Any]) -> None:
+        self.drop(payload["username"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "entries": len(self._entries)}
+
+
+token_cache = TokenCache()
+user_cache = UserCache()
+event_bus.on(USERS_CHANNEL, user_cache.handle_invalidation)
+
+
+async def _load_user(username: str) -> Optional[User]:
+    try:
+        async with AsyncSessionLocal() as db:
+            db_user = await crud.get_user(db, username=username)
+    except SQLAlchemyError as e:
+        log_error(e, operation="load_user", username=username)
+        raise HTTPException(
+            status_code=500, detail="An error occurred while authenticating the user"
+        )
+    return User.model_validate(db_user) if db_user is not None else None
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Validate the access token and return the current user.
 
-    This function is used as a dependency to protect routes that require authentication.
-    It decodes the JWT token, extracts the username, and fetches the corresponding user from the database.
+    This function is used as a dependency to protect routes that require
+    authentication. Verified tokens and users are cached, so a repeat
+    request costs a digest and two dictionary lookups.
 
     Args:
         token (str): The JWT token provided in the request header.
 
     Returns:
-        User: The authenticated user object.
+        User: The authenticated user.
 
     Raises:
-        HTTPException: If the token is invalid or the user doesn't exist.
+        HTTPException: If the token is invalid, or the user doesn't exist or
+            is inactive.
     """
-    credentials_exception = HTTPException(
-        status_code=HTTP_401_UNAUTHORIZED,
-        detail="Invalid authentication credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    token_data = token_cache.verify(token)
+    user = user_cache.get(token_data.username)
+    if user is None:
+        user = await _load_user(token_data.username)
+        if user is None:
+            raise HTTPException(
+                status_code=HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user_cache.put(user)
+    if not user.is_active:
+        raise HTTPException(
+            status_code=HTTP_401_UNAUTHORIZED,
+            detail="Inactive user",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
 
-    try:
-        # Decode the JWT token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError as e:
-        log_error(f"JWT decoding error: {str(e)}")
-        raise credentials_exception
 
-    try:
-        async with AsyncSessionLocal() as db:
-            user = await crud.get_user(db, username=token_data.username)
-            if user is None:
-                log_error(f"User not found: {token_data.username}")
-                raise credentials_exception
-            return user
-    except SQLAlchemyError as e:
-        log_error(f"Database error in get_current_user: {str(e)}")
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """
+    get_current_user, refusing users not listed in ADMIN_USERNAMES. Guards
+    operational endpoints whose effects are shared by every user.
+    """
+    admins = {
+        name.strip() for name in settings.ADMIN_USERNAMES.split(",") if name.strip()
+    }
+    if current_user.username not in admins:
         raise HTTPException(
-            status_code=500, detail="An error occurred while authenticating the user"
+            status_code=HTTP_403_FORBIDDEN, detail="Administrator access required"
         )
+    return current_user
 
 
 async def get_optional_user(token: str = Depends(oauth2_scheme)):
@@ -71,3 +196,33 @@ async def get_optional_user(token: str = Depends(oauth2_scheme)):
         return await get_current_user(token)
     except HTTPException:
         return None
+
+
+async def set_user_active(db: AsyncSession, username: str, is_active: bool) -> bool:
+    """
+    Activate or deactivate a user and drop them from every process's user
+    cache, so a deactivated user is refused on their next request.
+
+    Returns:
+        bool: Whether the user exists.
+    """
+    found = await crud.set_user_active(db, username, is_active)
+    if found:
+        await user_cache.invalidate(username)
+        log_info("User updated", username=username, is_active=is_active)
+    return found
+
+
+async def set_user_tier(db: AsyncSession, username: str, tier: Optional[str]) -> bool:
+    """
+    Set a user's rate limit tier and drop them from every process's user
+    cache, so the new limits apply from their next request.
+
+    Returns:
+        bool: Whether the user exists.
+    """
+    found = await crud.set_user_tier(db, username, tier)
+    if found:
+        await user_cache.invalidate(username)
+        log_info("User updated", username=username, tier=tier)
+    return found
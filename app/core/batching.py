@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import log_info
+from app.db import crud, models
+
+
+def _pick_reusable(rows: List[models.LLMResult]) -> Dict[str, models.LLMResult]:
+    """
+    Choose one existing result per prompt hash: a completed one if there is
+    one, otherwise the newest in-flight one. `rows` is ordered newest first.
+    """
+    chosen: Dict[str, models.LLMResult] = {}
+    for row in rows:
+        current = chosen.get(row.prompt_hash)
+        if current is None or (
+            row.status == "completed" and current.status != "completed"
+        ):
+            chosen[row.prompt_hash] = row
+    return chosen
+
+
+async def create_batch(
+    db: AsyncSession,
+    model: str,
+    prompts: List[str],
+    use_cache: bool = True,
+    options: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+) -> Tuple[models.LLMBatch, List[models.LLMResult], List[models.LLMResult]]:
+    """
+    Resolve a list of prompts to results with one query per step.
+
+    With `use_cache`, completed (and, when coalescing is enabled, in-flight)
+    results are looked up with a single `prompt_hash IN (...)` query and
+    duplicate prompts within the batch share one result. The misses' prompt
+    hashes are claimed with one multi-row INSERT ... ON CONFLICT ...
+    RETURNING, so a prompt that another request created in the meantime is
+    joined rather than duplicated. The batch row is written in the same
+    transaction.
+
+    Returns:
+        tuple[LLMBatch, list[LLMResult], list[LLMResult]]: The batch, one
+        result per prompt in order, and the newly created results that
+        still need a generation task.
+    """
+    hashes = [models.LLMResult.generate_prompt_hash(model, p, options) for p in prompts]
+
+    if use_cache:
+        statuses = ("completed",)
+        if settings.COALESCE_ENABLED:
+            statuses += models.INFLIGHT_STATUSES
+        existing = _pick_reusable(
+            await crud.get_results_by_hashes(db, set(hashes), statuses)
+        )
+        misses = {h: p for h, p in zip(hashes, prompts) if h not in existing}
+        upserted = (
+            await crud.create_or_get_llm_results(
+                db, model, list(misses.values()), options, user_id=user_id
+            )
+            if misses
+            else []
+        )
+        existing.update((row.prompt_hash, row) for row, _ in upserted)
+        created = [row for row, was_created in upserted if was_created]
+        results = [existing[h] for h in hashes]
+    else:
+        created = await crud.create_llm_results(
+            db, model, prompts, options, cacheable=False, user_id=user_id
+        )
+        results = created
+
+    db_batch = await crud.create_llm_batch(db, model, [row.id for row in results])
+    await db.commit()
+    log_info(
+        "Batch created",
+        batch_id=str(db_batch.id),
+        model=model,
+        prompts=len(prompts),
+        created=len(created),
+    )
+    return db_batch, results, created
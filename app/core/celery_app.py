@@ -1,24 +1,45 @@
 from celery import Celery
+from kombu import Queue
 
+from app.core.affinity import ModelAffinity, model_queues, route_task
 from app.core.config import settings
 
 # Initialize Celery app with Redis as both broker and backend
 celery_app = Celery("llm_tasks", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
 
-# Configure task routing: all tasks from app.tasks will go to the 'llm_tasks' queue
-celery_app.conf.task_routes = {"app.tasks.*": {"queue": "llm_tasks"}}
+# Configure task routing: generation tasks go to a queue per model (or model
+# group), so a worker can serve one model at a time instead of making Ollama
+# swap weights between every task
+celery_app.conf.task_queues = [Queue(name) for name in model_queues()]
+celery_app.conf.task_default_queue = f"{settings.CELERY_QUEUE_PREFIX}.default"
+celery_app.conf.task_routes = [route_task]
 
-# Set up a thread pool executor for running async code
-# This is useful for I/O-bound tasks
-celery_app.conf.task_pool = "threads"
+# Ten broker priorities per queue, 0 served first: interactive and batch
+# lanes with fair-share levels within each (see app.core.scheduling)
+celery_app.conf.broker_transport_options = {"priority_steps": list(range(10))}
 
-# Use the 'prefork' pool as the main worker pool
-# This is the default and is good for general purpose and CPU-bound tasks
-celery_app.conf.worker_pool = "prefork"
+# Reserve one message at a time so queue switches take effect immediately
+celery_app.conf.worker_prefetch_multiplier = 1
+
+# Generation tasks only wait on Ollama and Postgres, so by default they run
+# in a thread pool whose threads hand their coroutines to one shared event
+# loop per worker (see app.core.worker_runtime). Each thread only blocks on
+# its task's coroutine, so threads are cheap and their number
+# (CELERY_ASYNC_CONCURRENCY) is the worker's concurrency limit. The 'prefork'
+# pool is still supported, with one event loop per child process and
+# CELERY_WORKER_CONCURRENCY processes.
+celery_app.conf.worker_pool = settings.CELERY_WORKER_POOL
 
 # Set the number of worker threads/processes
 # This determines how many tasks can be executed concurrently
-celery_app.conf.worker_concurrency = settings.CELERY_WORKER_CONCURRENCY
+if settings.CELERY_WORKER_POOL == "threads":
+    celery_app.conf.worker_concurrency = settings.CELERY_ASYNC_CONCURRENCY
+else:
+    celery_app.conf.worker_concurrency = settings.CELERY_WORKER_CONCURRENCY
+
+# Drain one model queue at a time, with a fairness bound (see app.core.affinity)
+if settings.CELERY_MODEL_AFFINITY:
+    celery_app.steps["consumer"].add(ModelAffinity)
 
 # Auto-discover tasks in the specified packages
 # This will look for a 'tasks.py' file in the app.core directory
@@ -0,0 +1,179 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import log_error, log_info
+from app.core.redis_client import get_redis
+from app.db import crud, models, partitions
+
+CLAIM_KEY_PREFIX = "llm_hub:inflight:"
+
+# Delete the claim only if it still belongs to the caller
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class RequestCoalescer:
+    """
+    Single-flight deduplication of generations keyed on the prompt hash.
+
+    Within a process, requests for the same hash are serialised by a per-key
+    asyncio lock, so only the first one creates a result and later ones find
+    it. Across API replicas and Celery workers, the first creator claims the
+    hash in Redis with SET NX; the claim holds the result ID until the worker
+    releases it. If Redis is unavailable, the pending/running row in Postgres
+    is used as the fallback. Either way the row is created by claiming its
+    prompt hash in llm_result_keys, so a race that slips past both still
+    ends with one result.
+    """
+
+    def __init__(
+        self,
+        claim_ttl: int = settings.COALESCE_CLAIM_TTL,
+        claim_wait: float = settings.COALESCE_CLAIM_WAIT,
+    ):
+        self.claim_ttl = claim_ttl
+        self.claim_wait = claim_wait
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def lock(self, prompt_hash: str):
+        """Serialise callers for the same prompt hash within this process."""
+        lock = self._locks.setdefault(prompt_hash, asyncio.Lock())
+        self._waiters[prompt_hash] = self._waiters.get(prompt_hash, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[prompt_hash] -= 1
+            if not self._waiters[prompt_hash]:
+                del self._waiters[prompt_hash]
+                del self._locks[prompt_hash]
+
+    async def claim(
+        self, prompt_hash: str, result_id: uuid.UUID
+    ) -> Optional[uuid.UUID]:
+        """
+        Try to claim a prompt hash for a result.
+
+        Returns:
+            Optional[uuid.UUID]: The ID of the result holding the claim, which
+            is `result_id` itself when the claim succeeded. None if Redis could
+            not be reached.
+        """
+        key = CLAIM_KEY_PREFIX + prompt_hash
+        try:
+            redis = get_redis()
+            if await redis.set(key, str(result_id), nx=True, ex=self.claim_ttl):
+                return result_id
+            holder = await redis.get(key)
+            return uuid.UUID(holder) if holder else None
+        except Exception as e:
+            log_error(e, operation="coalesce_claim", prompt_hash=prompt_hash)
+            return None
+
+    async def release(self, prompt_hash: str, result_id: uuid.UUID) -> None:
+        """Release a claim if it is still held by `result_id`."""
+        try:
+            await get_redis().eval(
+                RELEASE_SCRIPT, 1, CLAIM_KEY_PREFIX + prompt_hash, str(result_id)
+            )
+        except Exception as e:
+            log_error(e, operation="coalesce_release", prompt_hash=prompt_hash)
+
+    async def find_inflight(
+        self, db: AsyncSession, prompt_hash: str
+    ) -> Optional[models.LLMResult]:
+        """
+        Find a pending or running result for a prompt hash.
+
+        The Redis claim is checked first; a claim pointing at a finished row
+        is dropped, and Postgres is consulted as the fallback.
+        """
+        try:
+            holder = await get_redis().get(CLAIM_KEY_PREFIX + prompt_hash)
+        except Exception as e:
+            log_error(e, operation="coalesce_lookup", prompt_hash=prompt_hash)
+            holder = None
+        if holder:
+            db_result = await crud.get_llm_result(
+                db, uuid.UUID(holder), load_text=True, fresh=True
+            )
+            if db_result is None:
+                # The claimant may not have committed its row yet
+                db_result = await self.wait_for_result(db, uuid.UUID(holder))
+            if db_result and db_result.status in models.INFLIGHT_STATUSES:
+                return db_result
+            if db_result:
+                # The holder finished without releasing its claim
+                await self.release(prompt_hash, db_result.id)
+        return await crud.get_inflight_result(db, prompt_hash)
+
+    async def wait_for_result(
+        self, db: AsyncSession, result_id: uuid.UUID
+    ) -> Optional[models.LLMResult]:
+        """
+        Wait briefly for another process's claimed result row to be committed.
+        """
+        deadline = asyncio.get_running_loop().time() + self.claim_wait
+        delay = 0.01
+        while True:
+            db_result = await crud.get_llm_result(
+                db, result_id, load_text=True, fresh=True
+            )
+            if db_result or asyncio.get_running_loop().time() >= deadline:
+                return db_result
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    async def get_or_create(
+        self,
+        db: AsyncSession,
+        model: str,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None,
+    ) -> tuple[models.LLMResult, bool]:
+        """
+        Return the in-flight result for (model, prompt, options), or create a
+        new one.
+
+        Returns:
+            tuple[LLMResult, bool]: The result and whether it was created by
+            this call (and therefore needs a generation task).
+        """
+        prompt_hash = models.LLMResult.generate_prompt_hash(model, prompt, options)
+        async with self.lock(prompt_hash):
+            existing = await self.find_inflight(db, prompt_hash)
+            if existing:
+                log_info("Joined in-flight generation", task_id=str(existing.id))
+                return existing, False
+
+            result_id = partitions.new_result_id()
+            holder = await self.claim(prompt_hash, result_id)
+            if holder is not None and holder != result_id:
+                # Another replica claimed the prompt between our lookup and claim
+                existing = await self.wait_for_result(db, holder)
+                if existing and existing.status in models.INFLIGHT_STATUSES:
+                    log_info("Joined in-flight generation", task_id=str(holder))
+                    return existing, False
+
+            db_result, created = await crud.create_or_get_llm_result(
+                db, model, prompt, result_id, options, user_id
+            )
+            if not created:
+                await self.release(prompt_hash, result_id)
+                log_info("Joined existing generation", task_id=str(db_result.id))
+            return db_result, created
+
+
+request_coalescer = RequestCoalescer()
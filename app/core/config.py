@@ -16,14 +16,151 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "default_user")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "default_password")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "default_db")
-    DATABASE_URL: str = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@db:5432/{POSTGRES_DB}"
+    POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "db")
+    POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", "5432"))
+    DATABASE_URL: str = os.getenv(
+        "DATABASE_URL",
+        f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
+        f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+    )
+    # Optional read replica; read-only lookups (see app.db.base.replica_read)
+    # go there when set
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+
+    # Connection pool of each engine (primary and replica)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Replace connections older than this (seconds); -1 never does
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Prepared statements cached per connection
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    # Connecting through PgBouncer in transaction mode: no statement caching,
+    # unique prepared statement names
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+    # Log every SQL statement (through the logger's background queue)
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
 
     # Ollama configuration
     OLLAMA_URL: str = os.getenv("OLLAMA_URL", "http://ollama:11434")
+    # Comma-separated list of Ollama backends; defaults to OLLAMA_URL alone.
+    # Kept a string: BaseSettings would JSON-decode a list from the env
+    OLLAMA_URLS: str = os.getenv("OLLAMA_URLS", OLLAMA_URL)
     OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "24h")
     OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "0.0.0.0")
     OLLAMA_USE_GPU: bool = os.getenv("OLLAMA_USE_GPU", "false").lower() == "true"
 
+    # Ollama HTTP client pool
+    OLLAMA_MAX_CONNECTIONS: int = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "100"))
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    OLLAMA_KEEPALIVE_EXPIRY: float = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "30"))
+    OLLAMA_HTTP2: bool = os.getenv("OLLAMA_HTTP2", "false").lower() == "true"
+    OLLAMA_CONNECT_TIMEOUT: float = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_READ_TIMEOUT: float = float(os.getenv("OLLAMA_READ_TIMEOUT", "600"))
+    OLLAMA_WRITE_TIMEOUT: float = float(os.getenv("OLLAMA_WRITE_TIMEOUT", "30"))
+    OLLAMA_POOL_TIMEOUT: float = float(os.getenv("OLLAMA_POOL_TIMEOUT", "30"))
+    OLLAMA_TAGS_TIMEOUT: float = float(os.getenv("OLLAMA_TAGS_TIMEOUT", "60"))
+
+    # Ollama backend pool health checks and routing
+    OLLAMA_HEALTH_CHECK_INTERVAL: float = float(
+        os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL", "10")
+    )
+    OLLAMA_HEALTH_CHECK_TIMEOUT: float = float(
+        os.getenv("OLLAMA_HEALTH_CHECK_TIMEOUT", "5")
+    )
+    OLLAMA_EJECT_AFTER_FAILURES: int = int(
+        os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3")
+    )
+    OLLAMA_SLOW_START_SECONDS: float = float(
+        os.getenv("OLLAMA_SLOW_START_SECONDS", "30")
+    )
+    # Extra in-flight requests tolerated on a node that already has the model loaded
+    OLLAMA_RESIDENCY_SLACK: int = int(os.getenv("OLLAMA_RESIDENCY_SLACK", "2"))
+
+    # Model registry (cached Ollama model catalogue)
+    MODEL_REGISTRY_TTL: float = float(os.getenv("MODEL_REGISTRY_TTL", "60"))
+    MODEL_REGISTRY_REFRESH_INTERVAL: float = float(
+        os.getenv("MODEL_REGISTRY_REFRESH_INTERVAL", "30")
+    )
+    MODEL_REGISTRY_MISS_REFRESH_AGE: float = float(
+        os.getenv("MODEL_REGISTRY_MISS_REFRESH_AGE", "5")
+    )
+    MODEL_REGISTRY_USE_REDIS: bool = (
+        os.getenv("MODEL_REGISTRY_USE_REDIS", "false").lower() == "true"
+    )
+
+    # Request coalescing (single-flight) for identical in-flight prompts
+    COALESCE_ENABLED: bool = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+    COALESCE_CLAIM_TTL: int = int(os.getenv("COALESCE_CLAIM_TTL", "900"))
+    COALESCE_CLAIM_WAIT: float = float(os.getenv("COALESCE_CLAIM_WAIT", "2"))
+    # Seconds after which a pending or running result's prompt hash may be
+    # taken over, should its task have died without failing the result.
+    # Keep it above the longest queue wait plus generation time
+    RESULT_CLAIM_TIMEOUT: int = int(os.getenv("RESULT_CLAIM_TIMEOUT", "3600"))
+
+    # Two-tier (in-process LRU + Redis) cache of completed results
+    RESULT_CACHE_ENABLED: bool = (
+        os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    )
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+    RESULT_CACHE_MAX_BYTES: int = int(
+        os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    RESULT_CACHE_TTL: float = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+    RESULT_CACHE_REDIS_TTL: int = int(os.getenv("RESULT_CACHE_REDIS_TTL", "86400"))
+
+    # Opt-in semantic cache: reuse results of prompts whose embeddings are
+    # at least SEMANTIC_CACHE_THRESHOLD cosine-similar
+    SEMANTIC_CACHE_ENABLED: bool = (
+        os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    )
+    SEMANTIC_CACHE_EMBED_MODEL: str = os.getenv(
+        "SEMANTIC_CACHE_EMBED_MODEL", "nomic-embed-text"
+    )
+    SEMANTIC_CACHE_THRESHOLD: float = float(
+        os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")
+    )
+    # Most time a lookup may add to a cache miss (milliseconds)
+    SEMANTIC_CACHE_BUDGET_MS: float = float(os.getenv("SEMANTIC_CACHE_BUDGET_MS", "5"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "20000")
+    )
+    # Directory for memory-mapped indexes; unset keeps them in memory only.
+    # Each API replica needs its own directory.
+    SEMANTIC_CACHE_DIR: str = os.getenv("SEMANTIC_CACHE_DIR", "")
+
+    # Largest number of prompts accepted by POST /v1/generate/{model}/batch
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "500"))
+
+    # llm_results is partitioned by month of created_at. Partitions are
+    # created this many months ahead, and those entirely older than the
+    # retention period are dropped, or moved to RESULT_ARCHIVE_SCHEMA if set,
+    # by app.scripts.manage_partitions. A retention of 0 keeps everything.
+    RESULT_PARTITION_MONTHS_AHEAD: int = int(
+        os.getenv("RESULT_PARTITION_MONTHS_AHEAD", "3")
+    )
+    RESULT_RETENTION_DAYS: int = int(os.getenv("RESULT_RETENTION_DAYS", "0"))
+    RESULT_ARCHIVE_SCHEMA: str = os.getenv("RESULT_ARCHIVE_SCHEMA", "")
+
+    # zstd-compress prompts and responses of at least this many bytes
+    # (requires zstandard); 0 stores them uncompressed
+    RESULT_COMPRESSION_MIN_BYTES: int = int(
+        os.getenv("RESULT_COMPRESSION_MIN_BYTES", "0")
+    )
+    RESULT_COMPRESSION_LEVEL: int = int(os.getenv("RESULT_COMPRESSION_LEVEL", "3"))
+
+    # Largest page returned by GET /v1/results
+    RESULTS_PAGE_MAX_SIZE: int = int(os.getenv("RESULTS_PAGE_MAX_SIZE", "200"))
+
+    # Rows fetched per round trip of a result export's server-side cursor
+    RESULT_EXPORT_BATCH_SIZE: int = int(os.getenv("RESULT_EXPORT_BATCH_SIZE", "1000"))
+
+    # Longest a client may block on GET /v1/result?wait= (seconds)
+    RESULT_MAX_WAIT: float = float(os.getenv("RESULT_MAX_WAIT", "60"))
+
     # Debug mode
     DEBUG: bool = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 
@@ -37,11 +174,99 @@ class Settings(BaseSettings):
 
     # Security
     SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "sD48VfmRgP")
+    # Verified tokens cached per process (0 disables), and how long users
+    # are cached before their row is read again (seconds; 0 disables)
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_USER_CACHE_TTL: float = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    # Comma-separated usernames allowed to call operational endpoints that
+    # affect every user, like purging caches; empty allows no one
+    ADMIN_USERNAMES: str = os.getenv("ADMIN_USERNAMES", "")
+    # bcrypt cost of new password hashes; hashes of another cost are
+    # replaced on their user's next login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Password hashes computed at once per process, on background threads
+    PASSWORD_HASH_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))
+    # Failed logins tolerated per username and per client IP (0 disables)
+    # before further attempts are refused for LOGIN_FAILURE_WINDOW seconds
+    LOGIN_MAX_FAILURES_PER_USER: int = int(
+        os.getenv("LOGIN_MAX_FAILURES_PER_USER", "5")
+    )
+    LOGIN_MAX_FAILURES_PER_IP: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "20"))
+    LOGIN_FAILURE_WINDOW: int = int(os.getenv("LOGIN_FAILURE_WINDOW", "300"))
+
+    # Per-user rate limits. Tiers are "name=requests per minute:estimated
+    # generation tokens per day" (0: unlimited); users without a tier get
+    # "default". "memory" keeps the buckets per process, for single-node runs
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "redis")
+    RATE_LIMIT_TIERS: str = os.getenv(
+        "RATE_LIMIT_TIERS", "default=60:1000000,pro=600:20000000,unlimited=0:0"
+    )
+    # Completion tokens charged for generations that do not set num_predict
+    RATE_LIMIT_DEFAULT_COMPLETION_TOKENS: int = int(
+        os.getenv("RATE_LIMIT_DEFAULT_COMPLETION_TOKENS", "512")
+    )
 
     # Celery configuration
     CELERY_WORKER_CONCURRENCY: int = (
         4  # or any other value suitable for your environment
     )
+    # "threads" runs every task of a worker on one shared event loop, with
+    # CELERY_ASYNC_CONCURRENCY threads (tasks in flight); "prefork" runs one
+    # loop per child process, with CELERY_WORKER_CONCURRENCY processes
+    CELERY_WORKER_POOL: str = os.getenv("CELERY_WORKER_POOL", "threads")
+    CELERY_ASYNC_CONCURRENCY: int = int(os.getenv("CELERY_ASYNC_CONCURRENCY", "16"))
+    CELERY_QUEUE_PREFIX: str = os.getenv("CELERY_QUEUE_PREFIX", "llm_tasks")
+    # Models sharing a queue, e.g. "mod_llama3=llama3" puts both on one queue
+    CELERY_MODEL_QUEUE_GROUPS: str = os.getenv("CELERY_MODEL_QUEUE_GROUPS", "")
+    # Let each worker drain one model queue at a time
+    CELERY_MODEL_AFFINITY: bool = (
+        os.getenv("CELERY_MODEL_AFFINITY", "true").lower() == "true"
+    )
+    # Fairness bounds: switch to another waiting queue after this many tasks
+    # or seconds on the current one
+    CELERY_AFFINITY_MAX_CONSECUTIVE: int = int(
+        os.getenv("CELERY_AFFINITY_MAX_CONSECUTIVE", "50")
+    )
+    CELERY_AFFINITY_MAX_SECONDS: float = float(
+        os.getenv("CELERY_AFFINITY_MAX_SECONDS", "300")
+    )
+    CELERY_AFFINITY_CHECK_INTERVAL: float = float(
+        os.getenv("CELERY_AFFINITY_CHECK_INTERVAL", "1")
+    )
+    # Fair-share broker priorities for generation tasks (see
+    # app.core.scheduling). Weights per rate limit tier, e.g. "pro=4"; tiers
+    # not listed weigh 1
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_TIER_WEIGHTS: str = os.getenv(
+        "SCHEDULER_TIER_WEIGHTS", "pro=4,unlimited=8"
+    )
+    # Seconds the queue ledgers outlive their last submission
+    SCHEDULER_STATE_TTL: int = int(os.getenv("SCHEDULER_STATE_TTL", "86400"))
+    # Weight of the newest interval between task starts in the ETA average
+    SCHEDULER_ETA_SMOOTHING: float = float(os.getenv("SCHEDULER_ETA_SMOOTHING", "0.2"))
+    # Admission control: refuse generations whose projected queue wait
+    # exceeds ADMISSION_MAX_WAIT seconds (per queue group overrides, e.g.
+    # "llama3=30,phi3=10"). Batch submissions are shed earlier, once the
+    # wait exceeds ADMISSION_BATCH_SHARE of it. A queue with waiting tasks and
+    # no start for longer than its start interval is treated as stalled, for
+    # up to ADMISSION_STALL_INTERVALS intervals: past that, the waiting tasks
+    # are more likely lost than a worker still busy
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_WAIT: float = float(os.getenv("ADMISSION_MAX_WAIT", "120"))
+    ADMISSION_QUEUE_MAX_WAIT: str = os.getenv("ADMISSION_QUEUE_MAX_WAIT", "")
+    ADMISSION_BATCH_SHARE: float = float(os.getenv("ADMISSION_BATCH_SHARE", "0.5"))
+    ADMISSION_STALL_INTERVALS: float = float(
+        os.getenv("ADMISSION_STALL_INTERVALS", "60")
+    )
+    # Buffer result updates in each worker and write them in batches, at most
+    # RESULT_WRITE_FLUSH_MS after the first buffered update
+    RESULT_WRITE_BEHIND: bool = (
+        os.getenv("RESULT_WRITE_BEHIND", "false").lower() == "true"
+    )
+    RESULT_WRITE_FLUSH_MS: float = float(os.getenv("RESULT_WRITE_FLUSH_MS", "50"))
+    RESULT_WRITE_BATCH_SIZE: int = int(os.getenv("RESULT_WRITE_BATCH_SIZE", "200"))
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core.logger import log_error, log_info
+from app.core.redis_client import get_redis
+
+# Published by workers whenever a result row is updated
+RESULTS_CHANNEL = "llm_hub:results"
+
+# Delay before resubscribing after the Redis connection drops
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+async def publish(channel: str, payload: Dict[str, Any]) -> None:
+    """
+    Publish an event to every process subscribed to `channel`.
+
+    Failures are logged rather than raised: events are a latency optimisation
+    and the database remains the source of truth.
+    """
+    try:
+        await get_redis().publish(channel, json.dumps(payload, default=str))
+    except Exception as e:
+        log_error(e, operation="publish_event", channel=channel)
+
+
+async def publish_result_event(result_id, status: str, model: Optional[str] = None):
+    """Announce that a result changed status."""
+    await publish(
+        RESULTS_CHANNEL, {"result_id": str(result_id), "status": status, "model": model}
+    )
+
+
+class EventBus:
+    """
+    A single Redis pub/sub subscription per process, fanned out in memory.
+
+    Handlers registered with `on()` receive every event on their channel.
+    Requests waiting for a result register a future with `wait_for_result()`
+    and are woken as soon as the worker announces it, instead of each
+    request polling Postgres or holding its own Redis connection.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {
+            RESULTS_CHANNEL: [self._wake_result_waiters]
+        }
+        self._result_waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def on(self, channel: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Call `handler(payload)` for every event published on `channel`."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    @contextmanager
+    def wait_for_result(self, result_id):
+        """
+        Register interest in a result and yield a future resolved with its
+        next status event.
+
+        Register before reading the row from the database so an event
+        published in between is not missed.
+        """
+        key = str(result_id)
+        future = asyncio.get_running_loop().create_future()
+        self._result_waiters.setdefault(key, set()).add(future)
+        try:
+            yield future
+        finally:
+            waiters = self._result_waiters.get(key)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._result_waiters[key]
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests currently waiting for a result."""
+        return sum(len(waiters) for waiters in self._result_waiters.values())
+
+    def _wake_result_waiters(self, payload: Dict[str, Any]) -> None:
+        for future in self._result_waiters.get(payload.get("result_id"), ()):
+            if not future.done():
+                future.set_result(payload)
+
+    def dispatch(self, channel: str, payload: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception as e:
+                log_error(e, operation="dispatch_event", channel=channel)
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*self._handlers)
+                log_info("Subscribed to events", channels=list(self._handlers))
+                delay = RECONNECT_DELAY
+                async for message in pubsub.listen():
+                    self.dispatch(message["channel"], json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_error(e, operation="event_subscription")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self) -> None:
+        """Start the background subscription task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+event_bus = EventBus()
@@ -1,6 +1,8 @@
+import atexit
 import json
 import logging
 import os
+import queue
 from logging import handlers
 from typing import Any, Dict
 
@@ -31,12 +33,12 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
             log_record["level"] = record.levelname
 
 
+formatter = CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
+
 # Create console handler
 console_handler = logging.StreamHandler()
-console_handler.setFormatter(
-    CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
-)
-logger.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+_handlers = [console_handler]
 
 # Create file handler if logs directory exists
 logs_dir = os.path.join(os.getcwd(), "logs")
@@ -46,10 +48,40 @@ if os.path.exists(logs_dir):
         maxBytes=10 * 1024 * 1024,  # 10 MB
         backupCount=5,
     )
-    file_handler.setFormatter(
-        CustomJsonFormatter("%(timestamp)s %(level)s %(name)s %(message)s")
+    file_handler.setFormatter(formatter)
+    _handlers.append(file_handler)
+
+# Records are queued by the logging call and written to the console and
+# file by a background thread, so request handlers never block on I/O
+queue_handler = handlers.QueueHandler(queue.SimpleQueue())
+logger.addHandler(queue_handler)
+_listener = None
+
+
+def _start_listener() -> None:
+    global _listener
+    _listener = handlers.QueueListener(
+        queue_handler.queue, *_handlers, respect_handler_level=True
     )
-    logger.addHandler(file_handler)
+    _listener.start()
+
+
+def _restart_listener_in_child() -> None:
+    # A forked child (e.g. a Celery pool process) has the queue but not the
+    # listener thread
+    queue_handler.queue = queue.SimpleQueue()
+    _start_listener()
+
+
+def stop_logging() -> None:
+    """Write out the queued records and stop the background thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+_start_listener()
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_listener_in_child)
 
 
 def log_error(error: Exception, **kwargs: Any) -> None:
@@ -0,0 +1,84 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logger import log_error, log_info
+from app.core.redis_client import get_redis
+
+FAILURES_KEY_PREFIX = "llm_hub:login_failures:"
+
+
+class LoginLimiter:
+    """
+    Refuse logins for a username or client IP after repeated failures.
+
+    Failures are counted in Redis, so the limit holds across API processes,
+    and each failure restarts the `window`: a locked out username or IP is
+    let in again `window` seconds after its last failed attempt. Locked out
+    attempts are refused before their password is hashed, so guessing
+    cannot be used to burn bcrypt CPU. If Redis is unavailable, logins are
+    let through.
+    """
+
+    def __init__(
+        self,
+        max_user_failures: int = settings.LOGIN_MAX_FAILURES_PER_USER,
+        max_ip_failures: int = settings.LOGIN_MAX_FAILURES_PER_IP,
+        window: int = settings.LOGIN_FAILURE_WINDOW,
+    ):
+        self.limits = {"user": max_user_failures, "ip": max_ip_failures}
+        self.window = window
+
+    def _keys(self, username: str, ip: Optional[str]):
+        keys = {"user": f"{FAILURES_KEY_PREFIX}user:{username}"}
+        if ip:
+            keys["ip"] = f"{FAILURES_KEY_PREFIX}ip:{ip}"
+        return {kind: key for kind, key in keys.items() if self.limits[kind] > 0}
+
+    async def retry_after(self, username: str, ip: Optional[str]) -> Optional[int]:
+        """
+        Return how many seconds the username or IP is locked out for, or None
+        if it may try to log in.
+        """
+        keys = self._keys(username, ip)
+        if not keys:
+            return None
+        try:
+            redis = get_redis()
+            counts = await redis.mget(list(keys.values()))
+            locked = [
+                key
+                for (kind, key), count in zip(keys.items(), counts)
+                if count is not None and int(count) >= self.limits[kind]
+            ]
+            if not locked:
+                return None
+            return max([await redis.ttl(key) for key in locked] + [1])
+        except Exception as e:
+            log_error(e, operation="login_limiter_check")
+            return None
+
+    async def record_failure(self, username: str, ip: Optional[str]) -> None:
+        keys = self._keys(username, ip)
+        if not keys:
+            return
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                for key in keys.values():
+                    pipe.incr(key)
+                    pipe.expire(key, self.window)
+                await pipe.execute()
+        except Exception as e:
+            log_error(e, operation="login_limiter_record")
+        log_info("Login failed", username=username, ip=ip)
+
+    async def reset(self, username: str) -> None:
+        """Forget a username's failures after it logs in."""
+        if self.limits["user"] <= 0:
+            return
+        try:
+            await get_redis().delete(self._keys(username, None)["user"])
+        except Exception as e:
+            log_error(e, operation="login_limiter_reset")
+
+
+login_limiter = LoginLimiter()
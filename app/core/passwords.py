@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+class PasswordHasher:
+    """
+    Hash and verify passwords with bcrypt off the event loop.
+
+    A bcrypt verification costs 100-300 ms of CPU at the default cost, so
+    running it inline would stall every other request of the process. It
+    runs on a small thread pool instead (bcrypt releases the GIL while
+    hashing), and at most `concurrency` hashes run at once, so a login
+    burst cannot take every core. Hashes of a different cost than
+    BCRYPT_ROUNDS are reported for rehashing on the next successful login.
+    """
+
+    def __init__(
+        self,
+        rounds: int = settings.BCRYPT_ROUNDS,
+        concurrency: int = settings.PASSWORD_HASH_CONCURRENCY,
+    ):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.concurrency = concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.concurrency, thread_name_prefix="bcrypt"
+            )
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots, self._loop = asyncio.Semaphore(self.concurrency), loop
+        # Queue on the semaphore rather than in the executor, so a cancelled
+        # request gives up its place instead of hashing for nobody
+        async with self._slots:
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its hash.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether it matches, and a new hash at
+            the configured cost if the stored one should be replaced.
+        """
+        return await self._run(
+            self.context.verify_and_update, password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,254 @@
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.logger import log_error, log_info
+from app.core.redis_client import get_redis
+from app.schemas.user import User
+
+BUCKET_KEY_PREFIX = "llm_hub:ratelimit:"
+DEFAULT_TIER = "default"
+
+# Refill, check and take from every bucket of a request in one step, so
+# concurrent requests of a user across API processes cannot overdraw.
+# KEYS are the buckets; ARGV holds (capacity, refill per second, cost) per
+# bucket. Returns whether the request was allowed, the seconds until it
+# would be, and each bucket's level after it. Numbers are returned as
+# strings, since Redis truncates Lua numbers to integers.
+TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local levels, wait = {}, 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    level = math.min(capacity, level + elapsed * rate)
+    levels[i] = level
+    if level < cost then
+        wait = math.max(wait, (cost - level) / rate)
+    end
+end
+local allowed = wait == 0
+local result = {allowed and 1 or 0, tostring(wait)}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    if allowed then
+        levels[i] = levels[i] - tonumber(ARGV[i * 3])
+        redis.call('HSET', key, 'level', tostring(levels[i]), 'ts', tostring(now))
+        redis.call('PEXPIRE', key, math.ceil((capacity - levels[i]) / rate * 1000) + 1000)
+    end
+    result[#result + 1] = tostring(levels[i])
+end
+return result
+"""
+
+
+class Tier(NamedTuple):
+    requests_per_minute: int  # 0: unlimited
+    tokens_per_day: int  # 0: unlimited
+
+
+class Bucket(NamedTuple):
+    kind: str
+    capacity: float
+    rate: float  # Refill per second
+    window: int  # Seconds to refill from empty
+    cost: float
+
+
+def parse_tiers(value: str) -> Dict[str, Tier]:
+    """Parse RATE_LIMIT_TIERS ("name=requests/min:tokens/day,...")."""
+    tiers = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            name, limits = entry.split("=", 1)
+            requests, tokens = limits.split(":", 1)
+            tiers[name.strip()] = Tier(int(requests), int(tokens))
+    return tiers
+
+
+def estimate_tokens(prompt: str, options: Optional[dict] = None) -> int:
+    """
+    Estimate the tokens a generation will process: about four characters
+    per prompt token, plus num_predict or a default completion length.
+    """
+    num_predict = (options or {}).get("num_predict")
+    completion = (
+        num_predict
+        if num_predict and num_predict > 0
+        else settings.RATE_LIMIT_DEFAULT_COMPLETION_TOKENS
+    )
+    return math.ceil(len(prompt) / 4) + completion
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float, headers: Dict[str, str]):
+        super().__init__(f"Rate limit exceeded; retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.headers = headers
+
+
+class RateLimiter:
+    """
+    Per-user token buckets for requests per minute and estimated generation
+    tokens per day.
+
+    A bucket holds up to its limit and refills continuously, so a user may
+    burst up to the limit and then proceeds at the sustained rate. Limits
+    come from the user's tier (users.tier, else the default tier). Buckets
+    live in Redis and are checked atomically by a Lua script; with the
+    memory backend, or while Redis is unavailable, each process keeps its
+    own buckets.
+    """
+
+    def __init__(
+        self,
+        tiers: Dict[str, Tier] = parse_tiers(settings.RATE_LIMIT_TIERS),
+        backend: str = settings.RATE_LIMIT_BACKEND,
+        enabled: bool = settings.RATE_LIMIT_ENABLED,
+    ):
+        self.tiers = tiers
+        self.backend = backend
+        self.enabled = enabled
+        # (user_id, kind) -> (level, updated_at)
+        self._local: Dict[Tuple[int, str], Tuple[float, float]] = {}
+        self._script = None
+
+    def tier(self, user: User) -> Tier:
+        name = user.tier or DEFAULT_TIER
+        tier = self.tiers.get(name)
+        if tier is None:
+            log_error(KeyError(name), operation="rate_limit_tier", user=user.username)
+            tier = self.tiers.get(DEFAULT_TIER, Tier(0, 0))
+        return tier
+
+    def buckets(self, user: User, requests: int, tokens: int) -> List[Bucket]:
+        tier = self.tier(user)
+        buckets = []
+        for kind, limit, window, cost in (
+            ("requests", tier.requests_per_minute, 60, requests),
+            ("tokens", tier.tokens_per_day, 86400, tokens),
+        ):
+            if limit > 0 and cost > 0:
+                buckets.append(Bucket(kind, limit, limit / window, window, cost))
+        return buckets
+
+    def _take_local(self, user_id: int, buckets: List[Bucket]):
+        now = time.monotonic()
+        levels = []
+        for bucket in buckets:
+            level, updated_at = self._local.get(
+                (user_id, bucket.kind), (bucket.capacity, now)
+            )
+            levels.append(
+                min(bucket.capacity, level + (now - updated_at) * bucket.rate)
+            )
+        wait = max(
+            [(b.cost - level) / b.rate for b, level in zip(buckets, levels)] + [0]
+        )
+        if wait == 0:
+            levels = [level - b.cost for b, level in zip(buckets, levels)]
+            for bucket, level in zip(buckets, levels):
+                self._local[(user_id, bucket.kind)] = (level, now)
+        return wait == 0, wait, levels
+
+    async def _take_redis(self, user_id: int, buckets: List[Bucket]):
+        redis = get_redis()
+        if self._script is None:
+            self._script = redis.register_script(TAKE_SCRIPT)
+        keys = [f"{BUCKET_KEY_PREFIX}{user_id}:{b.kind}" for b in buckets]
+        args = [value for b in buckets for value in (b.capacity, b.rate, b.cost)]
+        allowed, wait, *levels = await self._script(keys=keys, args=args, client=redis)
+        return bool(int(allowed)), float(wait), [float(level) for level in levels]
+
+    async def take(
+        self, user: User, requests: int = 1, tokens: int = 0
+    ) -> Dict[str, str]:
+        """
+        Charge a user's buckets for a request.
+
+        Returns:
+            Dict[str, str]: RateLimit-* headers describing the bucket closest
+            to empty.
+
+        Raises:
+            RateLimitExceeded: If any bucket is short; nothing is charged.
+        """
+        buckets = self.buckets(user, requests, tokens) if self.enabled else []
+        if not buckets:
+            return {}
+        oversized = [b for b in buckets if b.cost > b.capacity]
+        if oversized:
+            # Could never be allowed; report when the bucket is next full
+            self._refuse(oversized, [0.0] * len(oversized), oversized[0].window)
+        try:
+            if self.backend == "redis":
+                allowed, wait, levels = await self._take_redis(user.id, buckets)
+            else:
+                allowed, wait, levels = self._take_local(user.id, buckets)
+        except Exception as e:
+            log_error(e, operation="rate_limit_take")
+            allowed, wait, levels = self._take_local(user.id, buckets)
+        if not allowed:
+            log_info("Rate limited", user=user.username, retry_after=round(wait, 1))
+            self._refuse(buckets, levels, wait)
+        return self._headers(buckets, levels)
+
+    def _refuse(self, buckets: List[Bucket], levels: List[float], wait: float):
+        headers = self._headers(buckets, levels)
+        headers["Retry-After"] = str(max(1, math.ceil(wait)))
+        raise RateLimitExceeded(wait, headers)
+
+    @staticmethod
+    def _headers(buckets: List[Bucket], levels: List[float]) -> Dict[str, str]:
+        # Describe the bucket with the least of its capacity left
+        bucket, level = min(
+            zip(buckets, levels), key=lambda item: item[1] / item[0].capacity
+        )
+        level = max(level, 0.0)
+        return {
+            "RateLimit-Limit": str(int(bucket.capacity)),
+            "RateLimit-Remaining": str(int(level)),
+            "RateLimit-Reset": str(math.ceil((bucket.capacity - level) / bucket.rate)),
+            "RateLimit-Policy": ", ".join(
+                f"{int(b.capacity)};w={b.window}" for b in buckets
+            ),
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+async def enforce_rate_limit(
+    request: Request, user: User, requests: int = 1, tokens: int = 0
+) -> None:
+    """
+    Charge the user's buckets, refusing the request with 429 if they are
+    short. The RateLimit-* headers are added to the response by the
+    rate_limit_headers middleware.
+    """
+    try:
+        request.state.rate_limit_headers = await rate_limiter.take(
+            user, requests, tokens
+        )
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429, detail="Rate limit exceeded", headers=e.headers
+        )
+
+
+async def rate_limited_user(
+    request: Request, current_user: User = Depends(get_current_user)
+) -> User:
+    """get_current_user, charging one request to the user's bucket."""
+    await enforce_rate_limit(request, current_user)
+    return current_user
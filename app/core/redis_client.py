@@ -0,0 +1,38 @@
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """
+    Return the process-wide asyncio Redis client, creating it on first use.
+
+    The client keeps its own connection pool, so it should be shared rather
+    than created per request.
+    """
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def reset_redis() -> None:
+    """
+    Drop the shared client without closing it.
+
+    Used in forked worker processes, which must not reuse the parent's sockets.
+    """
+    global _client
+    _client = None
@@ -0,0 +1,162 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.events import event_bus, publish
+from app.core.logger import log_error, log_info
+from app.core.redis_client import get_redis
+from app.schemas.llm import LLMResultSchema
+
+RESULT_KEY_PREFIX = "llm_hub:result:"
+MODEL_KEY_PREFIX = "llm_hub:result_models:"
+
+# Tells every process to drop a model's entries from its in-process tier
+INVALIDATION_CHANNEL = "llm_hub:result_cache"
+
+
+class ResultCache:
+    """
+    Two-tier cache of completed results keyed by prompt hash.
+
+    The first tier is a per-process LRU bounded by entry count, total bytes
+    and a TTL; the second is Redis, shared by every API replica and worker.
+    Workers write completed results through to Redis, and API processes
+    fill their LRU from Redis on first use, so Postgres is only queried when
+    both tiers miss.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = settings.RESULT_CACHE_MAX_BYTES,
+        ttl: float = settings.RESULT_CACHE_TTL,
+        redis_ttl: int = settings.RESULT_CACHE_REDIS_TTL,
+        enabled: bool = settings.RESULT_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.enabled = enabled
+        # prompt_hash -> (model, payload, size, expires_at), oldest first
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any], int, float]]" = (
+            OrderedDict()
+        )
+        self.bytes = 0
+        self.counters = dict.fromkeys(
+            ("memory_hits", "redis_hits", "misses", "evictions", "expirations"), 0
+        )
+
+    def _get_local(self, prompt_hash: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(prompt_hash)
+        if entry is None:
+            return None
+        if entry[3] <= time.monotonic():
+            self._drop(prompt_hash)
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(prompt_hash)
+        return entry[1]
+
+    def _put_local(self, prompt_hash: str, model: str, payload: Dict[str, Any]):
+        size = len(json.dumps(payload))
+        if size > self.max_bytes:
+            return
+        self._drop(prompt_hash)
+        self._entries[prompt_hash] = (model, payload, size, time.monotonic() + self.ttl)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.counters["evictions"] += 1
+
+    def _drop(self, prompt_hash: str) -> None:
+        entry = self._entries.pop(prompt_hash, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    async def get(self, prompt_hash: str) -> Optional[LLMResultSchema]:
+        """Return the cached completed result for a prompt hash, if any."""
+        if not self.enabled:
+            return None
+        payload = self._get_local(prompt_hash)
+        if payload is not None:
+            self.counters["memory_hits"] += 1
+            return LLMResultSchema.model_validate(payload)
+        try:
+            cached = await get_redis().get(RESULT_KEY_PREFIX + prompt_hash)
+        except Exception as e:
+            log_error(e, operation="result_cache_get")
+            cached = None
+        if cached is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["redis_hits"] += 1
+        payload = json.loads(cached)
+        self._put_local(prompt_hash, payload["model"], payload)
+        return LLMResultSchema.model_validate(payload)
+
+    async def put(self, prompt_hash: str, result) -> None:
+        """
+        Cache a completed result (an LLMResult row or LLMResultSchema) in
+        both tiers.
+        """
+        if not self.enabled or not prompt_hash:
+            return
+        payload = LLMResultSchema.model_validate(result).model_dump(mode="json")
+        self._put_local(prompt_hash, payload["model"], payload)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.set(
+                RESULT_KEY_PREFIX + prompt_hash, json.dumps(payload), ex=self.redis_ttl
+            )
+            pipe.sadd(MODEL_KEY_PREFIX + payload["model"], prompt_hash)
+            pipe.expire(MODEL_KEY_PREFIX + payload["model"], self.redis_ttl)
+            await pipe.execute()
+        except Exception as e:
+            log_error(e, operation="result_cache_put")
+
+    def drop_model(self, model: str) -> int:
+        """Drop a model's entries from this process's LRU."""
+        hashes = [h for h, entry in self._entries.items() if entry[0] == model]
+        for prompt_hash in hashes:
+            self._drop(prompt_hash)
+        return len(hashes)
+
+    async def invalidate(self, model: str) -> int:
+        """
+        Remove every cached result for `model` from Redis and from the LRU of
+        every process.
+
+        Returns:
+            int: Number of entries removed from Redis.
+        """
+        redis = get_redis()
+        model_key = MODEL_KEY_PREFIX + model
+        hashes = await redis.smembers(model_key)
+        if hashes:
+            await redis.delete(*(RESULT_KEY_PREFIX + h for h in hashes))
+        await redis.delete(model_key)
+        self.drop_model(model)
+        await publish(INVALIDATION_CHANNEL, {"model": model})
+        log_info("Result cache invalidated", model=model, entries=len(hashes))
+        return len(hashes)
+
+    def handle_invalidation(self, payload: Dict[str, Any]) -> None:
+        self.drop_model(payload["model"])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self.counters[k] for k in ("memory_hits", "redis_hits", "misses"))
+        hits = self.counters["memory_hits"] + self.counters["redis_hits"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+        }
+
+
+result_cache = ResultCache()
+event_bus.on(INVALIDATION_CHANNEL, result_cache.handle_invalidation)
@@ -0,0 +1,165 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import log_error, log_info
+from app.db import crud
+from app.db.base import AsyncSessionLocal
+
+
+async def _announce(db_result) -> None:
+    try:
+        await crud.announce_result(db_result)
+    except Exception as e:
+        log_error(e, operation="result_writer_announce", result_id=str(db_result.id))
+
+
+def _settle(waiters: List[asyncio.Future], error: Optional[Exception] = None):
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if error is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(error)
+
+
+class ResultWriter:
+    """
+    Write-behind buffer for the result updates of a worker process.
+
+    Generations finishing at about the same time have their statuses and
+    responses written by one UPDATE ... FROM (VALUES ...) statement instead
+    of a transaction each. A buffered update is flushed at most
+    `flush_interval` seconds after the first one of its batch, or as soon as
+    `batch_size` updates are waiting, and on shutdown.
+
+    `write` returns once its update is committed and announced, so a task is
+    never acknowledged before its result is stored. `set_status` does not
+    wait. When disabled, both write straight through the given session.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.RESULT_WRITE_BEHIND,
+        flush_interval: float = settings.RESULT_WRITE_FLUSH_MS / 1000,
+        batch_size: int = settings.RESULT_WRITE_BATCH_SIZE,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        # result_id -> (status, response, completed_at); a later update of
+        # the same result replaces an earlier one
+        self._pending: Dict[
+            uuid.UUID, Tuple[str, Optional[str], Optional[datetime]]
+        ] = {}
+        self._waiters: List[asyncio.Future] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+        self.counters = dict.fromkeys(("flushes", "rows", "errors"), 0)
+
+    def _start(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._ready, self._full = asyncio.Event(), asyncio.Event()
+            self._flusher = asyncio.create_task(self._run())
+
+    def _buffer(
+        self,
+        result_id: uuid.UUID,
+        status: str,
+        response: Optional[str],
+        completed_at: Optional[datetime],
+    ) -> None:
+        self._start()
+        self._pending[result_id] = (status, response, completed_at)
+        self._ready.set()
+        if len(self._pending) >= self.batch_size:
+            self._full.set()
+
+    async def write(
+        self, db: AsyncSession, result_id: uuid.UUID, response: str, status: str
+    ) -> None:
+        """Store a finished result and wait until it is committed."""
+        if not self.enabled:
+            await crud.update_llm_result(db, result_id, response, status)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._buffer(result_id, status, response, datetime.utcnow())
+        await waiter
+
+    async def set_status(
+        self, db: AsyncSession, result_id: uuid.UUID, status: str
+    ) -> None:
+        """Set a result's status without waiting for the write."""
+        if not self.enabled:
+            await crud.set_llm_result_status(db, result_id, status)
+            return
+        self._buffer(result_id, status, None, None)
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._ready.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered update with one statement and announce them."""
+        pending, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, []
+        if self._ready is not None:
+            self._ready.clear()
+            self._full.clear()
+        if not pending:
+            return
+        updates = [(result_id, *update) for result_id, update in pending.items()]
+        try:
+            async with self.session_factory() as db:
+                db_results = await crud.update_llm_results(db, updates)
+        except Exception as e:
+            self.counters["errors"] += 1
+            log_error(e, operation="result_writer_flush", rows=len(updates))
+            _settle(waiters, e)
+            return
+        self.counters["flushes"] += 1
+        self.counters["rows"] += len(updates)
+        # Status-only updates (running, pending) are not announced
+        for db_result in db_results:
+            if pending[db_result.id][1] is not None:
+                await _announce(db_result)
+        _settle(waiters)
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        if self._pending:
+            log_info("Flushing buffered result updates", rows=len(self._pending))
+        if self._flusher is not None:
+            # Wake the flusher for a last flush rather than cancelling it
+            # in the middle of one
+            self._closing = True
+            self._ready.set()
+            self._full.set()
+            await self._flusher
+            self._flusher = None
+            self._closing = False
+        await self.flush()
+
+    def reset(self) -> None:
+        """Forget the flusher and buffer inherited from a parent process."""
+        self._pending, self._waiters = {}, []
+        self._ready = self._full = self._flusher = None
+        self._closing = False
+
+
+result_writer = ResultWriter()
@@ -0,0 +1,319 @@
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from app.core.affinity import queue_for_model
+from app.core.config import settings
+from app.core.logger import log_error
+from app.core.redis_client import get_redis
+from app.schemas.user import User
+
+SCHEDULER_KEY_PREFIX = "llm_hub:scheduler:"
+
+# Broker priorities of each lane's least backlogged users; lower runs first.
+# A lane spans LANE_LEVELS priorities, so priorities run from 0 to 9
+LANES = {"interactive": 0, "batch": 5}
+LANE_LEVELS = 5
+
+# Shared by the scripts below. KEYS: queue ledger (sorted set), user
+# backlogs, task owners, enqueue times (sorted set), sequence, stats.
+# A task leaves the ledger when a worker starts it or its publish fails;
+# tasks that never start (lost by a dead worker or the broker, revoked, or
+# failed as stale claims) are swept once older than the maximum age, so
+# they cannot inflate depths, positions and fair-share levels for good.
+LEDGER_LIB = """
+local function drop(id)
+    redis.call('ZREM', KEYS[4], id)
+    if redis.call('ZREM', KEYS[1], id) == 0 then
+        return 0
+    end
+    local owner = redis.call('HGET', KEYS[3], id)
+    if owner then
+        redis.call('HDEL', KEYS[3], id)
+        if redis.call('HINCRBY', KEYS[2], owner, -1) <= 0 then
+            redis.call('HDEL', KEYS[2], owner)
+        end
+    end
+    return 1
+end
+local function now()
+    local parts = redis.call('TIME')
+    return tonumber(parts[1]) + tonumber(parts[2]) / 1000000
+end
+local function sweep(t, max_age)
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', t - max_age)
+    for _, id in ipairs(expired) do
+        drop(id)
+    end
+end
+"""
+
+# Register tasks in their queue's ledger and pick their broker priorities.
+# ARGV: max age in seconds, user, weight, lane base, levels, ttl in ms,
+# result ids... A task's level within its lane grows with log2 of the
+# user's backlog in the queue over their weight, so heavy submitters sink
+# behind light ones.
+ENQUEUE_SCRIPT = (
+    LEDGER_LIB
+    + """
+local t = now()
+sweep(t, tonumber(ARGV[1]))
+local priorities = {}
+for i = 7, #ARGV do
+    local ahead = redis.call('HINCRBY', KEYS[2], ARGV[2], 1) - 1
+    local share = 1 + ahead / tonumber(ARGV[3])
+    local level = 0
+    while share >= 2 and level < tonumber(ARGV[5]) - 1 do
+        share = share / 2
+        level = level + 1
+    end
+    local priority = tonumber(ARGV[4]) + level
+    local seq = redis.call('INCR', KEYS[5])
+    redis.call('ZADD', KEYS[1], priority * 1e12 + seq, ARGV[i])
+    redis.call('ZADD', KEYS[4], t, ARGV[i])
+    redis.call('HSET', KEYS[3], ARGV[i], ARGV[2])
+    priorities[#priorities + 1] = priority
+end
+for _, key in ipairs(KEYS) do
+    redis.call('PEXPIRE', key, ARGV[6])
+end
+return priorities
+"""
+)
+
+# Take a task out of its queue's ledger when a worker starts it (or it
+# will never start). ARGV: max age, result id, "1" if started, EWMA weight
+# of the newest sample. The interval between starts is sampled only while
+# the queue stayed backlogged, so idle time does not inflate the estimate.
+REMOVE_SCRIPT = (
+    LEDGER_LIB
+    + """
+local t = now()
+local removed = drop(ARGV[2])
+sweep(t, tonumber(ARGV[1]))
+if removed == 0 then
+    return 0
+end
+if ARGV[3] == '1' then
+    local stats = redis.call('HMGET', KEYS[6], 'last_start', 'busy', 'interval')
+    if stats[2] == '1' then
+        local sample = t - tonumber(stats[1])
+        local interval = tonumber(stats[3])
+        if interval then
+            local alpha = tonumber(ARGV[4])
+            sample = alpha * sample + (1 - alpha) * interval
+        end
+        redis.call('HSET', KEYS[6], 'interval', tostring(sample))
+    end
+    local busy = redis.call('ZCARD', KEYS[1]) > 0 and '1' or '0'
+    redis.call('HSET', KEYS[6], 'last_start', tostring(t), 'busy', busy)
+end
+return 1
+"""
+)
+
+# A queue's backlog and service rate, after sweeping expired tasks.
+# ARGV: max age, the lowest batch lane score. Returns depth, interactive
+# depth, last start, interval, now (the floats as strings; a nil would cut
+# the reply short, so missing stats are returned as false)
+STATS_SCRIPT = (
+    LEDGER_LIB
+    + """
+local t = now()
+sweep(t, tonumber(ARGV[1]))
+local stats = redis.call('HMGET', KEYS[6], 'last_start', 'interval')
+return {
+    redis.call('ZCARD', KEYS[1]),
+    redis.call('ZCOUNT', KEYS[1], '-inf', '(' .. ARGV[2]),
+    stats[1] or false,
+    stats[2] or false,
+    tostring(t),
+}
+"""
+)
+
+LEDGER_KEYS = ("queue", "backlog", "owners", "enqueued", "seq", "stats")
+
+
+class QueueStats(NamedTuple):
+    depth: int  # Tasks waiting in the queue
+    interactive_depth: int  # Of which in the interactive lane
+    interval: Optional[float]  # Average seconds between task starts
+    since_start: Optional[float]  # Seconds since a task last started
+
+
+class QueuePosition(NamedTuple):
+    position: int  # Tasks ahead in the queue
+    eta_seconds: Optional[float]  # None until the queue's throughput is known
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse SCHEDULER_TIER_WEIGHTS ("tier=weight,...")."""
+    weights = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            tier, weight = entry.split("=", 1)
+            weights[tier.strip()] = float(weight)
+    return weights
+
+
+class TaskScheduler:
+    """
+    Fair-share priorities for generation tasks.
+
+    Tasks go to their model's Celery queue as before, but with a broker
+    priority made of a lane and a fair-share level. Interactive requests
+    outrank batch submissions. Within a lane, a user's level grows with
+    log2 of their backlog in the queue divided by their tier's weight, so a
+    user with thousands of queued prompts sinks below one with a handful,
+    and a user of weight 4 may keep four times the backlog at each level.
+
+    Each queue's tasks are also kept in a Redis sorted set in the order the
+    broker serves them (priority, then submission), which gives a task's
+    position in the queue; its ETA follows from the average interval
+    between task starts while the queue was backlogged. Tasks that never
+    start are swept from the ledger `max_age` seconds after submission. If
+    Redis is unavailable, tasks fall back to their lane's base priority and
+    report no position.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, float] = parse_weights(settings.SCHEDULER_TIER_WEIGHTS),
+        enabled: bool = settings.SCHEDULER_ENABLED,
+        ttl: int = settings.SCHEDULER_STATE_TTL,
+        alpha: float = settings.SCHEDULER_ETA_SMOOTHING,
+        max_age: int = settings.RESULT_CLAIM_TIMEOUT,
+    ):
+        self.weights = weights
+        self.enabled = enabled
+        self.ttl = ttl
+        self.alpha = alpha
+        self.max_age = max_age
+        self._scripts = {}
+
+    def _keys(self, model: str, *names: str) -> List[str]:
+        return self._queue_keys(queue_for_model(model), *names)
+
+    @staticmethod
+    def _queue_keys(queue: str, *names: str) -> List[str]:
+        return [f"{SCHEDULER_KEY_PREFIX}{queue}:{name}" for name in names]
+
+    def _script(self, redis, source: str):
+        if source not in self._scripts:
+            self._scripts[source] = redis.register_script(source)
+        return self._scripts[source]
+
+    def weight(self, user: User) -> float:
+        return self.weights.get(user.tier or "default", 1.0)
+
+    async def enqueue(
+        self, model: str, user: User, result_ids: Sequence[uuid.UUID], lane: str
+    ) -> List[int]:
+        """
+        Register tasks about to be published for `model`.
+
+        Returns:
+            List[int]: The broker priority of each task, in order.
+        """
+        base = LANES[lane]
+        if not self.enabled or not result_ids:
+            return [base] * len(result_ids)
+        keys = self._keys(model, *LEDGER_KEYS)
+        args = [
+            self.max_age,
+            user.id,
+            self.weight(user),
+            base,
+            LANE_LEVELS,
+            self.ttl * 1000,
+        ]
+        try:
+            redis = get_redis()
+            priorities = await self._script(redis, ENQUEUE_SCRIPT)(
+                keys=keys, args=args + [str(i) for i in result_ids], client=redis
+            )
+            return [int(priority) for priority in priorities]
+        except Exception as e:
+            log_error(e, operation="scheduler_enqueue", model=model)
+            return [base] * len(result_ids)
+
+    async def remove(
+        self, model: str, result_id: uuid.UUID, started: bool = True
+    ) -> None:
+        """
+        Take a task out of its queue: when a worker starts it, or with
+        `started=False` when it will never start (its publish failed, it was
+        revoked, or its result was failed as a stale claim).
+        """
+        if not self.enabled:
+            return
+        keys = self._keys(model, *LEDGER_KEYS)
+        try:
+            redis = get_redis()
+            await self._script(redis, REMOVE_SCRIPT)(
+                keys=keys,
+                args=[
+                    self.max_age,
+                    str(result_id),
+                    "1" if started else "0",
+                    self.alpha,
+                ],
+                client=redis,
+            )
+        except Exception as e:
+            log_error(e, operation="scheduler_remove", model=model)
+
+    async def positions(
+        self, model: str, result_ids: Sequence[uuid.UUID]
+    ) -> Dict[uuid.UUID, QueuePosition]:
+        """Queue positions of those tasks still waiting for a worker."""
+        if not self.enabled or not result_ids:
+            return {}
+        queue, stats = self._keys(model, "queue", "stats")
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for result_id in result_ids:
+                    pipe.zrank(queue, str(result_id))
+                pipe.hget(stats, "interval")
+                *ranks, interval = await pipe.execute()
+        except Exception as e:
+            log_error(e, operation="scheduler_positions", model=model)
+            return {}
+        interval = float(interval) if interval is not None else None
+        return {
+            result_id: QueuePosition(
+                rank, (rank + 1) * interval if interval is not None else None
+            )
+            for result_id, rank in zip(result_ids, ranks)
+            if rank is not None
+        }
+
+    async def queue_stats(self, queue: str) -> Optional[QueueStats]:
+        """
+        Backlog and service rate of a Celery queue, or None if unknown
+        (scheduler disabled or Redis unavailable).
+        """
+        if not self.enabled:
+            return None
+        try:
+            redis = get_redis()
+            # Interactive tasks have priorities below the batch lane's
+            depth, interactive_depth, last_start, interval, now = await self._script(
+                redis, STATS_SCRIPT
+            )(
+                keys=self._queue_keys(queue, *LEDGER_KEYS),
+                args=[self.max_age, f"{LANES['batch'] * 1e12:.0f}"],
+                client=redis,
+            )
+        except Exception as e:
+            log_error(e, operation="scheduler_queue_stats", queue=queue)
+            return None
+        return QueueStats(
+            depth,
+            interactive_depth,
+            float(interval) if interval is not None else None,
+            float(now) - float(last_start) if last_start is not None else None,
+        )
+
+
+task_scheduler = TaskScheduler()
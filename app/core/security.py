@@ -3,7 +3,7 @@ from typing import Optional
 
 import jwt
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException, status
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 
@@ -30,6 +30,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None  # Absent from tokens issued before it was added
+    exp: Optional[int] = None  # Expiry as a Unix timestamp
 
 
 def create_access_token(data: dict):
@@ -82,7 +84,9 @@ def verify_token(token: str):
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-        token_data = TokenData(username=username)
+        token_data = TokenData(
+            username=username, user_id=payload.get("uid"), exp=payload.get("exp")
+        )
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired"
@@ -92,16 +96,3 @@ def verify_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
     return token_data
-
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """
-    Dependency to get the current authenticated user from a token.
-
-    Args:
-        token (str): JWT token from request.
-
-    Returns:
-        TokenData: Current user's token data.
-    """
-    return verify_token(token)
@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.events import event_bus, publish
+from app.core.logger import log_error, log_info
+from app.core.result_cache import INVALIDATION_CHANNEL
+from app.db.models import LLMResult
+from app.services.ollama import ollama_service
+
+# Carries the embedding of each newly completed result to every API process
+EMBEDDINGS_CHANNEL = "llm_hub:embeddings"
+
+# Width of a result ID row in the on-disk ID file (UUID plus newline)
+ID_WIDTH = 37
+
+
+class VectorIndex:
+    """
+    Unit-length embeddings and their result IDs in one float32 matrix, so a
+    lookup is a single matrix-vector product.
+
+    The index is a ring of `max_entries` rows; once full, the oldest entry
+    is overwritten. With a `path`, the matrix is a memory-mapped file and
+    the IDs are fixed-width lines in a sidecar file, both updated in place
+    on each add, so a restarted process picks up where it left off without
+    re-embedding anything.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        max_entries: int,
+        path: Optional[Path] = None,
+        key: Optional[str] = None,
+    ):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.path = path
+        self.key = key
+        self.count = 0
+        self.next = 0
+        if path is None:
+            self.vectors = np.zeros((max_entries, dim), dtype=np.float32)
+            self.ids: List[Optional[str]] = [None] * max_entries
+        else:
+            self._open(path)
+
+    def _open(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path = path.with_suffix(".json")
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        if meta.get("dim") != self.dim or meta.get("max_entries") != self.max_entries:
+            # Different embedding model or size: start over
+            meta = {}
+        mode = "r+" if meta else "w+"
+        self.vectors = np.memmap(
+            path.with_suffix(".f32"),
+            dtype=np.float32,
+            mode=mode,
+            shape=(self.max_entries, self.dim),
+        )
+        ids_path = path.with_suffix(".ids")
+        if not meta:
+            ids_path.write_bytes((b" " * (ID_WIDTH - 1) + b"\n") * self.max_entries)
+        raw = ids_path.read_bytes()
+        self.ids = [
+            raw[i : i + ID_WIDTH - 1].decode().strip() or None
+            for i in range(0, len(raw), ID_WIDTH)
+        ]
+        self._ids_file = open(ids_path, "r+b")
+        self.count = meta.get("count", 0)
+        self.next = meta.get("next", 0)
+
+    def add(self, result_id: str, vector: np.ndarray) -> None:
+        row = self.next
+        self.vectors[row] = vector
+        self.ids[row] = result_id
+        self.next = (row + 1) % self.max_entries
+        self.count = min(self.count + 1, self.max_entries)
+        if self.path is not None:
+            self._ids_file.seek(row * ID_WIDTH)
+            self._ids_file.write(result_id.ljust(ID_WIDTH - 1).encode())
+            self._ids_file.flush()
+            self.path.with_suffix(".json").write_text(
+                json.dumps(
+                    {
+                        "key": self.key,
+                        "dim": self.dim,
+                        "max_entries": self.max_entries,
+                        "count": self.count,
+                        "next": self.next,
+                    }
+                )
+            )
+
+    def search(self, vector: np.ndarray) -> Tuple[float, Optional[str]]:
+        """Return the best cosine similarity and its result ID."""
+        if self.count == 0:
+            return 0.0, None
+        scores = self.vectors[: self.count] @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), self.ids[best]
+
+    def close(self) -> None:
+        if self.path is not None:
+            self.vectors.flush()
+            self._ids_file.close()
+
+
+def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+class SemanticCache:
+    """
+    Opt-in cache tier matching prompts by embedding similarity.
+
+    There is one index per model and set of output-affecting options, so a
+    match never crosses models or sampling settings. Lookups are bounded by
+    `budget` seconds beyond the exact-match lookup they run alongside: if the
+    embedding is not ready in time, the request is treated as a miss rather
+    than slowed down.
+
+    Completed results are embedded once, by the process that completed them,
+    and the vector is broadcast so every API process adds it to its index.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.SEMANTIC_CACHE_ENABLED,
+        embed_model: str = settings.SEMANTIC_CACHE_EMBED_MODEL,
+        threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+        budget: float = settings.SEMANTIC_CACHE_BUDGET_MS / 1000,
+        max_entries: int = settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        directory: Optional[str] = settings.SEMANTIC_CACHE_DIR,
+    ):
+        self.enabled = enabled
+        self.embed_model = embed_model
+        self.threshold = threshold
+        self.budget = budget
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.indexes: Dict[str, VectorIndex] = {}
+        self.counters = dict.fromkeys(("hits", "misses", "over_budget"), 0)
+
+    @staticmethod
+    def index_key(model: str, options: Optional[Dict[str, Any]] = None) -> str:
+        return f"{model}|{LLMResult.canonical_options(options)}"
+
+    def _index(self, key: str, dim: int) -> VectorIndex:
+        index = self.indexes.get(key)
+        if index is None or index.dim != dim:
+            path = None
+            if self.directory is not None:
+                path = self.directory / hashlib.sha256(key.encode()).hexdigest()[:16]
+            index = VectorIndex(dim, self.max_entries, path, key)
+            self.indexes[key] = index
+        return index
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        return _normalize(await ollama_service.embed(self.embed_model, text))
+
+    def start_lookup(self, prompt: str) -> Optional[asyncio.Task]:
+        """
+        Start embedding a prompt in the background, so the embedding overlaps
+        the exact-match lookup. Returns None when the cache is disabled.
+        """
+        if not self.enabled:
+            return None
+        return asyncio.create_task(self.embed(prompt))
+
+    def cancel_lookup(self, pending: asyncio.Task) -> None:
+        """Abandon a lookup that is no longer needed."""
+        if not pending.done():
+            pending.cancel()
+        elif not pending.cancelled():
+            pending.exception()  # Mark a failure as handled
+
+    async def lookup(
+        self,
+        pending: asyncio.Task,
+        model: str,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Optional[uuid.UUID], float]:
+        """
+        Finish a lookup started with `start_lookup`.
+
+        Returns:
+            tuple[UUID | None, float]: The matching result ID (None on a
+            miss) and the best similarity found.
+        """
+        started = time.monotonic()
+        try:
+            vector = await asyncio.wait_for(pending, self.budget)
+        except asyncio.TimeoutError:
+            self.counters["over_budget"] += 1
+            return None, 0.0
+        except Exception as e:
+            log_error(e, operation="semantic_cache_lookup")
+            return None, 0.0
+        index = self.indexes.get(self.index_key(model, options))
+        if vector is None or index is None or index.dim != vector.shape[0]:
+            self.counters["misses"] += 1
+            return None, 0.0
+        score, result_id = index.search(vector)
+        if result_id is None or score < self.threshold:
+            self.counters["misses"] += 1
+            return None, score
+        self.counters["hits"] += 1
+        log_info(
+            "Semantic cache hit",
+            model=model,
+            similarity=round(score, 4),
+            lookup_ms=round((time.monotonic() - started) * 1000, 2),
+        )
+        return uuid.UUID(result_id), score
+
+    async def index_result(self, result: LLMResult) -> None:
+        """
+        Embed a completed result's prompt and broadcast it to every process.
+        """
+        if not self.enabled:
+            return
+        try:
+            vector = await self.embed(result.prompt)
+        except Exception as e:
+            log_error(e, operation="semantic_cache_index", result_id=str(result.id))
+            return
+        if vector is None:
+            return
+        await publish(
+            EMBEDDINGS_CHANNEL,
+            {
+                "key": self.index_key(result.model, result.options),
+                "result_id": str(result.id),
+                "vector": vector.tolist(),
+            },
+        )
+
+    def add(self, key: str, result_id: str, vector: np.ndarray) -> None:
+        self._index(key, vector.shape[0]).add(result_id, vector)
+
+    def handle_embedding(self, payload: Dict[str, Any]) -> None:
+        if self.enabled:
+            vector = np.asarray(payload["vector"], dtype=np.float32)
+            self.add(payload["key"], payload["result_id"], vector)
+
+    def handle_invalidation(self, payload: Dict[str, Any]) -> None:
+        prefix = f"{payload['model']}|"
+        for key in [k for k in self.indexes if k.startswith(prefix)]:
+            index = self.indexes.pop(key)
+            index.close()
+            if index.path is not None:
+                for suffix in (".f32", ".ids", ".json"):
+                    index.path.with_suffix(suffix).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "enabled": self.enabled,
+            "indexes": len(self.indexes),
+            "entries": sum(index.count for index in self.indexes.values()),
+        }
+
+    def load(self) -> None:
+        """Reopen the on-disk indexes written by a previous run."""
+        if not self.enabled or self.directory is None:
+            return
+        for meta_path in self.directory.glob("*.json"):
+            meta = json.loads(meta_path.read_text())
+            if "key" in meta:
+                self._index(meta["key"], meta["dim"])
+        log_info("Semantic cache loaded", indexes=len(self.indexes))
+
+
+semantic_cache = SemanticCache()
+event_bus.on(EMBEDDINGS_CHANNEL, semantic_cache.handle_embedding)
+event_bus.on(INVALIDATION_CHANNEL, semantic_cache.handle_invalidation)
@@ -1,17 +1,81 @@
-import asyncio
 import uuid
+from typing import Optional
 
+from celery.signals import (
+    task_revoked,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.celery_app import celery_app
+from app.core.coalescing import request_coalescer
 from app.core.logger import logger
-from app.db import crud
-from app.db.base import AsyncSessionLocal
+from app.core.redis_client import close_redis, reset_redis
+from app.core.result_writer import result_writer
+from app.core.scheduling import task_scheduler
+from app.core.worker_runtime import worker_runtime
+from app.db import models
+from app.db.base import AsyncSessionLocal, dispose_engines, reset_engines
 from app.services.ollama import ollama_service, OllamaServiceException
 
+# Shared resources live on the worker's long-lived event loop
+worker_runtime.on_startup(ollama_service.startup)
+worker_runtime.on_shutdown(ollama_service.shutdown)
+# Flush buffered result updates while Redis and the DB pool are still open
+worker_runtime.on_shutdown(result_writer.stop)
+worker_runtime.on_shutdown(close_redis)
+worker_runtime.on_shutdown(dispose_engines)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Give each forked worker process its own event loop and connection pools.
+
+    Connections inherited from the parent process must not be reused, so the
+    clients are dropped here and recreated on the first task.
+    """
+    worker_runtime.reset()
+    result_writer.reset()
+    ollama_service.reset()
+    reset_redis()
+    reset_engines()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker(**kwargs):
+    """
+    Close the worker's pooled connections and stop its event loop.
+    """
+    worker_runtime.stop()
+
+
+async def _fail_after_database_error(
+    db, result_id: uuid.UUID, prompt_hash: str, error: SQLAlchemyError
+) -> None:
+    """
+    Fail a result on a clean transaction after a database error, so it does
+    not stay running and hold its prompt hash.
+    """
+    try:
+        await db.rollback()
+        await result_writer.write(db, result_id, f"Error: {str(error)}", "failed")
+    except SQLAlchemyError as e:
+        # Its claim is taken over once RESULT_CLAIM_TIMEOUT passes
+        logger.error(
+            f"Could not fail result after database error: {str(e)}",
+            extra={"result_id": str(result_id), "error": str(e)},
+        )
+    await request_coalescer.release(prompt_hash, result_id)
+
 
 @celery_app.task(bind=True, max_retries=3)
-def generate_text(self, result_id: str, model: str, prompt: str):
+def generate_text(
+    self, result_id: str, model: str, prompt: str, options: Optional[dict] = None
+):
     """
     Celery task for generating text using the Ollama service.
 
@@ -21,21 +85,33 @@ def generate_text(self, result_id: str, model: str, prompt: str):
         result_id (str): The UUID of the LLMResult to update.
         model (str): The name of the model to use for text generation.
         prompt (str): The input prompt for text generation.
+        options (dict, optional): Ollama model options, e.g. num_predict.
 
     Returns:
         str: The generated text response.
     """
 
+    result_uuid = uuid.UUID(result_id)
+    prompt_hash = models.LLMResult.generate_prompt_hash(model, prompt, options)
+    # Task request state is thread-local, so read it before leaving this thread
+    retries = self.request.retries
+    final_attempt = retries >= self.max_retries
+
     async def _generate():
         async with AsyncSessionLocal() as db:
             try:
+                # Leave the queue ledger, so positions behind this task move up
+                await task_scheduler.remove(model, result_uuid)
+                await result_writer.set_status(db, result_uuid, "running")
+
                 # Attempt to generate text using the Ollama service
-                result = await ollama_service.generate_text(model, prompt)
+                result = await ollama_service.generate_text(model, prompt, options)
 
                 # Update the database with the generated result
-                await crud.update_llm_result(
-                    db, uuid.UUID(result_id), result["response"], "completed"
+                await result_writer.write(
+                    db, result_uuid, result["response"], "completed"
                 )
+                await request_coalescer.release(prompt_hash, result_uuid)
 
                 # Log successful completion
                 logger.info(
@@ -54,11 +130,15 @@ def generate_text(self, result_id: str, model: str, prompt: str):
                     f"Ollama service error in generate_text task: {str(e)}",
                     extra={"result_id": result_id, "model": model, "error": str(e)},
                 )
-                await crud.update_llm_result(
-                    db, uuid.UUID(result_id), f"Error: {str(e)}", "failed"
-                )
-                # Retry the task with exponential backoff
-                raise self.retry(exc=e, countdown=2**self.request.retries)
+                if final_attempt:
+                    await result_writer.write(
+                        db, result_uuid, f"Error: {str(e)}", "failed"
+                    )
+                    await request_coalescer.release(prompt_hash, result_uuid)
+                else:
+                    # Keep the prompt hash held while the retry is queued
+                    await result_writer.set_status(db, result_uuid, "pending")
+                raise
 
             except SQLAlchemyError as e:
                 # Handle database-related errors
@@ -66,6 +146,7 @@ def generate_text(self, result_id: str, model: str, prompt: str):
                     f"Database error in generate_text task: {str(e)}",
                     extra={"result_id": result_id, "model": model, "error": str(e)},
                 )
+                await _fail_after_database_error(db, result_uuid, prompt_hash, e)
                 raise
 
             except Exception as e:
@@ -74,10 +155,47 @@ def generate_text(self, result_id: str, model: str, prompt: str):
                     f"Unexpected error in generate_text task: {str(e)}",
                     extra={"result_id": result_id, "model": model, "error": str(e)},
                 )
-                await crud.update_llm_result(
-                    db, uuid.UUID(result_id), f"Error: {str(e)}", "failed"
-                )
+                await result_writer.write(db, result_uuid, f"Error: {str(e)}", "failed")
+                await request_coalescer.release(prompt_hash, result_uuid)
                 raise
 
-    # Run the asynchronous function in the synchronous Celery task
-    return asyncio.get_event_loop().run_until_complete(_generate())
+    # Run on the worker's shared event loop; many tasks can be in flight at once
+    try:
+        return worker_runtime.run(_generate())
+    except OllamaServiceException as e:
+        # Retry the task with exponential backoff
+        raise self.retry(exc=e, countdown=2**retries)
+
+
+async def _abandon(
+    result_id: uuid.UUID, model: str, prompt: str, options: Optional[dict]
+) -> None:
+    """
+    Fail a result whose task will never finish and release what it holds.
+    """
+    await task_scheduler.remove(model, result_id, started=False)
+    async with AsyncSessionLocal() as db:
+        await result_writer.write(db, result_id, "Error: generation revoked", "failed")
+    await request_coalescer.release(
+        models.LLMResult.generate_prompt_hash(model, prompt, options), result_id
+    )
+
+
+@task_revoked.connect
+def abandon_revoked_generation(sender=None, request=None, **kwargs):
+    """
+    A revoked or expired generation task never runs (or is killed): fail its
+    result and drop it from the queue ledger, so it neither holds its prompt
+    hash nor counts towards the queue's depth.
+    """
+    if getattr(sender, "name", None) != generate_text.name or request is None:
+        return
+    result_id, model, prompt = request.args[:3]
+    options = request.kwargs.get("options")
+    try:
+        worker_runtime.run(_abandon(uuid.UUID(result_id), model, prompt, options))
+    except Exception as e:
+        logger.error(
+            f"Could not abandon revoked generation: {str(e)}",
+            extra={"result_id": result_id, "model": model, "error": str(e)},
+        )
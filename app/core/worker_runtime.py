@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.core.logger import log_error, log_info
+
+
+class WorkerRuntime:
+    """
+    A long-lived asyncio event loop shared by every task in a worker process.
+
+    The loop runs on a background thread and is started on first use. Celery
+    tasks submit coroutines to it and block until they finish, so the DB
+    pool, the Ollama HTTP client and the Redis client are created once per
+    process and reused by all tasks. With the "threads" pool many tasks are
+    in flight on the same loop at once, one per pool thread, so the pool's
+    size (CELERY_ASYNC_CONCURRENCY) is what bounds them.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._startup_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
+    def on_startup(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Register a coroutine function run on the loop when it starts."""
+        self._startup_hooks.append(hook)
+
+    def on_shutdown(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Register a coroutine function run on the loop before it stops."""
+        self._shutdown_hooks.append(hook)
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> None:
+        """Start the loop thread and run the startup hooks. Idempotent."""
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(
+                target=run, name="worker-event-loop", daemon=True
+            )
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+            asyncio.run_coroutine_threadsafe(self._startup(), loop).result()
+            log_info("Worker event loop started")
+
+    async def _startup(self) -> None:
+        for hook in self._startup_hooks:
+            await hook()
+
+    async def _shutdown(self) -> None:
+        for hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                log_error(e, operation="worker_runtime_shutdown")
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the shared loop and wait for its result.
+
+        Safe to call from any thread other than the loop's own.
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout)
+
+    def stop(self) -> None:
+        """Run the shutdown hooks, then stop the loop and join its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(30)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join(timeout=5)
+                loop.close()
+                self._loop = self._thread = None
+            log_info("Worker event loop stopped")
+
+    def reset(self) -> None:
+        """
+        Forget the loop without stopping it.
+
+        A forked child inherits the parent's loop object but not its thread,
+        so it must start a fresh loop of its own.
+        """
+        self._loop = self._thread = None
+        self._lock = threading.Lock()
+
+
+worker_runtime = WorkerRuntime()
@@ -1,20 +1,166 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import functools
+import logging
+import uuid
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import settings
+from app.core.logger import queue_handler
+
+
+def engine_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for create_async_engine, from the DB_* settings.
+    """
+    connect_args: Dict[str, Any] = {
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+    }
+    if settings.DB_PGBOUNCER:
+        # In transaction mode consecutive statements may run on different
+        # server connections, so prepared statements cannot be reused and
+        # their names must not collide
+        connect_args.update(
+            prepared_statement_cache_size=0,
+            statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+        )
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+if settings.DB_ECHO:
+    # Like echo=True, but written by the logger's background thread
+    sql_logger = logging.getLogger("sqlalchemy.engine")
+    sql_logger.setLevel(logging.INFO)
+    sql_logger.addHandler(queue_handler)
+
+
+class PoolMetrics:
+    """
+    Connection pool gauges and counters of one engine.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.pool = engine.sync_engine.pool
+        self.connects = self.checkouts = self.invalidations = 0
+        self.reads = self.fallbacks = 0  # Replica reads, and misses retried on primary
+        event.listen(engine.sync_engine, "connect", self._on_connect)
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *args) -> None:
+        self.connects += 1
+
+    def _on_checkout(self, *args) -> None:
+        self.checkouts += 1
+
+    def _on_invalidate(self, *args) -> None:
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.pool.size(),
+            "checked_out": self.pool.checkedout(),
+            "checked_in": self.pool.checkedin(),
+            "overflow": self.pool.overflow(),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+        }
+
 
-# Create async engine
-# The 'echo=True' parameter enables SQL query logging, which can be useful for debugging
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+# Create async engines
+engine = create_async_engine(settings.DATABASE_URL, **engine_options())
+replica_engine = (
+    create_async_engine(settings.DATABASE_REPLICA_URL, **engine_options())
+    if settings.DATABASE_REPLICA_URL
+    else None
+)
+ENGINES = {"primary": engine}
+if replica_engine is not None:
+    ENGINES["replica"] = replica_engine
+pool_metrics = {name: PoolMetrics(e) for name, e in ENGINES.items()}
 
 # Create async session
 # expire_on_commit=False keeps the detached instance state after commit
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# Sessions for reads that tolerate replication lag; the primary without a replica
+ReadSessionLocal = (
+    sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else AsyncSessionLocal
+)
 
 # Create a base class for declarative class definitions
 Base = declarative_base()
 
 
+def replica_read(retry_missing: bool = False):
+    """
+    Route a read-only crud call to the replica, if one is configured.
+
+    The call runs on its own replica session unless the caller's session is
+    in a transaction, which may hold uncommitted writes it must see, or the
+    caller passes fresh=True. The replica may lag behind the primary, so
+    with `retry_missing` a lookup that finds nothing (e.g. a result created
+    a moment ago) is retried on the caller's session.
+
+    Returned objects are detached from the replica session, with whatever
+    columns the call loaded.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(db: AsyncSession, *args, fresh: bool = False, **kwargs):
+            if replica_engine is None or fresh or db.in_transaction():
+                return await func(db, *args, **kwargs)
+            metrics = pool_metrics["replica"]
+            metrics.reads += 1
+            async with ReadSessionLocal() as replica:
+                result = await func(replica, *args, **kwargs)
+            if result is None and retry_missing:
+                metrics.fallbacks += 1
+                result = await func(db, *args, **kwargs)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def db_stats() -> Dict[str, Any]:
+    """Pool metrics per engine, with replica routing counters."""
+    stats = {name: metrics.stats() for name, metrics in pool_metrics.items()}
+    if "replica" in stats:
+        replica = pool_metrics["replica"]
+        stats["replica"].update(reads=replica.reads, fallbacks=replica.fallbacks)
+    return stats
+
+
+async def dispose_engines() -> None:
+    """Close every engine's pooled connections."""
+    for e in ENGINES.values():
+        await e.dispose()
+
+
+def reset_engines() -> None:
+    """
+    Drop pooled connections inherited from a parent process without closing
+    them, as the parent still uses them.
+    """
+    for e in ENGINES.values():
+        e.sync_engine.dispose(close=False)
+
+
 async def get_db():
     """
     Dependency function to get a database session.
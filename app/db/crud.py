@@ -1,75 +1,653 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
-from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import (
+    DateTime,
+    LargeBinary,
+    String,
+    and_,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 
-from app.db import models
+from app.core.config import settings
+from app.core.events import publish_result_event
+from app.core.passwords import password_hasher
+from app.core.result_cache import result_cache
+from app.core.scheduling import task_scheduler
+from app.core.semantic_cache import semantic_cache
+from app.db import models, partitions
+from app.db.base import replica_read
+from app.db.types import CompressedText
 from app.schemas.user import UserCreate
 
-# Set up password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _select_by_hash(*criteria):
+    """
+    Select the results holding prompt hashes. Joining on created_at as well
+    lets Postgres prune llm_results to one partition per key.
+    """
+    return (
+        select(models.LLMResult)
+        .join(
+            models.LLMResultKey,
+            and_(
+                models.LLMResultKey.result_id == models.LLMResult.id,
+                models.LLMResultKey.created_at == models.LLMResult.created_at,
+            ),
+        )
+        .filter(*criteria)
+    )
+
+
+def _claim_deadline():
+    """Claims older than this are presumed dead (see RESULT_CLAIM_TIMEOUT)."""
+    return func.now() - timedelta(seconds=settings.RESULT_CLAIM_TIMEOUT)
+
+
+def _live_claim():
+    """Leave out in-flight results whose claim is older than the deadline."""
+    return or_(
+        models.LLMResult.status == "completed",
+        models.LLMResultKey.created_at >= _claim_deadline(),
+    )
 
 
-def verify_password(plain_password, hashed_password):
-    """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+def _id_window(result_ids: Iterable[uuid.UUID]) -> List[Any]:
+    """
+    Criteria bounding created_at by the ids' timestamps, so a lookup by id
+    only probes the partitions its results can be in (none for legacy ids).
+    """
+    window = partitions.created_at_window(result_ids)
+    if window is None:
+        return []
+    return [
+        models.LLMResult.created_at >= window[0],
+        models.LLMResult.created_at < window[1],
+    ]
 
 
-def get_password_hash(password):
-    """Generate a hash for a given password."""
-    return pwd_context.hash(password)
+async def _release_keys(db: AsyncSession, result_ids: List[uuid.UUID]) -> None:
+    """Free the prompt hashes held by results. The caller commits."""
+    await db.execute(
+        delete(models.LLMResultKey).where(models.LLMResultKey.result_id.in_(result_ids))
+    )
 
 
 async def create_llm_result(
-    db: AsyncSession, model: str, prompt: str
+    db: AsyncSession,
+    model: str,
+    prompt: str,
+    result_id: Optional[uuid.UUID] = None,
+    options: Optional[Dict[str, Any]] = None,
+    cacheable: bool = True,
+    user_id: Optional[int] = None,
 ) -> models.LLMResult:
-    """Create a new LLMResult entry in the database."""
-    prompt_hash = models.LLMResult.generate_prompt_hash(model, prompt)
-    db_result = models.LLMResult(model=model, prompt=prompt, prompt_hash=prompt_hash)
+    """
+    Create a new LLMResult entry in the database.
+
+    A cacheable result also claims its prompt hash in llm_result_keys, which
+    fails if another active result holds it. Results created with
+    `cacheable=False` get no prompt hash, so they are never served from the
+    cache and do not conflict with cached ones.
+    """
+    prompt_hash = (
+        models.LLMResult.generate_prompt_hash(model, prompt, options)
+        if cacheable
+        else None
+    )
+    db_result = models.LLMResult(
+        id=result_id or partitions.new_result_id(),
+        model=model,
+        prompt=prompt,
+        prompt_hash=prompt_hash,
+        options=options,
+        user_id=user_id,
+    )
     db.add(db_result)
+    if cacheable:
+        db.add(models.LLMResultKey(prompt_hash=prompt_hash, result_id=db_result.id))
     await db.commit()
-    await db.refresh(db_result)
     return db_result
 
 
-async def get_llm_result(db: AsyncSession, result_id: uuid.UUID) -> models.LLMResult:
-    """Retrieve an LLMResult by its ID."""
-    result = await db.execute(
-        select(models.LLMResult).filter(models.LLMResult.id == result_id)
+# Defers the prompt and response; touching them afterwards raises
+_DEFER_TEXT = tuple(defer(column, raiseload=True) for column in models.TEXT_COLUMNS)
+
+
+@replica_read(retry_missing=True)
+async def get_llm_result(
+    db: AsyncSession, result_id: uuid.UUID, load_text: bool = False
+) -> models.LLMResult:
+    """
+    Retrieve an LLMResult by its ID.
+
+    The prompt and response, which can be arbitrarily large, are only loaded
+    with `load_text`; otherwise accessing them raises rather than issuing
+    another query.
+    """
+    query = select(models.LLMResult).filter(
+        models.LLMResult.id == result_id, *_id_window([result_id])
     )
+    if not load_text:
+        query = query.options(*_DEFER_TEXT)
+    result = await db.execute(query)
     return result.scalar_one_or_none()
 
 
+@replica_read(retry_missing=True)
+async def get_llm_result_status(
+    db: AsyncSession, result_id: uuid.UUID
+) -> Optional[Row]:
+    """
+    Retrieve the status columns of an LLMResult by its ID. The columns are
+    all in the ix_llm_results_status_lookup index, so Postgres can answer
+    without reading the row.
+    """
+    result = await db.execute(
+        select(*models.STATUS_COLUMNS).filter(
+            models.LLMResult.id == result_id, *_id_window([result_id])
+        )
+    )
+    return result.one_or_none()
+
+
+async def announce_result(db_result: models.LLMResult) -> None:
+    """
+    Announce a finished result to clients waiting on it. Completed results
+    are written through to the result cache and indexed by the semantic
+    cache.
+    """
+    if db_result.status == "completed":
+        await result_cache.put(db_result.prompt_hash, db_result)
+    await publish_result_event(db_result.id, db_result.status, db_result.model)
+    if db_result.status == "completed":
+        await semantic_cache.index_result(db_result)
+
+
 async def update_llm_result(
     db: AsyncSession, result_id: uuid.UUID, response: str, status: str
 ) -> models.LLMResult:
-    """Update an existing LLMResult with a response and status."""
-    db_result = await get_llm_result(db, result_id)
+    """
+    Update an existing LLMResult with a response and status in a single
+    UPDATE ... RETURNING, then announce it with `announce_result`. A failed
+    result gives up its prompt hash.
+    """
+    if status not in models.UNIQUE_HASH_STATUSES:
+        await _release_keys(db, [result_id])
+    result = await db.execute(
+        update(models.LLMResult)
+        .where(models.LLMResult.id == result_id, *_id_window([result_id]))
+        .values(response=response, status=status, completed_at=datetime.utcnow())
+        .returning(models.LLMResult),
+        execution_options={"populate_existing": True},
+    )
+    db_result = result.scalar_one_or_none()
+    await db.commit()
     if db_result:
-        db_result.response = response
-        db_result.status = status
-        db_result.completed_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(db_result)
+        await announce_result(db_result)
     return db_result
 
 
+async def update_llm_results(
+    db: AsyncSession,
+    updates: List[Tuple[uuid.UUID, str, Optional[str], Optional[datetime]]],
+) -> List[models.LLMResult]:
+    """
+    Apply many result updates with one UPDATE ... FROM (VALUES ...) RETURNING
+    and commit.
+
+    Args:
+        updates: (result_id, status, response, completed_at) tuples. A None
+            response or completed_at leaves the stored value unchanged, so
+            status-only updates can share the statement.
+
+    Returns:
+        list[LLMResult]: The updated results.
+    """
+    released = [u[0] for u in updates if u[1] not in models.UNIQUE_HASH_STATUSES]
+    if released:
+        await _release_keys(db, released)
+    rows = values(
+        column("id", UUID(as_uuid=True)),
+        column("status", String),
+        column("response", CompressedText()),
+        column("completed_at", DateTime(timezone=True)),
+        name="v",
+    ).data(updates)
+    result = await db.execute(
+        update(models.LLMResult)
+        .where(
+            models.LLMResult.id == rows.c.id,
+            *_id_window(u[0] for u in updates),
+        )
+        .values(
+            status=rows.c.status,
+            response=func.coalesce(
+                cast(rows.c.response, LargeBinary), models.LLMResult.response
+            ),
+            completed_at=func.coalesce(
+                cast(rows.c.completed_at, DateTime(timezone=True)),
+                models.LLMResult.completed_at,
+            ),
+        )
+        .returning(models.LLMResult),
+        execution_options={"populate_existing": True, "synchronize_session": False},
+    )
+    db_results = list(result.scalars().all())
+    await db.commit()
+    return db_results
+
+
+async def set_llm_result_status(
+    db: AsyncSession, result_id: uuid.UUID, status: str
+) -> None:
+    """Set the status of an LLMResult without touching its response."""
+    if status not in models.UNIQUE_HASH_STATUSES:
+        await _release_keys(db, [result_id])
+    await db.execute(
+        update(models.LLMResult)
+        .where(models.LLMResult.id == result_id, *_id_window([result_id]))
+        .values(status=status)
+    )
+    await db.commit()
+
+
+async def get_inflight_result(
+    db: AsyncSession, prompt_hash: str
+) -> Optional[models.LLMResult]:
+    """
+    Retrieve the pending or running LLMResult for a prompt hash, unless its
+    claim has gone stale.
+    """
+    result = await db.execute(
+        _select_by_hash(
+            models.LLMResultKey.prompt_hash == prompt_hash,
+            models.LLMResult.status.in_(models.INFLIGHT_STATUSES),
+            _live_claim(),
+        )
+    )
+    return result.scalars().first()
+
+
+@replica_read()
 async def get_cached_result(
-    db: AsyncSession, model: str, prompt: str
+    db: AsyncSession,
+    model: str,
+    prompt: str,
+    options: Optional[Dict[str, Any]] = None,
 ) -> models.LLMResult:
-    """Retrieve a cached LLMResult for a given model and prompt."""
-    prompt_hash = models.LLMResult.generate_prompt_hash(model, prompt)
+    """Retrieve a cached LLMResult for a given model, prompt and options."""
+    prompt_hash = models.LLMResult.generate_prompt_hash(model, prompt, options)
     result = await db.execute(
-        select(models.LLMResult).filter(
-            models.LLMResult.prompt_hash == prompt_hash,
+        _select_by_hash(
+            models.LLMResultKey.prompt_hash == prompt_hash,
             models.LLMResult.status == "completed",
         )
     )
+    return result.scalars().first()
+
+
+async def get_results_by_hashes(
+    db: AsyncSession, prompt_hashes: Iterable[str], statuses: Iterable[str]
+) -> List[models.LLMResult]:
+    """
+    Retrieve the LLMResults holding the hashes in `prompt_hashes` whose
+    status is in `statuses`, newest first, in a single query. In-flight
+    results with stale claims are left out.
+    """
+    result = await db.execute(
+        _select_by_hash(
+            models.LLMResultKey.prompt_hash.in_(list(prompt_hashes)),
+            models.LLMResult.status.in_(list(statuses)),
+            _live_claim(),
+        ).order_by(models.LLMResult.created_at.desc())
+    )
+    return list(result.scalars().all())
+
+
+def _new_result_row(
+    model: str,
+    prompt: str,
+    options: Optional[Dict[str, Any]],
+    cacheable: bool = True,
+    result_id: Optional[uuid.UUID] = None,
+    user_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    return {
+        "id": result_id or partitions.new_result_id(),
+        "model": model,
+        "prompt": prompt,
+        "prompt_hash": (
+            models.LLMResult.generate_prompt_hash(model, prompt, options)
+            if cacheable
+            else None
+        ),
+        "options": options,
+        "status": "pending",
+        "user_id": user_id,
+    }
+
+
+async def _insert_keys(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    await db.execute(
+        insert(models.LLMResultKey),
+        [{"prompt_hash": row["prompt_hash"], "result_id": row["id"]} for row in rows],
+    )
+
+
+async def create_llm_results(
+    db: AsyncSession,
+    model: str,
+    prompts: List[str],
+    options: Optional[Dict[str, Any]] = None,
+    cacheable: bool = True,
+    user_id: Optional[int] = None,
+) -> List[models.LLMResult]:
+    """
+    Create one LLMResult per prompt with a single multi-row
+    INSERT ... RETURNING. Cacheable results claim their prompt hashes like
+    `create_llm_result`. The caller commits.
+    """
+    rows = [
+        _new_result_row(model, prompt, options, cacheable, user_id=user_id)
+        for prompt in prompts
+    ]
+    if cacheable:
+        await _insert_keys(db, rows)
+    result = await db.execute(
+        insert(models.LLMResult).returning(
+            models.LLMResult, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    return list(result.scalars().all())
+
+
+async def _fail_stale_claims(
+    db: AsyncSession, model: str, prompt_hashes: List[str]
+) -> None:
+    """
+    Fail the pending or running results holding `prompt_hashes` that were
+    claimed more than RESULT_CLAIM_TIMEOUT ago, whose tasks most likely died
+    without failing them, free their hashes and take their tasks out of the
+    queue ledger. The caller commits.
+    """
+    result = await db.execute(
+        update(models.LLMResult)
+        .where(
+            models.LLMResultKey.result_id == models.LLMResult.id,
+            models.LLMResultKey.created_at == models.LLMResult.created_at,
+            models.LLMResultKey.prompt_hash.in_(prompt_hashes),
+            models.LLMResultKey.created_at < _claim_deadline(),
+            models.LLMResult.status.in_(models.INFLIGHT_STATUSES),
+        )
+        .values(
+            status="failed",
+            response="Error: generation timed out",
+            completed_at=datetime.utcnow(),
+        )
+        .returning(models.LLMResult.id),
+        execution_options={"synchronize_session": False},
+    )
+    stale = list(result.scalars().all())
+    if stale:
+        await _release_keys(db, stale)
+    for result_id in stale:
+        await task_scheduler.remove(model, result_id, started=False)
+
+
+async def create_or_get_llm_results(
+    db: AsyncSession,
+    model: str,
+    prompts: List[str],
+    options: Optional[Dict[str, Any]] = None,
+    result_ids: Optional[List[uuid.UUID]] = None,
+    user_id: Optional[int] = None,
+) -> List[Tuple[models.LLMResult, bool]]:
+    """
+    Insert a pending LLMResult per prompt, or return the one already holding
+    its prompt hash.
+
+    The hashes are claimed with one INSERT INTO llm_result_keys ...
+    ON CONFLICT DO UPDATE ... RETURNING: the no-op update returns the current
+    holder of a taken hash, and locks it until this transaction ends, so the
+    create-or-get decision is atomic. Results are then inserted for the
+    hashes this call won and fetched for the others, in the same
+    transaction. The prompts must have distinct hashes. The caller commits.
+
+    Hashes held by stale claims are taken over: their results are failed
+    first (see `_fail_stale_claims`), so a task that died without failing
+    its result does not block the prompt for good.
+
+    Returns:
+        list[tuple[LLMResult, bool]]: Per prompt, in order, the result and
+        whether this call created it.
+    """
+    rows = [
+        _new_result_row(model, prompt, options, result_id=result_id, user_id=user_id)
+        for prompt, result_id in zip(prompts, result_ids or [None] * len(prompts))
+    ]
+    await _fail_stale_claims(db, model, [row["prompt_hash"] for row in rows])
+    claim = pg_insert(models.LLMResultKey)
+    claim = claim.on_conflict_do_update(
+        index_elements=[models.LLMResultKey.prompt_hash],
+        set_={"prompt_hash": claim.excluded.prompt_hash},
+    ).returning(models.LLMResultKey.prompt_hash, models.LLMResultKey.result_id)
+    holders = dict(
+        (
+            await db.execute(
+                claim,
+                [
+                    {"prompt_hash": row["prompt_hash"], "result_id": row["id"]}
+                    for row in rows
+                ],
+            )
+        ).all()
+    )
+
+    won = [row for row in rows if holders[row["prompt_hash"]] == row["id"]]
+    by_hash: Dict[str, models.LLMResult] = {}
+    if won:
+        result = await db.execute(
+            insert(models.LLMResult).returning(models.LLMResult), won
+        )
+        by_hash.update((row.prompt_hash, row) for row in result.scalars().all())
+    taken = [row["prompt_hash"] for row in rows if row["prompt_hash"] not in by_hash]
+    if taken:
+        result = await db.execute(
+            _select_by_hash(models.LLMResultKey.prompt_hash.in_(taken)),
+            execution_options={"populate_existing": True},
+        )
+        by_hash.update((row.prompt_hash, row) for row in result.scalars().all())
+    return [
+        (by_hash[row["prompt_hash"]], holders[row["prompt_hash"]] == row["id"])
+        for row in rows
+    ]
+
+
+async def create_or_get_llm_result(
+    db: AsyncSession,
+    model: str,
+    prompt: str,
+    result_id: Optional[uuid.UUID] = None,
+    options: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+) -> Tuple[models.LLMResult, bool]:
+    """
+    Create a pending LLMResult, or return the pending, running or completed
+    one for the same prompt hash, in one transaction.
+
+    Returns:
+        tuple[LLMResult, bool]: The result and whether it was created.
+    """
+    [(db_result, created)] = await create_or_get_llm_results(
+        db, model, [prompt], options, [result_id] if result_id else None, user_id
+    )
+    await db.commit()
+    return db_result, created
+
+
+async def create_llm_batch(
+    db: AsyncSession, model: str, result_ids: List[uuid.UUID]
+) -> models.LLMBatch:
+    """Record a batch of results. The caller commits."""
+    db_batch = models.LLMBatch(id=uuid.uuid4(), model=model, result_ids=result_ids)
+    db.add(db_batch)
+    await db.flush()
+    return db_batch
+
+
+@replica_read(retry_missing=True)
+async def get_llm_batch(db: AsyncSession, batch_id: uuid.UUID) -> models.LLMBatch:
+    """Retrieve an LLMBatch by its ID."""
+    result = await db.execute(
+        select(models.LLMBatch).filter(models.LLMBatch.id == batch_id)
+    )
     return result.scalar_one_or_none()
 
 
+@replica_read()
+async def count_results_by_status(
+    db: AsyncSession, result_ids: List[uuid.UUID]
+) -> Dict[str, int]:
+    """Count the given results per status."""
+    result = await db.execute(
+        select(models.LLMResult.status, func.count())
+        .filter(models.LLMResult.id.in_(result_ids), *_id_window(result_ids))
+        .group_by(models.LLMResult.status)
+    )
+    return {status: count for status, count in result.all()}
+
+
+async def invalidate_cached_results(db: AsyncSession, model: str) -> int:
+    """
+    Mark a model's completed results as invalidated so they are no longer
+    served from the cache, and free their prompt hashes. The results stay
+    retrievable by ID.
+    """
+    await db.execute(
+        delete(models.LLMResultKey).where(
+            models.LLMResultKey.result_id.in_(
+                select(models.LLMResult.id).where(
+                    models.LLMResult.model == model,
+                    models.LLMResult.status == "completed",
+                )
+            )
+        )
+    )
+    result = await db.execute(
+        update(models.LLMResult)
+        .where(
+            models.LLMResult.model == model,
+            models.LLMResult.status == "completed",
+        )
+        .values(status="invalidated")
+    )
+    await db.commit()
+    return result.rowcount
+
+
+@replica_read()
+async def list_user_results(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    before: Optional[Tuple[datetime, uuid.UUID]] = None,
+    model: Optional[str] = None,
+    status: Optional[str] = None,
+    load_text: bool = False,
+) -> List[models.LLMResult]:
+    """
+    List a user's results newest first, one keyset page at a time.
+
+    Pages continue from `before`, the (created_at, id) of the last row of
+    the previous page, so each page is a range scan of
+    ix_llm_results_user_history however deep it is, unlike OFFSET. The
+    created_at bound also prunes the partitions after it.
+    """
+    query = select(models.LLMResult).filter(models.LLMResult.user_id == user_id)
+    if before is not None:
+        created_at, result_id = before
+        query = query.filter(
+            models.LLMResult.created_at <= created_at,
+            tuple_(models.LLMResult.created_at, models.LLMResult.id)
+            < tuple_(created_at, result_id),
+        )
+    if model is not None:
+        query = query.filter(models.LLMResult.model == model)
+    if status is not None:
+        query = query.filter(models.LLMResult.status == status)
+    if not load_text:
+        query = query.options(*_DEFER_TEXT)
+    result = await db.execute(
+        query.order_by(
+            models.LLMResult.created_at.desc(), models.LLMResult.id.desc()
+        ).limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def stream_results(
+    db: AsyncSession,
+    batch_size: int,
+    user_id: Optional[int] = None,
+    model: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+) -> AsyncIterator[List[Row]]:
+    """
+    Stream results oldest first, `batch_size` rows at a time.
+
+    Rows come from a server-side cursor as plain rows rather than ORM
+    objects, so memory stays flat however many match. `after` resumes an
+    export after the (created_at, id) of the last row received; `since`
+    (inclusive) and `until` (exclusive) bound created_at and prune
+    partitions.
+    """
+    result_model = models.LLMResult
+    query = select(*models.EXPORT_COLUMNS)
+    if user_id is not None:
+        query = query.filter(result_model.user_id == user_id)
+    if model is not None:
+        query = query.filter(result_model.model == model)
+    if status is not None:
+        query = query.filter(result_model.status == status)
+    if since is not None:
+        query = query.filter(result_model.created_at >= since)
+    if until is not None:
+        query = query.filter(result_model.created_at < until)
+    if after is not None:
+        created_at, result_id = after
+        query = query.filter(
+            result_model.created_at >= created_at,
+            tuple_(result_model.created_at, result_model.id)
+            > tuple_(created_at, result_id),
+        )
+    result = await db.stream(
+        query.order_by(result_model.created_at, result_model.id).execution_options(
+            yield_per=batch_size
+        )
+    )
+    async for rows in result.partitions():
+        yield rows
+
+
 async def get_user(db: AsyncSession, username: str) -> models.User:
     """Retrieve a user by username."""
     result = await db.execute(
@@ -80,7 +658,7 @@ async def get_user(db: AsyncSession, username: str) -> models.User:
 
 async def create_user(db: AsyncSession, user: UserCreate) -> models.User:
     """Create a new user in the database."""
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = models.User(username=user.username, hashed_password=hashed_password)
     db.add(db_user)
     await db.commit()
@@ -88,11 +666,57 @@ async def create_user(db: AsyncSession, user: UserCreate) -> models.User:
     return db_user
 
 
+async def set_user_active(db: AsyncSession, username: str, is_active: bool) -> bool:
+    """
+    Activate or deactivate a user. Callers must also drop the user from the
+    auth cache (app.core.auth.set_user_active does both).
+
+    Returns:
+        bool: Whether the user exists.
+    """
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.username == username)
+        .values(is_active=is_active)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def set_user_tier(db: AsyncSession, username: str, tier: str | None) -> bool:
+    """
+    Set a user's rate limit tier (None for the default tier). Callers must
+    also drop the user from the auth cache (app.core.auth.set_user_tier does
+    both).
+
+    Returns:
+        bool: Whether the user exists.
+    """
+    result = await db.execute(
+        update(models.User).where(models.User.username == username).values(tier=tier)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
 async def authenticate_user(
     db: AsyncSession, username: str, password: str
 ) -> models.User | None:
-    """Authenticate a user by username and password."""
+    """
+    Authenticate a user by username and password.
+
+    The password is verified off the event loop. A hash of another bcrypt
+    cost than BCRYPT_ROUNDS is replaced with one at that cost.
+    """
     user = await get_user(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         return None
+    valid, new_hash = await password_hasher.verify_and_update(
+        password, user.hashed_password
+    )
+    if not valid:
+        return None
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
     return user
@@ -1,42 +1,198 @@
 import hashlib
+import json
 import uuid
+from typing import Any, Dict, Optional
 
-from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    JSON,
+    Column,
+    String,
+    DateTime,
+    ForeignKey,
+    Integer,
+    Boolean,
+    Index,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from app.db import partitions
 from app.db.base import Base
+from app.db.types import CompressedText
+
+# Statuses of results whose generation has not finished yet
+INFLIGHT_STATUSES = ("pending", "running")
+
+# At most one result per prompt hash may be in one of these statuses; failed
+# and invalidated results give up their LLMResultKey so the prompt can be
+# generated again
+UNIQUE_HASH_STATUSES = INFLIGHT_STATUSES + ("completed",)
+
+# Ollama options that only change how fast a response is produced, not the
+# response itself, so they are left out of the cache key
+CACHE_NEUTRAL_OPTIONS = ("num_thread",)
 
 
 class LLMResult(Base):
     """
     Model representing the result of a language model generation task.
+
+    The table is range-partitioned by month of created_at (see
+    app.db.partitions), so created_at is part of the primary key. Cache
+    lookups by prompt hash go through LLMResultKey.
     """
 
     __tablename__ = "llm_results"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(
+        UUID(as_uuid=True), primary_key=True, default=partitions.new_result_id
+    )  # UUIDv7, so lookups by id can prune partitions
     model = Column(String, index=True)  # Name of the LLM model used
-    prompt = Column(Text)  # Input prompt for the generation task
-    prompt_hash = Column(String(64), index=True)  # SHA256 hash for caching
-    response = Column(Text, nullable=True)  # Generated response from the LLM
+    prompt = Column(CompressedText)  # Input prompt for the generation task
+    prompt_hash = Column(
+        String(64), nullable=True
+    )  # SHA256 hash for caching; NULL for uncached generations
+    options = Column(JSON, nullable=True)  # Ollama options used for generation
+    response = Column(CompressedText, nullable=True)  # Generated response from the LLM
     status = Column(
         String, default="pending", index=True
     )  # Status of the generation task
     created_at = Column(
-        DateTime(timezone=True), server_default=func.now()
-    )  # Timestamp of task creation
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+    )  # Timestamp of task creation; the partition key
     completed_at = Column(
         DateTime(timezone=True), nullable=True
     )  # Timestamp of task completion
+    user_id = Column(
+        Integer,
+        ForeignKey(
+            "users.id", ondelete="SET NULL", name="fk_llm_results_user_id_users"
+        ),
+        nullable=True,
+    )  # User who requested the generation; NULL for offline runs
+
+    user = relationship("User", back_populates="results", lazy="raise")
+
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        Index("ix_llm_results_user_history", "user_id", "created_at", "id"),
+        # Covers status polling (crud.get_llm_result_status)
+        Index(
+            "ix_llm_results_status_lookup",
+            "id",
+            postgresql_include=["model", "status", "created_at", "completed_at"],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    # Fetch created_at with RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     @staticmethod
-    def generate_prompt_hash(model: str, prompt: str) -> str:
+    def generate_prompt_hash(
+        model: str, prompt: str, options: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
-        Generate a unique hash for a given model and prompt combination.
+        Generate a unique hash for a given model, prompt and options combination.
         This is used for caching purposes.
+
+        Options are canonicalised (sorted keys, unset and cache-neutral
+        options dropped), so equivalent requests share a key. Without
+        output-affecting options the key is the same as for plain prompts.
         """
-        return hashlib.sha256(f"{model}:{prompt}".encode()).hexdigest()
+        key = f"{model}:{prompt}"
+        canonical = LLMResult.canonical_options(options)
+        if canonical:
+            key += ":" + canonical
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def canonical_options(options: Optional[Dict[str, Any]]) -> str:
+        """
+        Serialise the output-affecting options deterministically, or return
+        an empty string if there are none.
+        """
+        options = {
+            name: value
+            for name, value in (options or {}).items()
+            if value is not None and name not in CACHE_NEUTRAL_OPTIONS
+        }
+        if not options:
+            return ""
+        return json.dumps(options, sort_keys=True, separators=(",", ":"))
+
+
+# Columns that can be arbitrarily large, loaded only when needed
+TEXT_COLUMNS = (LLMResult.prompt, LLMResult.response)
+
+# Columns needed to poll a result's progress
+STATUS_COLUMNS = (
+    LLMResult.id,
+    LLMResult.model,
+    LLMResult.status,
+    LLMResult.created_at,
+    LLMResult.completed_at,
+)
+
+
+# Columns written by result exports
+EXPORT_COLUMNS = STATUS_COLUMNS + (
+    LLMResult.user_id,
+    LLMResult.options,
+    LLMResult.prompt,
+    LLMResult.response,
+)
+
+
+class LLMResultKey(Base):
+    """
+    Model holding the one pending, running or completed result per prompt
+    hash.
+
+    A unique index on a partitioned table must include the partition key,
+    so uniqueness per hash cannot be enforced on llm_results itself. Claiming
+    a hash here is the create-or-get decision, and cache lookups by hash are
+    a primary-key lookup here plus a partition-pruned one in llm_results.
+    The key's created_at equals its result's, as both are inserted in one
+    transaction.
+    """
+
+    __tablename__ = "llm_result_keys"
+
+    prompt_hash = Column(String(64), primary_key=True)
+    result_id = Column(
+        UUID(as_uuid=True), nullable=False, index=True
+    )  # LLMResult holding the hash
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )  # Same as the result's created_at
+
+
+class LLMBatch(Base):
+    """
+    Model grouping the results of prompts submitted together.
+
+    Cached and coalesced prompts point at existing results, so the batch
+    keeps its own ordered list of result IDs rather than a column on
+    llm_results.
+    """
+
+    __tablename__ = "llm_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    model = Column(String)  # Name of the LLM model used
+    result_ids = Column(
+        ARRAY(UUID(as_uuid=True)), nullable=False
+    )  # LLMResult IDs, in prompt order
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now()
+    )  # Timestamp of batch creation
+
+    # Fetch created_at with RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
 
 class User(Base):
@@ -50,6 +206,8 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)  # Stores the hashed password, not the plain text
     is_active = Column(Boolean, default=True)  # Indicates if the user account is active
+    # Rate limit tier from RATE_LIMIT_TIERS; NULL means the default tier
+    tier = Column(String, nullable=True)
 
     # Potential additional fields:
     # email = Column(String, unique=True, index=True)
@@ -57,5 +215,5 @@ class User(Base):
     # created_at = Column(DateTime(timezone=True), server_default=func.now())
     # last_login = Column(DateTime(timezone=True), nullable=True)
 
-    # Potential relationship:
-    # results = relationship("LLMResult", back_populates="user")
+    # Never loaded implicitly; page through crud.list_user_results instead
+    results = relationship("LLMResult", back_populates="user", lazy="raise")
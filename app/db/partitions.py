@@ -0,0 +1,109 @@
+"""
+Monthly range partitions of llm_results.
+
+Partitions are named llm_results_pYYYYMM and cover one calendar month of
+created_at (UTC). Rows outside every monthly partition land in
+llm_results_default, so inserts never fail; keep partitions created ahead of
+time, because a monthly partition cannot be created while the default one
+holds rows in its range.
+
+Result ids are UUIDv7, whose leading 48 bits are the creation time in
+milliseconds, so lookups by id can also bound created_at and only probe the
+partitions the ids can be in.
+"""
+
+import re
+import secrets
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+PARENT = "llm_results"
+DEFAULT_PARTITION = f"{PARENT}_default"
+PARTITION_PATTERN = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+# created_at is set by the database (at transaction start), the id by the
+# application: allow for clock skew and long transactions either way
+ID_TIME_SLACK = timedelta(days=1)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Return the month a partition covers, or None if it is not monthly."""
+    match = PARTITION_PATTERN.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month from `first`'s to `last`'s, inclusive."""
+    months, month = [], month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def create_partition_sql(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT} "
+        f"FOR VALUES FROM ('{month.isoformat()}+00') "
+        f"TO ('{add_months(month, 1).isoformat()}+00')"
+    )
+
+
+def expired_partitions(names: List[str], cutoff: date) -> List[Tuple[str, date]]:
+    """
+    The monthly partitions whose rows are all older than `cutoff`, oldest
+    first, with the month each covers.
+    """
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append((name, month))
+    return sorted(expired, key=lambda item: item[1])
+
+
+def new_result_id() -> uuid.UUID:
+    """A UUIDv7 (RFC 9562): millisecond timestamp, version, variant, random."""
+    millis = time.time_ns() // 1_000_000
+    return uuid.UUID(
+        int=(millis & (2**48 - 1)) << 80
+        | 0x7 << 76
+        | secrets.randbits(12) << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    )
+
+
+def created_at_window(
+    result_ids: Iterable[uuid.UUID],
+) -> Optional[Tuple[datetime, datetime]]:
+    """
+    The created_at range (inclusive start, exclusive end) the results can
+    be in, from their ids' timestamps, or None if any id is not a UUIDv7
+    (results created before the ids were) or there are none.
+    """
+    times = []
+    for result_id in result_ids:
+        if result_id.version != 7:
+            return None
+        times.append(result_id.int >> 80)
+    if not times:
+        return None
+    return (
+        datetime.fromtimestamp(min(times) / 1000, timezone.utc) - ID_TIME_SLACK,
+        datetime.fromtimestamp(max(times) / 1000, timezone.utc) + ID_TIME_SLACK,
+    )
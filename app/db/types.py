@@ -0,0 +1,81 @@
+import threading
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.core.config import settings
+
+# Every zstd frame starts with these bytes; valid UTF-8 never does, so plain
+# and compressed values can share a column
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_contexts = threading.local()
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "Compressed result storage requires zstandard: pip install zstandard"
+        )
+    return zstandard
+
+
+def compress(data: bytes, level: int) -> bytes:
+    # Compression contexts are not thread-safe, so keep one per thread
+    compressor = getattr(_contexts, "compressor", None)
+    if compressor is None or _contexts.level != level:
+        compressor = _zstd().ZstdCompressor(level=level)
+        _contexts.compressor, _contexts.level = compressor, level
+    return compressor.compress(data)
+
+
+def decompress(data: bytes) -> bytes:
+    decompressor = getattr(_contexts, "decompressor", None)
+    if decompressor is None:
+        decompressor = _contexts.decompressor = _zstd().ZstdDecompressor()
+    return decompressor.decompress(data)
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored as UTF-8 bytes, zstd-compressed when at least `min_bytes`
+    long.
+
+    Values shorter than `min_bytes`, or that do not shrink, are stored
+    uncompressed, so short prompts pay nothing. Reads detect compressed
+    values by their frame header, so compression can be switched on or off
+    at any time; a `min_bytes` of 0 disables it. Reading compressed values
+    requires zstandard even when compression is off.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(
+        self,
+        min_bytes: int = settings.RESULT_COMPRESSION_MIN_BYTES,
+        level: int = settings.RESULT_COMPRESSION_LEVEL,
+    ):
+        super().__init__()
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        data = value.encode()
+        if self.min_bytes and len(data) >= self.min_bytes:
+            compressed = compress(data, self.level)
+            if len(compressed) < len(data):
+                return compressed
+        return data
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        value = bytes(value)
+        if value.startswith(ZSTD_MAGIC):
+            value = decompress(value)
+        return value.decode()
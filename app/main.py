@@ -1,41 +1,99 @@
+import asyncio
 import uuid
-from typing import Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+from typing import List, Optional, Tuple
 
+import anyio
+from celery import group
 from fastapi import Depends, HTTPException, Query
-from fastapi import FastAPI, APIRouter, status
+from fastapi import FastAPI, APIRouter, Request, WebSocket, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.admission import admission_controller, enforce_admission
+from app.core.batching import create_batch
+from app.core.coalescing import request_coalescer
 from app.core.config import settings
+from app.core.events import event_bus
 from app.core.exceptions import (
     LLMHubException,
     ModelNotFoundException,
     OllamaServiceException,
 )
 from app.core.logger import log_error, log_info
+from app.core.login_limiter import login_limiter
+from app.core.passwords import password_hasher
+from app.core.rate_limit import (
+    enforce_rate_limit,
+    estimate_tokens,
+    rate_limited_user,
+)
+from app.core.redis_client import close_redis
+from app.core.result_cache import result_cache
+from app.core.scheduling import task_scheduler
+from app.core.semantic_cache import semantic_cache
+from app.core.auth import get_admin_user, get_current_user, token_cache, user_cache
 from app.core.security import (
     create_access_token,
     create_refresh_token,
-    get_current_user,
     verify_token,
 )
 from app.core.tasks import generate_text
-from app.db import crud
-from app.db.base import get_db
-from app.schemas.base import GenerationRequest, ErrorResponse
-from app.schemas.llm import LLMResultSchema
+from app.db import crud, models
+from app.db.base import (
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    db_stats,
+    dispose_engines,
+    get_db,
+)
+from app.schemas.base import BatchGenerationRequest, GenerationRequest, ErrorResponse
+from app.schemas.llm import (
+    BatchSchema,
+    BatchStatusSchema,
+    LLMResultSchema,
+    ResultPageSchema,
+    ResultStatusSchema,
+)
 from app.schemas.token import Token
 from app.schemas.user import User
+from app.services.model_registry import model_registry
 from app.services.ollama import ollama_service
-from app.utils.preprocessors import PREPROCESSORS
+from app.utils.export import WRITERS, export_chunks
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.preprocessors import PREPROCESSORS, normalize_prompt
+from app.utils.sse import format_sse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open shared resources on startup and release them on shutdown.
+    """
+    await ollama_service.startup()
+    await model_registry.start()
+    semantic_cache.load()
+    await event_bus.start()
+    yield
+    await event_bus.stop()
+    await model_registry.stop()
+    await ollama_service.shutdown()
+    await close_redis()
+    await dispose_engines()
+    password_hasher.shutdown()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.PROJECT_VERSION,
     description=settings.PROJECT_DESCRIPTION,
+    lifespan=lifespan,
 )
 
 # Create API router for version 1
@@ -44,20 +102,36 @@ v1_router = APIRouter(prefix="/v1")
 
 @app.post("/token", response_model=Token, tags=["authentication"])
 async def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Authenticate user and provide access token.
+
+    Repeated failures for a username or client IP lock it out for a while
+    (429 with Retry-After).
     """
+    ip = request.client.host if request.client else None
+    retry_after = await login_limiter.retry_after(form_data.username, ip)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(retry_after)},
+        )
     user = await crud.authenticate_user(db, form_data.username, form_data.password)
-    if not user:
+    if not user or not user.is_active:
+        await login_limiter.record_failure(form_data.username, ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    await login_limiter.reset(form_data.username)
+    claims = {"sub": user.username, "uid": user.id}
+    access_token = create_access_token(data=claims)
+    refresh_token = create_refresh_token(data=claims)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -72,7 +146,9 @@ async def refresh_access_token(refresh_token: str):
     """
     try:
         token_data = verify_token(refresh_token)
-        access_token = create_access_token(data={"sub": token_data.username})
+        access_token = create_access_token(
+            data={"sub": token_data.username, "uid": token_data.user_id}
+        )
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -117,6 +193,7 @@ async def http_exception_handler(request, exc: HTTPException):
             detail=exc.detail,
             error_code=f"HTTP_{exc.status_code}",
         ).dict(),
+        headers=exc.headers,
     )
 
 
@@ -129,6 +206,16 @@ async def log_requests(request, call_next):
     return response
 
 
+@app.middleware("http")
+async def rate_limit_headers(request, call_next):
+    # Endpoints returning a Response directly bypass injected headers, so
+    # the limiter leaves them on request.state instead
+    response = await call_next(request)
+    for name, value in getattr(request.state, "rate_limit_headers", {}).items():
+        response.headers.setdefault(name, value)
+    return response
+
+
 @app.get("/", tags=["root"])
 async def read_root():
     """
@@ -144,13 +231,200 @@ async def list_models():
     Retrieve a list of available language models.
     """
     try:
-        available_models = await ollama_service.get_available_models()
+        available_models = await model_registry.get_models()
         log_info("Available models retrieved", models=available_models)
         return {"models": available_models}
     except OllamaServiceException as e:
         raise LLMHubException(str(e), "OLLAMA_SERVICE_ERROR")
 
 
+@v1_router.get("/backends", tags=["models"])
+async def list_backends():
+    """
+    Report health, in-flight requests and latency for each Ollama backend.
+    """
+    return {"backends": ollama_service.pool.stats()}
+
+
+def _qualify_model_name(model: str) -> str:
+    """Ensure the model name has a version tag."""
+    return model if ":" in model else f"{model}:latest"
+
+
+def _apply_preprocessor(
+    prompt: str, preprocessor: Optional[str], normalize: bool = False
+) -> str:
+    """
+    Run the named preprocessor over the prompt, if one was requested, then
+    normalise it if asked to.
+    """
+    if preprocessor:
+        if preprocessor not in PREPROCESSORS:
+            raise HTTPException(
+                status_code=400, detail=f"Preprocessor '{preprocessor}' not found"
+            )
+        prompt = PREPROCESSORS[preprocessor](prompt)
+    return normalize_prompt(prompt) if normalize else prompt
+
+
+async def _get_exact_result(
+    db: AsyncSession, model: str, prompt: str, options: Optional[dict] = None
+) -> Optional[LLMResultSchema]:
+    """Look up a completed result in the result cache, then in Postgres."""
+    prompt_hash = models.LLMResult.generate_prompt_hash(model, prompt, options)
+    cached_result = await result_cache.get(prompt_hash)
+    if cached_result is None:
+        db_result = await crud.get_cached_result(db, model, prompt, options)
+        if db_result is None:
+            return None
+        cached_result = LLMResultSchema.from_orm(db_result)
+        await result_cache.put(prompt_hash, cached_result)
+    return cached_result
+
+
+async def _get_cached_result(
+    db: AsyncSession, model: str, prompt: str, options: Optional[dict] = None
+) -> Optional[LLMResultSchema]:
+    """
+    Look up an exact match, then (if enabled) a semantically similar prompt.
+
+    The prompt is embedded while the exact lookup runs, so a semantic miss
+    costs at most the semantic cache's time budget on top of it.
+    """
+    pending = semantic_cache.start_lookup(prompt)
+    try:
+        cached_result = await _get_exact_result(db, model, prompt, options)
+        if cached_result is not None or pending is None:
+            return cached_result
+        result_id, similarity = await semantic_cache.lookup(pending, model, options)
+        if result_id is None:
+            return None
+        db_result = await crud.get_llm_result(db, result_id, load_text=True)
+        if db_result is None or db_result.status != "completed":
+            return None
+        cached_result = LLMResultSchema.from_orm(db_result)
+        cached_result.similarity = round(similarity, 4)
+        return cached_result
+    finally:
+        if pending is not None:
+            semantic_cache.cancel_lookup(pending)
+
+
+async def _fail_generations(
+    db: AsyncSession,
+    model: str,
+    tasks: List[Tuple[uuid.UUID, str]],
+    options: Optional[dict],
+    error: str,
+) -> None:
+    """
+    Fail results of (result id, prompt) whose tasks will never run, freeing
+    their prompt hashes and coalescing claims.
+    """
+    await crud.update_llm_results(
+        db,
+        [(result_id, "failed", error, datetime.utcnow()) for result_id, _ in tasks],
+    )
+    for result_id, prompt in tasks:
+        await request_coalescer.release(
+            models.LLMResult.generate_prompt_hash(model, prompt, options), result_id
+        )
+
+
+async def _publish_generations(
+    db: AsyncSession,
+    model: str,
+    user: User,
+    tasks: List[Tuple[uuid.UUID, str]],
+    options: Optional[dict],
+    lane: str,
+) -> None:
+    """
+    Publish generation tasks of (result id, prompt) with the broker
+    priorities the scheduler gives them in `lane`. If publishing fails, the
+    results are failed so identical prompts can be generated again.
+    """
+    priorities = await task_scheduler.enqueue(
+        model, user, [result_id for result_id, _ in tasks], lane
+    )
+    signatures = [
+        generate_text.s(str(result_id), model, prompt, options=options).set(
+            priority=priority
+        )
+        for (result_id, prompt), priority in zip(tasks, priorities)
+    ]
+    try:
+        if len(signatures) == 1:
+            signatures[0].apply_async()
+        else:
+            # One publish round per batch instead of one apply_async per prompt
+            group(signatures).apply_async()
+    except Exception:
+        for result_id, _ in tasks:
+            await task_scheduler.remove(model, result_id, started=False)
+        try:
+            await _fail_generations(
+                db, model, tasks, options, "Error: could not enqueue generation"
+            )
+        except Exception as e:
+            # Their claims are taken over once RESULT_CLAIM_TIMEOUT passes
+            log_error(e, operation="fail_generations", model=model)
+        raise
+
+
+async def _admit_generations(
+    db: AsyncSession,
+    model: str,
+    tasks: List[Tuple[uuid.UUID, str]],
+    options: Optional[dict],
+    lane: str,
+) -> None:
+    """
+    Refuse new results of (result id, prompt) the model's queue cannot start
+    in time, failing them so their prompt hashes are released.
+    """
+    try:
+        await enforce_admission(model, lane, len(tasks))
+    except HTTPException:
+        await _fail_generations(
+            db, model, tasks, options, "Error: refused by admission control"
+        )
+        raise
+
+
+async def _add_queue_positions(results: list) -> None:
+    """Fill in the queue position and ETA of pending results of one model."""
+    pending = [result.id for result in results if result.status == "pending"]
+    if pending:
+        positions = await task_scheduler.positions(results[0].model, pending)
+        for result in results:
+            if result.id in positions:
+                result.queue_position, result.eta_seconds = positions[result.id]
+
+
+async def _create_result(
+    db: AsyncSession,
+    model: str,
+    prompt: str,
+    options: Optional[dict],
+    use_cache: bool,
+    user_id: Optional[int] = None,
+) -> Tuple[models.LLMResult, bool]:
+    """
+    Create a pending result, or with `use_cache` return the pending, running
+    or completed one for the same prompt in the same statement. Uncached
+    results get no prompt hash, so they never collide with cached ones.
+    """
+    if use_cache:
+        return await crud.create_or_get_llm_result(
+            db, model, prompt, options=options, user_id=user_id
+        )
+    db_result = await crud.create_llm_result(
+        db, model, prompt, options=options, cacheable=False, user_id=user_id
+    )
+    return db_result, True
+
+
 @v1_router.post(
     "/generate/{model}",
     response_model=LLMResultSchema,
@@ -161,63 +435,598 @@ async def list_models():
 async def generate(
     model: str,
     request: GenerationRequest,
+    http_request: Request,
     preprocessor: Optional[str] = Query(
         None, description="Name of the preprocessor function to apply"
     ),
     use_cache: bool = Query(default=True, description="Whether to use cached results"),
+    normalize: bool = Query(
+        default=False,
+        description="Normalise Unicode and whitespace so near-identical prompts share a cache entry",
+    ),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    try:
-        # Ensure model has a version tag
-        if ":" not in model:
-            model += ":latest"
-
-        prompt = request.prompt
-        if preprocessor:
-            if preprocessor not in PREPROCESSORS:
-                raise HTTPException(
-                    status_code=400, detail=f"Preprocessor '{preprocessor}' not found"
-                )
-            prompt = PREPROCESSORS[preprocessor](prompt)
+    model = _qualify_model_name(model)
+    prompt = _apply_preprocessor(request.prompt, preprocessor, normalize)
+    options = request.options.to_ollama() if request.options else None
+    user_id = current_user.id
+    await enforce_rate_limit(
+        http_request, current_user, tokens=estimate_tokens(prompt, options)
+    )
 
+    try:
         # Check cache for existing results
         if use_cache:
-            cached_result = await crud.get_cached_result(db, model, prompt)
+            cached_result = await _get_cached_result(db, model, prompt, options)
             if cached_result:
                 log_info("Cached result found", model=model, prompt=prompt)
-                return LLMResultSchema.from_orm(cached_result)
+                return cached_result
 
         # Verify model availability
-        available_models = await ollama_service.get_available_models()
-        if model not in available_models:
+        if not await model_registry.contains(model):
             raise ModelNotFoundException(model)
 
-        # Create new result entry and start generation task
-        db_result = await crud.create_llm_result(db, model, prompt)
-        generate_text.apply_async(args=[str(db_result.id), model, prompt])
-        log_info("Generation task created", model=model, task_id=str(db_result.id))
-        return LLMResultSchema.from_orm(db_result)
+        # Create new result entry, or join an identical in-flight generation
+        if use_cache and settings.COALESCE_ENABLED:
+            db_result, created = await request_coalescer.get_or_create(
+                db, model, prompt, options, user_id
+            )
+        else:
+            db_result, created = await _create_result(
+                db, model, prompt, options, use_cache, user_id
+            )
+
+        if created:
+            # Refuse work the model's queue cannot start in time
+            tasks = [(db_result.id, prompt)]
+            await _admit_generations(db, model, tasks, options, "interactive")
+            await _publish_generations(
+                db, model, current_user, tasks, options, "interactive"
+            )
+            log_info("Generation task created", model=model, task_id=str(db_result.id))
+        result = LLMResultSchema.from_orm(db_result)
+        await _add_queue_positions([result])
+        return result
     except ModelNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         log_error(e, operation="generate", model=model, prompt=prompt)
         raise LLMHubException("Failed to generate text", "GENERATION_ERROR")
 
 
+@v1_router.post(
+    "/generate/{model}/stream",
+    tags=["generation"],
+    summary="Stream generated text using a specified model",
+    description=(
+        "Generate text using the specified model and stream tokens back as "
+        "Server-Sent Events. The completed response is stored for caching."
+    ),
+    response_class=StreamingResponse,
+)
+async def generate_stream(
+    model: str,
+    request: GenerationRequest,
+    http_request: Request,
+    preprocessor: Optional[str] = Query(
+        None, description="Name of the preprocessor function to apply"
+    ),
+    use_cache: bool = Query(default=True, description="Whether to use cached results"),
+    normalize: bool = Query(
+        default=False,
+        description="Normalise Unicode and whitespace so near-identical prompts share a cache entry",
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    model = _qualify_model_name(model)
+    prompt = _apply_preprocessor(request.prompt, preprocessor, normalize)
+    options = request.options.to_ollama() if request.options else None
+    user_id = current_user.id
+    await enforce_rate_limit(
+        http_request, current_user, tokens=estimate_tokens(prompt, options)
+    )
+
+    try:
+        # Serve cached results as a single token followed by the done event
+        if use_cache:
+            cached_result = await _get_cached_result(db, model, prompt, options)
+            if cached_result:
+                log_info("Cached result found", model=model, prompt=prompt)
+                return StreamingResponse(
+                    _stream_cached(cached_result),
+                    media_type="text/event-stream",
+                )
+
+        if not await model_registry.contains(model):
+            raise ModelNotFoundException(model)
+
+        db_result, created = await _create_result(
+            db, model, prompt, options, use_cache, user_id
+        )
+        if not created and db_result.status in models.INFLIGHT_STATUSES:
+            # Identical generation already queued: stream a private copy
+            db_result, created = await _create_result(
+                db, model, prompt, options, False, user_id
+            )
+        if not created:
+            return StreamingResponse(
+                _stream_cached(LLMResultSchema.from_orm(db_result)),
+                media_type="text/event-stream",
+            )
+    except ModelNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        log_error(e, operation="generate_stream", model=model, prompt=prompt)
+        raise LLMHubException("Failed to generate text", "GENERATION_ERROR")
+
+    log_info("Generation stream started", model=model, task_id=str(db_result.id))
+    return StreamingResponse(
+        _stream_generation(db_result.id, model, prompt, options),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@v1_router.post(
+    "/generate/{model}/batch",
+    response_model=BatchSchema,
+    tags=["generation"],
+    summary="Generate text for a batch of prompts",
+    description=(
+        "Submit many prompts for the same model at once. Cached and in-flight "
+        "prompts are reused, the rest are inserted and enqueued together."
+    ),
+)
+async def generate_batch(
+    model: str,
+    request: BatchGenerationRequest,
+    http_request: Request,
+    preprocessor: Optional[str] = Query(
+        None, description="Name of the preprocessor function to apply"
+    ),
+    use_cache: bool = Query(default=True, description="Whether to use cached results"),
+    normalize: bool = Query(
+        default=False,
+        description="Normalise Unicode and whitespace so near-identical prompts share a cache entry",
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    model = _qualify_model_name(model)
+    prompts = [
+        _apply_preprocessor(prompt, preprocessor, normalize)
+        for prompt in request.prompts
+    ]
+    options = request.options.to_ollama() if request.options else None
+    user_id = current_user.id
+    await enforce_rate_limit(
+        http_request,
+        current_user,
+        tokens=sum(estimate_tokens(prompt, options) for prompt in prompts),
+    )
+
+    try:
+        if not await model_registry.contains(model):
+            raise ModelNotFoundException(model)
+
+        db_batch, results, created = await create_batch(
+            db, model, prompts, use_cache, options, user_id
+        )
+        if created:
+            # Only prompts not cached or in flight need room in the queue
+            tasks = [(row.id, row.prompt) for row in created]
+            await _admit_generations(db, model, tasks, options, "batch")
+            await _publish_generations(db, model, current_user, tasks, options, "batch")
+            log_info("Generation tasks created", model=model, count=len(created))
+        batch_results = [LLMResultSchema.from_orm(row) for row in results]
+        await _add_queue_positions(batch_results)
+        return BatchSchema(
+            id=db_batch.id,
+            model=model,
+            created_at=db_batch.created_at,
+            results=batch_results,
+        )
+    except ModelNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        log_error(e, operation="generate_batch", model=model, prompts=len(prompts))
+        raise LLMHubException("Failed to generate text", "GENERATION_ERROR")
+
+
+async def _stream_cached(result: LLMResultSchema):
+    yield format_sse("token", {"token": result.response})
+    yield format_sse("done", result.model_dump(mode="json"))
+
+
+async def _stream_generation(
+    result_id: uuid.UUID, model: str, prompt: str, options: Optional[dict] = None
+):
+    """
+    Relay Ollama's token stream as Server-Sent Events.
+
+    Each token is pulled from Ollama only after the previous event has been
+    handed to the client connection, so backpressure propagates upstream.
+    Once the stream ends the assembled response is written to the result row.
+    """
+    tokens = []
+    status_, error = "failed", "Error: stream aborted"
+    try:
+        async for chunk in ollama_service.stream_text(model, prompt, options):
+            token = chunk.get("response", "")
+            if token:
+                tokens.append(token)
+                yield format_sse("token", {"token": token})
+        status_ = "completed"
+    except OllamaServiceException as e:
+        log_error(e, operation="generate_stream", model=model)
+        error = f"Error: {str(e)}"
+        yield format_sse("error", {"detail": str(e), "error_code": e.error_code})
+    finally:
+        response = "".join(tokens) if status_ == "completed" else error
+        # A client disconnect cancels the stream; shield the write so the row
+        # still leaves "pending" and gives up its prompt hash claim. The
+        # request-scoped session is already closed once streaming starts
+        with anyio.CancelScope(shield=True):
+            async with AsyncSessionLocal() as db:
+                db_result = await crud.update_llm_result(
+                    db, result_id, response, status_
+                )
+        log_info("Generation stream finished", task_id=str(result_id), status=status_)
+
+    yield format_sse(
+        "done", LLMResultSchema.from_orm(db_result).model_dump(mode="json")
+    )
+
+
+# Fields that GET /v1/result/{result_id}?fields= can select
+RESULT_FIELDS = set(LLMResultSchema.model_fields) - {
+    "similarity",
+    "queue_position",
+    "eta_seconds",
+}
+
+
+async def _load_result(db: AsyncSession, result_id: uuid.UUID, wait: float, load):
+    """
+    Load a result with `load`, waiting up to `wait` seconds for a pending
+    one to land first.
+    """
+    # Register before reading so a completion in between is not missed
+    with event_bus.wait_for_result(result_id) as landed:
+        db_result = await load(db, result_id)
+        if not db_result:
+            raise HTTPException(status_code=404, detail="Result not found")
+        if wait and db_result.status in models.INFLIGHT_STATUSES:
+            # Hand the connection back to the pool while waiting
+            await db.close()
+            try:
+                await asyncio.wait_for(landed, wait)
+                # A replica may not have the completion yet
+                db_result = await load(db, result_id, fresh=True)
+            except asyncio.TimeoutError:
+                pass
+    return db_result
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(selected) - RESULT_FIELDS
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; "
+            f"choose from {', '.join(sorted(RESULT_FIELDS))}",
+        )
+    return selected
+
+
 @v1_router.get(
     "/result/{result_id}",
     response_model=LLMResultSchema,
     tags=["results"],
     summary="Retrieve generation result",
-    description="Fetch the result of a text generation task by its ID.",
+    description=(
+        "Fetch the result of a text generation task by its ID. With `wait`, "
+        "block for up to that many seconds until a pending result lands. "
+        "With `fields`, return only those fields; the prompt and response "
+        "are not read unless selected."
+    ),
 )
-async def get_result(result_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
-    db_result = await crud.get_llm_result(db, result_id)
-    if not db_result:
-        raise HTTPException(status_code=404, detail="Result not found")
+async def get_result(
+    result_id: uuid.UUID,
+    wait: float = Query(
+        0,
+        ge=0,
+        le=settings.RESULT_MAX_WAIT,
+        description="Seconds to wait for a pending result to complete",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. status,response"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    selected = _parse_fields(fields)
+    load_text = selected is None or any(
+        column.key in selected for column in models.TEXT_COLUMNS
+    )
+    db_result = await _load_result(
+        db, result_id, wait, partial(crud.get_llm_result, load_text=load_text)
+    )
     log_info("Result retrieved", result_id=str(result_id))
-    return LLMResultSchema.from_orm(db_result)
+    if selected is not None:
+        return JSONResponse(
+            jsonable_encoder({field: getattr(db_result, field) for field in selected})
+        )
+    result = LLMResultSchema.from_orm(db_result)
+    await _add_queue_positions([result])
+    return result
+
+
+@v1_router.get(
+    "/result/{result_id}/status",
+    response_model=ResultStatusSchema,
+    tags=["results"],
+    summary="Retrieve generation status",
+    description=(
+        "Fetch the status of a text generation task without its prompt or "
+        "response, for cheap polling. Supports `wait` like /result/{result_id}."
+    ),
+)
+async def get_result_status(
+    result_id: uuid.UUID,
+    wait: float = Query(
+        0,
+        ge=0,
+        le=settings.RESULT_MAX_WAIT,
+        description="Seconds to wait for a pending result to complete",
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    row = await _load_result(db, result_id, wait, crud.get_llm_result_status)
+    result = ResultStatusSchema.model_validate(row)
+    await _add_queue_positions([result])
+    return result
+
+
+@v1_router.get(
+    "/results",
+    response_model=ResultPageSchema,
+    tags=["results"],
+    summary="List your results",
+    description=(
+        "List the results of your generations, newest first. Pass the "
+        "returned `next_cursor` as `cursor` for the next page; pages cost the "
+        "same however deep they are."
+    ),
+)
+async def list_results(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=settings.RESULTS_PAGE_MAX_SIZE),
+    model: Optional[str] = Query(None, description="Only results of this model"),
+    result_status: Optional[str] = Query(
+        None, alias="status", description="Only results with this status"
+    ),
+    include_text: bool = Query(False, description="Include prompts and responses"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(rate_limited_user),
+):
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = await crud.list_user_results(
+        db,
+        current_user.id,
+        # One extra row tells whether there is a next page
+        limit + 1,
+        before,
+        _qualify_model_name(model) if model else None,
+        result_status,
+        include_text,
+    )
+    page, more = rows[:limit], len(rows) > limit
+    schema = LLMResultSchema if include_text else ResultStatusSchema
+    return ResultPageSchema(
+        items=[schema.model_validate(row) for row in page],
+        next_cursor=encode_cursor(page[-1].created_at, page[-1].id) if more else None,
+    )
+
+
+async def _stream_export(writer, **filters):
+    # The request's session is closed before the response body is sent
+    async with ReadSessionLocal() as db:
+        batches = crud.stream_results(db, settings.RESULT_EXPORT_BATCH_SIZE, **filters)
+        try:
+            async for chunk in export_chunks(batches, writer):
+                yield chunk
+        except Exception as e:
+            log_error(e, operation="export_results")
+            raise
+
+
+@v1_router.get(
+    "/results/export",
+    tags=["results"],
+    summary="Export your results",
+    description=(
+        "Stream your results, oldest first, as JSONL, CSV or Parquet. Every "
+        "record has a `cursor`; pass the last one received as `cursor` to "
+        "resume an interrupted export."
+    ),
+    response_class=StreamingResponse,
+)
+async def export_results(
+    export_format: str = Query(
+        "jsonl", alias="format", pattern="^(jsonl|csv|parquet)$"
+    ),
+    model: Optional[str] = Query(None, description="Only results of this model"),
+    result_status: Optional[str] = Query(
+        None, alias="status", description="Only results with this status"
+    ),
+    since: Optional[datetime] = Query(None, description="Created at or after this"),
+    until: Optional[datetime] = Query(None, description="Created before this"),
+    cursor: Optional[str] = Query(None, description="Resume after this record"),
+    current_user: User = Depends(rate_limited_user),
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        writer = WRITERS[export_format]()
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    user_id = current_user.id
+    log_info("Result export started", user_id=user_id, format=export_format)
+    return StreamingResponse(
+        _stream_export(
+            writer,
+            user_id=user_id,
+            model=_qualify_model_name(model) if model else None,
+            status=result_status,
+            since=since,
+            until=until,
+            after=after,
+        ),
+        media_type=writer.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="results.{writer.extension}"'
+        },
+    )
+
+
+@v1_router.get(
+    "/batch/{batch_id}",
+    response_model=BatchStatusSchema,
+    tags=["results"],
+    summary="Retrieve batch status",
+    description="Count the results of a batch per status.",
+)
+async def get_batch(batch_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    db_batch = await crud.get_llm_batch(db, batch_id)
+    if not db_batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    counts = await crud.count_results_by_status(db, db_batch.result_ids)
+    inflight = sum(counts.get(s, 0) for s in models.INFLIGHT_STATUSES)
+    return BatchStatusSchema(
+        id=db_batch.id,
+        model=db_batch.model,
+        created_at=db_batch.created_at,
+        total=len(db_batch.result_ids),
+        counts=counts,
+        done=inflight == 0,
+        result_ids=db_batch.result_ids,
+    )
+
+
+@v1_router.get("/cache/stats", tags=["cache"])
+async def cache_stats():
+    """
+    Report this process's result cache hit, miss and eviction counters,
+    including the semantic cache tier, and its auth cache counters.
+    """
+    return {
+        **result_cache.stats(),
+        "semantic": semantic_cache.stats(),
+        "auth": {"tokens": token_cache.stats(), "users": user_cache.stats()},
+    }
+
+
+@v1_router.get("/db/stats", tags=["database"])
+async def database_stats():
+    """
+    Report this process's connection pool usage per database engine, and
+    how many reads went to the replica.
+    """
+    return db_stats()
+
+
+@v1_router.get("/admission", tags=["generation"])
+async def admission_state():
+    """
+    Report each model queue's admission state, backlog and projected wait,
+    and how many generations this process admitted, shed or rejected.
+    """
+    return {
+        "queues": await admission_controller.queue_states(),
+        "counts": admission_controller.stats(),
+    }
+
+
+@v1_router.delete("/cache/{model}", tags=["cache"])
+async def purge_cache(
+    model: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_admin_user),
+):
+    """
+    Purge a model's cached results, e.g. after its Modelfile changed.
+    Restricted to ADMIN_USERNAMES, as the caches are shared by every user.
+
+    Completed results are marked as invalidated in Postgres so they are not
+    served again; they can still be fetched by ID.
+    """
+    model = _qualify_model_name(model)
+    try:
+        invalidated = await crud.invalidate_cached_results(db, model)
+        purged = await result_cache.invalidate(model)
+    except Exception as e:
+        log_error(e, operation="purge_cache", model=model)
+        raise LLMHubException("Failed to purge cache", "CACHE_ERROR")
+    log_info("Cache purged", model=model, invalidated=invalidated)
+    return {"model": model, "invalidated": invalidated, "purged": purged}
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@v1_router.websocket("/result/{result_id}/ws")
+async def result_websocket(websocket: WebSocket, result_id: uuid.UUID):
+    """
+    Send the result once it has landed, then close the socket.
+
+    A pending result is announced with its status first (without prompt or
+    response), so clients can tell an accepted subscription from a slow one.
+    """
+    await websocket.accept()
+    with event_bus.wait_for_result(result_id) as landed:
+        async with AsyncSessionLocal() as db:
+            row = await crud.get_llm_result_status(db, result_id)
+        if row is None:
+            await websocket.close(code=4404, reason="Result not found")
+            return
+
+        if row.status in models.INFLIGHT_STATUSES:
+            await websocket.send_json(
+                ResultStatusSchema.model_validate(row).model_dump(mode="json")
+            )
+            disconnected = asyncio.ensure_future(_wait_for_disconnect(websocket))
+            done, _ = await asyncio.wait(
+                {landed, disconnected}, return_when=asyncio.FIRST_COMPLETED
+            )
+            disconnected.cancel()
+            if landed not in done:
+                return
+        async with AsyncSessionLocal() as db:
+            db_result = await crud.get_llm_result(
+                db, result_id, load_text=True, fresh=True
+            )
+
+    await websocket.send_json(
+        LLMResultSchema.from_orm(db_result).model_dump(mode="json")
+    )
+    await websocket.close()
 
 
 # Include v1 router in the main app
@@ -1,10 +1,43 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class GenerationOptions(BaseModel):
+    """
+    Ollama model options forwarded to /api/generate.
+
+    Only options that are set are sent, so Ollama's (or the Modelfile's)
+    defaults apply to the rest.
+    """
+
+    num_predict: Optional[int] = Field(None, ge=-2)  # -1: unbounded, -2: fill context
+    num_ctx: Optional[int] = Field(None, ge=1)
+    temperature: Optional[float] = Field(None, ge=0)
+    top_p: Optional[float] = Field(None, ge=0, le=1)
+    top_k: Optional[int] = Field(None, ge=0)
+    repeat_penalty: Optional[float] = Field(None, ge=0)
+    seed: Optional[int] = None
+    stop: Optional[List[str]] = None
+    num_thread: Optional[int] = Field(None, ge=1)
+
+    model_config = ConfigDict(extra="forbid")
+
+    def to_ollama(self) -> Optional[Dict[str, Any]]:
+        """The options that were set, or None if there are none."""
+        return self.model_dump(exclude_none=True) or None
 
 
 class GenerationRequest(BaseModel):
     prompt: str
     preprocessor: Optional[str] = None
+    options: Optional[GenerationOptions] = None
+
+
+class BatchGenerationRequest(BaseModel):
+    prompts: List[str] = Field(..., min_length=1, max_length=settings.BATCH_MAX_SIZE)
+    options: Optional[GenerationOptions] = None  # Applied to every prompt
 
 
 class ErrorResponse(BaseModel):
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -9,9 +9,53 @@ class LLMResultSchema(BaseModel):
     id: uuid.UUID
     model: str
     prompt: str
+    options: Optional[Dict[str, Any]] = None
     response: Optional[str]
     status: str
     created_at: datetime
     completed_at: Optional[datetime]
+    # Cosine similarity of the prompt when served by the semantic cache
+    similarity: Optional[float] = None
+    # While pending: tasks ahead of it in its model's queue, and an estimate
+    # of the seconds until it starts
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ResultStatusSchema(BaseModel):
+    """An LLMResult without its prompt and response, for polling."""
+
+    id: uuid.UUID
+    model: str
+    status: str
+    created_at: datetime
+    completed_at: Optional[datetime]
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ResultPageSchema(BaseModel):
+    # Results without prompt and response unless requested, newest first
+    items: List[LLMResultSchema | ResultStatusSchema]
+    next_cursor: Optional[str]  # Pass as `cursor` for the next page; None at the end
+
+
+class BatchSchema(BaseModel):
+    id: uuid.UUID
+    model: str
+    created_at: datetime
+    results: List[LLMResultSchema]  # One per submitted prompt, in order
+
+
+class BatchStatusSchema(BaseModel):
+    id: uuid.UUID
+    model: str
+    created_at: datetime
+    total: int
+    counts: Dict[str, int]  # Number of results per status
+    done: bool
+    result_ids: List[uuid.UUID]
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict
 
 
@@ -12,5 +14,6 @@ class UserCreate(UserBase):
 class User(UserBase):
     id: int
     is_active: bool
+    tier: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,116 @@
+"""
+Export results from Postgres to a JSONL, CSV or Parquet file.
+
+Rows are streamed from a server-side cursor and written batch by batch, so
+memory stays flat however many results match. The format follows the
+output's extension. If the export stops early, the cursor it prints resumes
+it into a new file with --cursor.
+
+Usage:
+    python -m app.scripts.export_results results.parquet --model llama3:latest --since 2026-10-01
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy.engine import Row
+
+from app.core.config import settings
+from app.db import crud
+from app.db.base import ReadSessionLocal, dispose_engines
+from app.utils.export import WRITERS, export_chunks
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+class Tracker:
+    """Remembers the last row whose batch has been written out."""
+
+    def __init__(self):
+        self.last: Optional[Row] = None
+        self.rows = 0
+
+    async def track(self, batches: AsyncIterator[List[Row]]):
+        async for rows in batches:
+            yield rows
+            # Resumed only once the consumer has written the batch
+            self.last = rows[-1]
+            self.rows += len(rows)
+
+    @property
+    def cursor(self) -> Optional[str]:
+        if self.last is None:
+            return None
+        return encode_cursor(self.last.created_at, self.last.id)
+
+
+async def export(args: argparse.Namespace, tracker: Tracker) -> None:
+    extension = args.output.suffix.lstrip(".")
+    if extension not in WRITERS:
+        raise SystemExit(
+            f"Unsupported output format {extension!r}: use {sorted(WRITERS)}"
+        )
+    try:
+        writer = WRITERS[extension]()
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+    async with ReadSessionLocal() as db:
+        batches = crud.stream_results(
+            db,
+            args.batch_size,
+            user_id=args.user_id,
+            model=args.model,
+            status=args.status,
+            since=args.since,
+            until=args.until,
+            after=decode_cursor(args.cursor) if args.cursor else None,
+        )
+        with open(args.output, "wb") as f:
+            async for chunk in export_chunks(tracker.track(batches), writer):
+                f.write(chunk)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    tracker = Tracker()
+    try:
+        await export(args, tracker)
+        print(f"Exported {tracker.rows} results to {args.output}")
+    except BaseException:
+        if tracker.cursor:
+            print(
+                f"Export stopped after {tracker.rows} results; resume with "
+                f"--cursor {tracker.cursor}",
+                file=sys.stderr,
+            )
+        raise
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "output", type=Path, help="File ending in .jsonl, .csv or .parquet"
+    )
+    parser.add_argument("--model", help="Only results of this model")
+    parser.add_argument("--status", help="Only results with this status")
+    parser.add_argument("--user-id", type=int, help="Only results of this user")
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="Created at or after this"
+    )
+    parser.add_argument(
+        "--until", type=datetime.fromisoformat, help="Created before this"
+    )
+    parser.add_argument("--cursor", help="Resume after the result with this cursor")
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.RESULT_EXPORT_BATCH_SIZE
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
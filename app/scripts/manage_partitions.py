@@ -0,0 +1,126 @@
+"""
+Create upcoming llm_results partitions and retire expired ones.
+
+Monthly partitions are created RESULT_PARTITION_MONTHS_AHEAD months ahead.
+With a retention period, every partition whose rows are all older than it
+is detached, then dropped or, with an archive schema, moved there; the
+prompt hash claims of its results are deleted in the same transaction, so
+the prompts can be generated again. Run it daily, e.g. from cron.
+
+Usage:
+    python -m app.scripts.manage_partitions --retention-days 90 [--archive-schema archive]
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.logger import log_info
+from app.db.base import engine
+from app.db.partitions import (
+    PARENT,
+    add_months,
+    create_partition_sql,
+    expired_partitions,
+    month_start,
+    months_between,
+)
+
+
+def _utc(day: date) -> datetime:
+    # Partition bounds are midnight UTC
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+async def list_partitions(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ),
+        {"parent": PARENT},
+    )
+    return list(result.scalars().all())
+
+
+async def create_partitions(conn: AsyncConnection, today: date, months_ahead: int):
+    for month in months_between(month_start(today), add_months(today, months_ahead)):
+        await conn.execute(text(create_partition_sql(month)))
+
+
+async def retire_partition(
+    conn: AsyncConnection, name: str, month: date, archive_schema: str = ""
+) -> None:
+    """Release a partition's prompt hashes and detach it, then drop or archive it."""
+    await conn.execute(
+        text(
+            "DELETE FROM llm_result_keys "
+            "WHERE created_at >= :start AND created_at < :end"
+        ),
+        {"start": _utc(month), "end": _utc(add_months(month, 1))},
+    )
+    await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    if archive_schema:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+    else:
+        await conn.execute(text(f"DROP TABLE {name}"))
+    log_info(
+        "Partition retired",
+        partition=name,
+        archived_to=archive_schema or None,
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    today = date.today()
+    try:
+        async with engine.begin() as conn:
+            await create_partitions(conn, today, args.months_ahead)
+        if args.retention_days <= 0:
+            return
+        cutoff = today - timedelta(days=args.retention_days)
+        async with engine.connect() as conn:
+            expired = expired_partitions(await list_partitions(conn), cutoff)
+        for name, month in expired:
+            if args.dry_run:
+                print(f"would retire {name}")
+                continue
+            # One transaction per partition, so a failure leaves the rest intact
+            async with engine.begin() as conn:
+                await retire_partition(conn, name, month, args.archive_schema)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        default=settings.RESULT_RETENTION_DAYS,
+        help="Retire partitions older than this; 0 keeps everything",
+    )
+    parser.add_argument(
+        "--months-ahead", type=int, default=settings.RESULT_PARTITION_MONTHS_AHEAD
+    )
+    parser.add_argument(
+        "--archive-schema",
+        default=settings.RESULT_ARCHIVE_SCHEMA,
+        help="Move retired partitions to this schema instead of dropping them",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="List expired partitions only"
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Run a JSONL file of prompts through the generation pipeline offline.
+
+Each input line is a JSON object with at least a prompt (and optionally a
+model and Ollama options); other fields are ignored except the record ID, which is copied to the
+output. Records are read lazily and processed with bounded concurrency, and
+completed results are stored in Postgres like API generations, so cached
+prompts are not generated twice. Outputs are written incrementally to JSONL,
+or to a directory of Parquet part files when the output ends in ".parquet"
+(requires pyarrow).
+
+Progress is checkpointed next to the output; rerunning the same command
+resumes where the previous run stopped. A record that cannot be processed
+(invalid JSON, a missing prompt, bad options, a database error) gets a
+failed output row with the error instead of stopping the run.
+
+Usage:
+    python -m app.scripts.run_batch input.jsonl --output results.jsonl --model llama3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from app.core.config import settings
+from app.core.redis_client import close_redis
+from app.db import crud
+from app.db.base import AsyncSessionLocal, dispose_engines
+from app.schemas.base import GenerationOptions
+from app.services.ollama import OllamaServiceException, ollama_service
+
+Record = Dict[str, Any]
+Processor = Callable[[Record], Awaitable[Record]]
+
+
+class JsonlSink:
+    """
+    Append output rows to a JSONL file.
+
+    The committed state is the file size at the last checkpoint; on resume
+    anything written after it is truncated, because those records were not
+    checkpointed and will be processed again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def open(self, state: Optional[Dict[str, Any]]) -> None:
+        self._file = open(self.path, "a+b")
+        self._file.truncate((state or {}).get("offset", 0))
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, row: Record) -> None:
+        self._file.write(json.dumps(row, default=str).encode() + b"\n")
+
+    def commit(self) -> Dict[str, Any]:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {"offset": self._file.tell()}
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink:
+    """
+    Write output rows to a directory of Parquet part files.
+
+    A Parquet file cannot be appended to, so each checkpoint closes the
+    current part. Parts that were not closed before a crash are removed on
+    resume.
+    """
+
+    def __init__(self, path: Path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+        self.path = path
+        self.parts = 0
+        self._rows: List[Record] = []
+
+    def open(self, state: Optional[Dict[str, Any]]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.parts = (state or {}).get("parts", 0)
+        for part in self.path.glob("part-*.parquet"):
+            if int(part.stem.split("-")[1]) >= self.parts:
+                part.unlink()
+
+    def write(self, row: Record) -> None:
+        self._rows.append(row)
+
+    def commit(self) -> Dict[str, Any]:
+        if self._rows:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            rows = [{k: _to_column(v) for k, v in row.items()} for row in self._rows]
+            part = self.path / f"part-{self.parts:05d}.parquet"
+            pq.write_table(pa.Table.from_pylist(rows), part)
+            self.parts += 1
+            self._rows = []
+        return {"parts": self.parts}
+
+    def close(self) -> None:
+        self._rows = []
+
+
+def _to_column(value: Any) -> Any:
+    return (
+        value if value is None or isinstance(value, (str, int, float)) else str(value)
+    )
+
+
+class Checkpoint:
+    """
+    Tracks which input lines are finished.
+
+    Lines finish out of order, so the checkpoint keeps a watermark (every
+    line up to it is done) plus the finished lines above it. It is written
+    atomically together with the sink's committed state.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.watermark = 0
+        self.done: Set[int] = set()
+        self.sink_state: Optional[Dict[str, Any]] = None
+
+    def load(self) -> None:
+        if self.path.exists():
+            state = json.loads(self.path.read_text())
+            self.watermark = state["watermark"]
+            self.done = set(state["done"])
+            self.sink_state = state["sink"]
+
+    def is_done(self, line: int) -> bool:
+        return line <= self.watermark or line in self.done
+
+    def mark_done(self, line: int) -> None:
+        self.done.add(line)
+        while self.watermark + 1 in self.done:
+            self.watermark += 1
+            self.done.discard(self.watermark)
+
+    def save(self, sink_state: Dict[str, Any]) -> None:
+        self.sink_state = sink_state
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "watermark": self.watermark,
+                    "done": sorted(self.done),
+                    "sink": sink_state,
+                }
+            )
+        )
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    """Throughput counters, printed every `interval` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.started = self.reported = time.monotonic()
+        self.prompts = self.tokens = self.cached = self.failed = 0
+
+    def record(self, row: Record) -> None:
+        self.prompts += 1
+        self.tokens += row.get("eval_count") or 0
+        self.cached += bool(row.get("cached"))
+        self.failed += row.get("status") == "failed"
+        if time.monotonic() - self.reported >= self.interval:
+            self.report()
+
+    def report(self) -> None:
+        self.reported = time.monotonic()
+        elapsed = max(self.reported - self.started, 1e-9)
+        print(
+            f"{self.prompts} prompts ({self.cached} cached, {self.failed} failed) "
+            f"{self.prompts / elapsed:.1f} prompts/s {self.tokens / elapsed:.1f} tokens/s",
+            flush=True,
+        )
+
+
+def read_records(path: Path) -> Iterator[Tuple[int, Union[Record, ValueError]]]:
+    """
+    Yield (line number, record) pairs without loading the whole file. A
+    line that is not valid JSON yields its decoding error instead.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, e
+
+
+async def generate_record(
+    model: str,
+    prompt: str,
+    use_cache: bool = True,
+    options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Generate one prompt, reusing a completed result from the database.
+
+    The DB session is only held for the lookups and writes, not while
+    Ollama is generating.
+    """
+    async with AsyncSessionLocal() as db:
+        created = False
+        if use_cache:
+            db_result, created = await crud.create_or_get_llm_result(
+                db, model, prompt, options=options
+            )
+            if db_result.status == "completed":
+                return {
+                    "result_id": db_result.id,
+                    "status": "completed",
+                    "cached": True,
+                    "response": db_result.response,
+                }
+        if not created:
+            # Uncached, or the same prompt is already being generated elsewhere
+            db_result = await crud.create_llm_result(
+                db, model, prompt, options=options, cacheable=False
+            )
+        await crud.set_llm_result_status(db, db_result.id, "running")
+
+    try:
+        result = await ollama_service.generate_text(model, prompt, options)
+        response, status = result["response"], "completed"
+    except OllamaServiceException as e:
+        result, response, status = {}, f"Error: {str(e)}", "failed"
+
+    async with AsyncSessionLocal() as db:
+        await crud.update_llm_result(db, db_result.id, response, status)
+    return {
+        "result_id": db_result.id,
+        "status": status,
+        "cached": False,
+        "response": response,
+        "eval_count": result.get("eval_count"),
+    }
+
+
+async def _process_or_fail(
+    process: Processor, record: Union[Record, ValueError]
+) -> Record:
+    """Process a record, turning any error into a failed output row."""
+    try:
+        if isinstance(record, ValueError):
+            raise record
+        return await process(record)
+    except Exception as e:
+        return {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+
+async def run(
+    records: Iterator[Tuple[int, Union[Record, ValueError]]],
+    sink,
+    checkpoint: Checkpoint,
+    process: Processor,
+    concurrency: int,
+    checkpoint_every: int = 100,
+    progress: Optional[Progress] = None,
+) -> None:
+    """
+    Feed records through `process` with at most `concurrency` in flight,
+    writing each output row as soon as it is ready. A record that fails is
+    written as a failed row with its error and counts as done.
+    """
+    checkpoint.load()
+    sink.open(checkpoint.sink_state)
+    semaphore = asyncio.Semaphore(concurrency)
+    pending: Set[asyncio.Task] = set()
+    finished = 0
+
+    async def handle(line_number: int, record: Record) -> None:
+        nonlocal finished
+        try:
+            row = await _process_or_fail(process, record)
+        finally:
+            semaphore.release()
+        sink.write({"line": line_number, **row})
+        checkpoint.mark_done(line_number)
+        if progress is not None:
+            progress.record(row)
+        finished += 1
+        if finished % checkpoint_every == 0:
+            checkpoint.save(sink.commit())
+
+    try:
+        for line_number, record in records:
+            if checkpoint.is_done(line_number):
+                continue
+            # Block reading until a slot frees up, so memory stays bounded
+            await semaphore.acquire()
+            task = asyncio.create_task(handle(line_number, record))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        checkpoint.save(sink.commit())
+    finally:
+        sink.close()
+    if progress is not None:
+        progress.report()
+
+
+def make_processor(
+    default_model: str, prompt_field: str, id_field: str, use_cache: bool
+) -> Processor:
+    async def process(record: Record) -> Record:
+        model = record.get("model") or default_model
+        model = model if ":" in model else f"{model}:latest"
+        options = record.get("options")
+        if options:
+            options = GenerationOptions.model_validate(options).to_ollama()
+        row = await generate_record(model, record[prompt_field], use_cache, options)
+        return {"id": record.get(id_field), "model": model, **row}
+
+    return process
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    output = Path(args.output)
+    sink = ParquetSink(output) if output.suffix == ".parquet" else JsonlSink(output)
+    checkpoint = Checkpoint(Path(args.checkpoint or f"{output}.checkpoint"))
+    await ollama_service.startup()
+    try:
+        await run(
+            read_records(Path(args.input)),
+            sink,
+            checkpoint,
+            make_processor(
+                args.model, args.prompt_field, args.id_field, not args.no_cache
+            ),
+            args.concurrency,
+            args.checkpoint_every,
+            Progress(args.report_interval),
+        )
+    finally:
+        await ollama_service.shutdown()
+        await close_redis()
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("input", help="JSONL file of {model, prompt, ...} records")
+    parser.add_argument(
+        "--output", required=True, help="Output .jsonl or .parquet path"
+    )
+    parser.add_argument(
+        "--checkpoint", help="Checkpoint file (default: <output>.checkpoint)"
+    )
+    parser.add_argument(
+        "--model",
+        default=settings.AVAILABLE_MODELS[0],
+        help="Model for records that do not name one",
+    )
+    parser.add_argument(
+        "--prompt-field", default="prompt", help="Record field to generate from"
+    )
+    parser.add_argument(
+        "--id-field", default="id", help="Record field copied to the output"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.CELERY_ASYNC_CONCURRENCY
+    )
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument("--no-cache", action="store_true", help="Skip cached results")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
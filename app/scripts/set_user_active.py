@@ -0,0 +1,42 @@
+"""
+Deactivate or reactivate a user.
+
+The change is announced to every API process, which drop the user from
+their auth cache, so a deactivated user is refused on their next request.
+
+Usage:
+    python -m app.scripts.set_user_active alice --inactive
+"""
+
+import argparse
+import asyncio
+
+from app.core.auth import set_user_active
+from app.core.redis_client import close_redis
+from app.db.base import AsyncSessionLocal, dispose_engines
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            found = await set_user_active(db, args.username, not args.inactive)
+        if not found:
+            raise SystemExit(f"User {args.username} not found")
+        state = "inactive" if args.inactive else "active"
+        print(f"User {args.username} is now {state}")
+    finally:
+        await close_redis()
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("username")
+    parser.add_argument(
+        "--inactive", action="store_true", help="Deactivate rather than activate"
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Set a user's rate limit tier.
+
+Tiers are defined by RATE_LIMIT_TIERS. The change is announced to every API
+process, which drop the user from their auth cache, so the new limits apply
+from the user's next request.
+
+Usage:
+    python -m app.scripts.set_user_tier alice pro
+    python -m app.scripts.set_user_tier alice --default
+"""
+
+import argparse
+import asyncio
+
+from app.core.auth import set_user_tier
+from app.core.config import settings
+from app.core.rate_limit import parse_tiers
+from app.core.redis_client import close_redis
+from app.db.base import AsyncSessionLocal, dispose_engines
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            found = await set_user_tier(db, args.username, args.tier)
+        if not found:
+            raise SystemExit(f"User {args.username} not found")
+        print(f"User {args.username} is now on the {args.tier or 'default'} tier")
+    finally:
+        await close_redis()
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("username")
+    parser.add_argument("tier", nargs="?", help="A tier from RATE_LIMIT_TIERS")
+    parser.add_argument(
+        "--default", action="store_true", help="Move the user to the default tier"
+    )
+    args = parser.parse_args()
+    if args.default == bool(args.tier):
+        parser.error("give either a tier or --default")
+    tiers = parse_tiers(settings.RATE_LIMIT_TIERS)
+    if args.tier and args.tier not in tiers:
+        parser.error(f"unknown tier {args.tier}; choose from {', '.join(tiers)}")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
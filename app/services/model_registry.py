@@ -0,0 +1,158 @@
+import asyncio
+import json
+import time
+from typing import FrozenSet, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import OllamaServiceException
+from app.core.logger import log_error, log_info
+from app.core.redis_client import get_redis
+from app.services.ollama import OllamaService, ollama_service
+
+REDIS_KEY = "llm_hub:models"
+
+
+class ModelRegistry:
+    """
+    In-memory catalogue of the models Ollama can serve.
+
+    The catalogue is cached with a TTL and refreshed in the background, so
+    checking whether a model exists is a set lookup instead of an /api/tags
+    round trip. When the cache is stale it keeps serving the old catalogue
+    while a refresh runs; only a cold cache makes callers wait, and
+    concurrent callers share a single refresh. Optionally the catalogue is
+    shared between processes through Redis.
+    """
+
+    def __init__(
+        self,
+        service: OllamaService = ollama_service,
+        ttl: float = settings.MODEL_REGISTRY_TTL,
+        refresh_interval: float = settings.MODEL_REGISTRY_REFRESH_INTERVAL,
+        miss_refresh_age: float = settings.MODEL_REGISTRY_MISS_REFRESH_AGE,
+        use_redis: bool = settings.MODEL_REGISTRY_USE_REDIS,
+    ):
+        self.service = service
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.miss_refresh_age = miss_refresh_age
+        self.use_redis = use_redis
+        self._models: FrozenSet[str] = frozenset()
+        self._ordered: List[str] = []
+        self._loaded_at: Optional[float] = None
+        self._generation = 0
+        self._refresh_lock = asyncio.Lock()
+        self._background_refresh: Optional[asyncio.Task] = None
+        self._refresh_loop: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the catalogue was last loaded (infinite when cold)."""
+        if self._loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self._loaded_at
+
+    async def get_models(self) -> List[str]:
+        """Return the model names, loading the catalogue if needed."""
+        await self._ensure_loaded()
+        return list(self._ordered)
+
+    async def contains(self, model: str) -> bool:
+        """
+        Check whether a model is available.
+
+        A miss on a catalogue older than `miss_refresh_age` triggers one
+        shared refresh, so freshly pulled models are picked up without
+        letting unknown names hammer Ollama.
+        """
+        await self._ensure_loaded()
+        if model in self._models:
+            return True
+        if self.age > self.miss_refresh_age:
+            await self._safe_refresh()
+        return model in self._models
+
+    async def refresh(self) -> None:
+        """
+        Reload the catalogue. Callers that arrive while a refresh is already
+        running wait for it and reuse its result instead of starting another.
+        """
+        generation = self._generation
+        async with self._refresh_lock:
+            if self._generation != generation:
+                return
+            models = await self._load()
+            self._models = frozenset(models)
+            self._ordered = models
+            self._loaded_at = time.monotonic()
+            self._generation += 1
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded_at is None:
+            await self.refresh()
+        elif self.age > self.ttl:
+            self._schedule_background_refresh()
+
+    def _schedule_background_refresh(self) -> None:
+        if self._background_refresh is None or self._background_refresh.done():
+            self._background_refresh = asyncio.create_task(self._safe_refresh())
+
+    async def _safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except OllamaServiceException as e:
+            # Keep serving the previous catalogue until Ollama answers again
+            log_error(e, operation="model_registry_refresh")
+
+    async def _load(self) -> List[str]:
+        if self.use_redis:
+            shared = await self._read_shared()
+            if shared is not None:
+                return shared
+        models = await self.service.get_available_models()
+        if self.use_redis:
+            await self._write_shared(models)
+        return models
+
+    async def _read_shared(self) -> Optional[List[str]]:
+        try:
+            raw = await get_redis().get(REDIS_KEY)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            log_error(e, operation="model_registry_read_shared")
+            return None
+
+    async def _write_shared(self, models: List[str]) -> None:
+        try:
+            await get_redis().set(
+                REDIS_KEY, json.dumps(models), ex=max(1, int(self.ttl))
+            )
+        except Exception as e:
+            log_error(e, operation="model_registry_write_shared")
+
+    async def _run_refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self._safe_refresh()
+
+    async def start(self) -> None:
+        """Warm the catalogue and start the periodic background refresh."""
+        await self._safe_refresh()
+        if self._refresh_loop is None or self._refresh_loop.done():
+            self._refresh_loop = asyncio.create_task(self._run_refresh_loop())
+        log_info("Model registry started", models=self._ordered)
+
+    async def stop(self) -> None:
+        """Cancel the background refresh tasks."""
+        for task in (self._refresh_loop, self._background_refresh):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresh_loop = None
+        self._background_refresh = None
+
+
+model_registry = ModelRegistry()
@@ -1,25 +1,126 @@
-from typing import List, Dict, Any
+import asyncio
+import importlib.util
+import json
+from typing import List, Dict, Any, Optional, AsyncIterator, Union
 
 import httpx
 
 from app.core.config import settings
 from app.core.exceptions import OllamaServiceException
 from app.core.logger import log_error, log_info
+from app.services.ollama_pool import BackendPool
+
+
+def _http2_available() -> bool:
+    """Return True if the optional 'h2' package needed by httpx for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _generate_payload(
+    model: str, prompt: str, options: Optional[Dict[str, Any]], stream: bool
+) -> Dict[str, Any]:
+    """Build an /api/generate request body, with model options if given."""
+    payload = {"model": model, "prompt": prompt, "stream": stream}
+    if options:
+        payload["options"] = options
+    return payload
 
 
 class OllamaService:
-    def __init__(self, base_url: str = settings.OLLAMA_URL):
-        self.base_url = base_url
+    """
+    Client for the Ollama HTTP API.
+
+    A single long-lived httpx.AsyncClient is shared by every call made through
+    the service, so connections to Ollama are pooled and kept alive between
+    requests instead of paying a new TCP handshake each time. The client is
+    created lazily and should be closed with `shutdown()` when the owning
+    process (API server or Celery worker) stops.
+
+    The service can front several Ollama nodes; each call is routed by the
+    BackendPool (least outstanding requests, model residency, health).
+    """
+
+    def __init__(
+        self,
+        base_url: Union[str, List[str]] = settings.OLLAMA_URLS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        pool: Optional[BackendPool] = None,
+    ):
+        urls = base_url.split(",") if isinstance(base_url, str) else list(base_url)
+        self.pool = pool or BackendPool(urls)
+        self.base_url = self.pool.backends[0].url
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            connect=settings.OLLAMA_CONNECT_TIMEOUT,
+            read=settings.OLLAMA_READ_TIMEOUT,
+            write=settings.OLLAMA_WRITE_TIMEOUT,
+            pool=settings.OLLAMA_POOL_TIMEOUT,
+        )
+        http2 = settings.OLLAMA_HTTP2
+        if http2 and not _http2_available():
+            log_info("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=http2,
+            transport=self._transport,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared AsyncClient, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def startup(self) -> None:
+        """
+        Open the shared HTTP client and start backend health checks.
+        Safe to call more than once.
+        """
+        self.pool.start_health_checks(self.client)
+        log_info("Ollama client started", backends=[b.url for b in self.pool.backends])
+
+    async def shutdown(self) -> None:
+        """Close the shared HTTP client and release its pooled connections."""
+        await self.pool.stop_health_checks()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            log_info("Ollama client closed")
+        self._client = None
+
+    def reset(self) -> None:
+        """
+        Drop the client without closing it.
+
+        Used in forked worker processes, where the connections inherited from
+        the parent must not be shared with it.
+        """
+        self._client = None
 
     async def get_available_models(self) -> List[str]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/api/tags", timeout=60)
-                response.raise_for_status()
-                models = response.json().get("models", [])
-                model_names = [model["name"] for model in models]
-                log_info("Retrieved available models", count=len(model_names))
-                return model_names
+            healthy = [b for b in self.pool.backends if b.healthy] or self.pool.backends
+            results = await asyncio.gather(
+                *(self._get_tags(backend.url) for backend in healthy),
+                return_exceptions=True,
+            )
+            catalogues = [r for r in results if not isinstance(r, BaseException)]
+            if not catalogues:
+                raise results[0]
+            # Union of every node's models, in first-seen order
+            model_names = list(dict.fromkeys(n for names in catalogues for n in names))
+            log_info("Retrieved available models", count=len(model_names))
+            return model_names
         except httpx.HTTPStatusError as e:
             log_error(
                 e, operation="get_available_models", status_code=e.response.status_code
@@ -31,22 +132,49 @@ class OllamaService:
             log_error(e, operation="get_available_models")
             raise OllamaServiceException("Failed to fetch models from Ollama")
 
-    async def generate_text(self, model: str, prompt: str) -> Dict[str, Any]:
+    async def _get_tags(self, url: str) -> List[str]:
+        timeout = httpx.Timeout(
+            settings.OLLAMA_TAGS_TIMEOUT, connect=settings.OLLAMA_CONNECT_TIMEOUT
+        )
+        response = await self.client.get(f"{url}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    async def _post(self, model: str, path: str, payload: Dict[str, Any]):
+        """
+        POST to the best backend for `model`.
+
+        A request that could not connect never reached Ollama, so it is
+        retried on the next best backend before giving up.
+        """
+        tried = []
+        while True:
+            try:
+                async with self.pool.lease(model, exclude=tried) as backend:
+                    tried.append(backend)
+                    response = await self.client.post(backend.url + path, json=payload)
+                    response.raise_for_status()
+                    return response
+            except httpx.ConnectError:
+                if len(tried) >= len(self.pool.backends):
+                    raise
+
+    async def generate_text(
+        self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         try:
-            with httpx.Client() as client:
-                response = client.post(
-                    f"{self.base_url}/api/generate",
-                    json={"model": model, "prompt": prompt, "stream": False},
-                    timeout=600,
-                )
-                response.raise_for_status()
-                result = response.json()
-                log_info(
-                    "Text generated successfully",
-                    model=model,
-                    prompt_length=len(prompt),
-                )
-                return result
+            response = await self._post(
+                model,
+                "/api/generate",
+                _generate_payload(model, prompt, options, stream=False),
+            )
+            result = response.json()
+            log_info(
+                "Text generated successfully",
+                model=model,
+                prompt_length=len(prompt),
+            )
+            return result
         except httpx.HTTPStatusError as e:
             log_error(
                 e,
@@ -64,22 +192,66 @@ class OllamaService:
             log_error(e, operation="generate_text", model=model)
             raise OllamaServiceException("Failed to generate text with Ollama")
 
-    async def chat(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    async def stream_text(
+        self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a generation from Ollama, yielding each NDJSON chunk as a dict.
+
+        Chunks are read from the socket only as fast as the caller consumes
+        them, so a slow consumer applies backpressure all the way to Ollama.
+        The final chunk has "done": true and carries the timing statistics.
+        """
         try:
-            with httpx.Client() as client:
-                response = client.post(
-                    f"{self.base_url}/api/chat",
-                    json={"model": model, "messages": messages},
-                    timeout=600,
-                )
+            async with self.pool.lease(model) as backend, self.client.stream(
+                "POST",
+                f"{backend.url}/api/generate",
+                json=_generate_payload(model, prompt, options, stream=True),
+            ) as response:
                 response.raise_for_status()
-                result = response.json()
-                log_info(
-                    "Chat completed successfully",
-                    model=model,
-                    message_count=len(messages),
-                )
-                return result
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise OllamaServiceException(chunk["error"])
+                    yield chunk
+            log_info(
+                "Text streamed successfully", model=model, prompt_length=len(prompt)
+            )
+        except OllamaServiceException:
+            raise
+        except httpx.HTTPStatusError as e:
+            log_error(
+                e,
+                operation="stream_text",
+                model=model,
+                status_code=e.response.status_code,
+            )
+            raise OllamaServiceException(
+                f"Ollama service returned status code {e.response.status_code}"
+            )
+        except httpx.RequestError as e:
+            log_error(e, operation="stream_text", model=model)
+            raise OllamaServiceException("Failed to connect to Ollama service")
+        except Exception as e:
+            log_error(e, operation="stream_text", model=model)
+            raise OllamaServiceException("Failed to stream text from Ollama")
+
+    async def chat(self, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        try:
+            response = await self._post(
+                model,
+                "/api/chat",
+                {"model": model, "messages": messages, "stream": False},
+            )
+            result = response.json()
+            log_info(
+                "Chat completed successfully",
+                model=model,
+                message_count=len(messages),
+            )
+            return result
         except httpx.HTTPStatusError as e:
             log_error(
                 e, operation="chat", model=model, status_code=e.response.status_code
@@ -94,5 +266,26 @@ class OllamaService:
             log_error(e, operation="chat", model=model)
             raise OllamaServiceException("Failed to chat with Ollama")
 
+    async def embed(self, model: str, text: str) -> List[float]:
+        """Return the embedding of `text` computed by an embedding model."""
+        try:
+            response = await self._post(
+                model, "/api/embeddings", {"model": model, "prompt": text}
+            )
+            return response.json()["embedding"]
+        except httpx.HTTPStatusError as e:
+            log_error(
+                e, operation="embed", model=model, status_code=e.response.status_code
+            )
+            raise OllamaServiceException(
+                f"Ollama service returned status code {e.response.status_code}"
+            )
+        except httpx.RequestError as e:
+            log_error(e, operation="embed", model=model)
+            raise OllamaServiceException("Failed to connect to Ollama service")
+        except Exception as e:
+            log_error(e, operation="embed", model=model)
+            raise OllamaServiceException("Failed to compute embedding with Ollama")
+
 
 ollama_service = OllamaService()
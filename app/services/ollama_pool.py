@@ -0,0 +1,216 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import log_error, log_info
+
+# Smoothing factor for the per-backend latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Share of traffic a backend gets right after it is let back in
+SLOW_START_MIN_WEIGHT = 0.1
+
+
+class OllamaBackend:
+    """
+    A single Ollama node together with its routing and health state.
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ewma: Optional[float] = None
+        self.healthy = True
+        self.ejected_at: Optional[float] = None
+        self.readmitted_at: Optional[float] = None
+        self.loaded_models: Set[str] = set()
+
+    def weight(self, slow_start: float) -> float:
+        """
+        Routing weight in (0, 1]. A re-admitted backend ramps up linearly over
+        `slow_start` seconds instead of receiving its full share at once.
+        """
+        if self.readmitted_at is None or slow_start <= 0:
+            return 1.0
+        ramp = (time.monotonic() - self.readmitted_at) / slow_start
+        if ramp >= 1:
+            self.readmitted_at = None
+            return 1.0
+        return max(SLOW_START_MIN_WEIGHT, ramp)
+
+    def load(self, slow_start: float) -> float:
+        """Outstanding requests including the next one, scaled by weight."""
+        return (self.in_flight + 1) / self.weight(slow_start)
+
+    def record_success(self, latency: float, model: Optional[str] = None) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+        if model:
+            # Ollama keeps a model resident after serving it
+            self.loaded_models.add(model)
+
+    def record_failure(self, eject_after: int) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= eject_after:
+            self.healthy = False
+            self.ejected_at = time.monotonic()
+            self.readmitted_at = None
+            log_info("Ollama backend ejected", backend=self.url)
+
+    def readmit(self) -> None:
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_at = None
+        self.readmitted_at = time.monotonic()
+        log_info("Ollama backend readmitted", backend=self.url)
+
+    def stats(self, slow_start: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "weight": round(self.weight(slow_start), 3),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_ewma_ms": (
+                round(self.latency_ewma * 1000, 1) if self.latency_ewma else None
+            ),
+            "loaded_models": sorted(self.loaded_models),
+        }
+
+
+class BackendPool:
+    """
+    Routes Ollama calls across several nodes.
+
+    Each call goes to the healthy backend with the fewest outstanding
+    requests, preferring one that already has the model loaded unless it is
+    busier than the best alternative by more than `residency_slack`.
+    Backends that fail `eject_after` times in a row are ejected; active
+    health checks against /api/ps let them back in with a slow-start ramp
+    and refresh which models each node has resident.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        eject_after: int = settings.OLLAMA_EJECT_AFTER_FAILURES,
+        slow_start: float = settings.OLLAMA_SLOW_START_SECONDS,
+        residency_slack: int = settings.OLLAMA_RESIDENCY_SLACK,
+        health_check_interval: float = settings.OLLAMA_HEALTH_CHECK_INTERVAL,
+        health_check_timeout: float = settings.OLLAMA_HEALTH_CHECK_TIMEOUT,
+    ):
+        self.backends = [OllamaBackend(url.strip()) for url in urls if url.strip()]
+        if not self.backends:
+            raise ValueError("At least one Ollama backend URL is required")
+        self.eject_after = eject_after
+        self.slow_start = slow_start
+        self.residency_slack = residency_slack
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._health_task: Optional[asyncio.Task] = None
+
+    def choose(
+        self, model: Optional[str] = None, exclude: Iterable[OllamaBackend] = ()
+    ) -> OllamaBackend:
+        """Pick the backend for the next call to `model`."""
+        candidates = [b for b in self.backends if b not in exclude] or self.backends
+        # Fail open: with every backend ejected, keep trying rather than refusing
+        healthy = [b for b in candidates if b.healthy] or candidates
+
+        best = min(healthy, key=lambda b: b.load(self.slow_start))
+        if model is None:
+            return best
+        resident = [b for b in healthy if model in b.loaded_models]
+        if not resident:
+            return best
+        best_resident = min(resident, key=lambda b: b.load(self.slow_start))
+        if best_resident.load(self.slow_start) <= best.load(self.slow_start) + (
+            self.residency_slack
+        ):
+            return best_resident
+        return best
+
+    @asynccontextmanager
+    async def lease(
+        self, model: Optional[str] = None, exclude: Iterable[OllamaBackend] = ()
+    ):
+        """
+        Reserve a backend for one call and record the call's outcome.
+
+        Connection errors and 5xx responses count against the backend's
+        health; 4xx responses are the caller's fault and do not.
+        """
+        backend = self.choose(model, exclude)
+        backend.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield backend
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                backend.record_failure(self.eject_after)
+            raise
+        except httpx.RequestError:
+            backend.record_failure(self.eject_after)
+            raise
+        else:
+            backend.record_success(time.monotonic() - started, model)
+        finally:
+            backend.in_flight -= 1
+
+    async def check_backend(self, client: httpx.AsyncClient, backend: OllamaBackend):
+        """Probe one backend and refresh its health and resident models."""
+        try:
+            response = await client.get(
+                f"{backend.url}/api/ps", timeout=self.health_check_timeout
+            )
+            response.raise_for_status()
+            models = response.json().get("models", [])
+        except Exception as e:
+            log_error(e, operation="ollama_health_check", backend=backend.url)
+            backend.record_failure(self.eject_after)
+            return
+        backend.loaded_models = {model["name"] for model in models}
+        backend.consecutive_failures = 0
+        if not backend.healthy:
+            backend.readmit()
+
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        """Probe every backend concurrently."""
+        await asyncio.gather(*(self.check_backend(client, b) for b in self.backends))
+
+    async def _run_health_checks(self, client: httpx.AsyncClient) -> None:
+        while True:
+            await self.check_health(client)
+            await asyncio.sleep(self.health_check_interval)
+
+    def start_health_checks(self, client: httpx.AsyncClient) -> None:
+        """Start the periodic health check task on the running loop."""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._run_health_checks(client))
+
+    async def stop_health_checks(self) -> None:
+        if self._health_task is not None and not self._health_task.done():
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        self._health_task = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-backend routing, health and latency statistics."""
+        return [backend.stats(self.slow_start) for backend in self.backends]
@@ -0,0 +1,188 @@
+"""
+Serialise streamed results as JSONL, CSV or Parquet.
+
+Writers turn the batches of rows from crud.stream_results into chunks of
+bytes as they arrive, so an export is never held in memory. Every record
+carries a `cursor`: passing the cursor of the last record received resumes
+the export after it.
+"""
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+from sqlalchemy.engine import Row
+
+from app.utils.pagination import encode_cursor
+
+Record = Dict[str, Any]
+
+FIELDS = (
+    "id",
+    "model",
+    "status",
+    "created_at",
+    "completed_at",
+    "user_id",
+    "options",
+    "prompt",
+    "response",
+    "cursor",
+)
+
+
+def export_record(row: Row) -> Record:
+    record = dict(row._mapping)
+    record["cursor"] = encode_cursor(row.created_at, row.id)
+    return record
+
+
+def _text(value: Any) -> Any:
+    # Flat formats get strings for everything but numbers and NULLs
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class JsonlWriter:
+    media_type = "application/x-ndjson"
+    extension = "jsonl"
+
+    def write(self, records: List[Record]) -> bytes:
+        return "".join(json.dumps(r, default=str) + "\n" for r in records).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvWriter:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=FIELDS)
+        self._writer.writeheader()
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def write(self, records: List[Record]) -> bytes:
+        self._writer.writerows({k: _text(v) for k, v in r.items()} for r in records)
+        return self._drain()
+
+    def close(self) -> bytes:
+        # The header alone if there were no rows
+        return self._drain()
+
+
+class _ByteSink(io.RawIOBase):
+    """
+    Write-only file collecting what pyarrow writes until drained. It reports
+    the total bytes written as its position, which the Parquet footer's
+    offsets are computed from.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class ParquetWriter:
+    """
+    Write one row group per batch. A Parquet file is only readable once its
+    footer is written at the end, so an interrupted download is resumed by
+    starting a new file from the last cursor seen in the complete row groups.
+    """
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("id", pa.string()),
+                ("model", pa.string()),
+                ("status", pa.string()),
+                ("created_at", pa.timestamp("us", tz="UTC")),
+                ("completed_at", pa.timestamp("us", tz="UTC")),
+                ("user_id", pa.int64()),
+                ("options", pa.string()),
+                ("prompt", pa.string()),
+                ("response", pa.string()),
+                ("cursor", pa.string()),
+            ]
+        )
+        self._sink = _ByteSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema)
+
+    def write(self, records: List[Record]) -> bytes:
+        rows = [
+            {
+                k: v if k in ("created_at", "completed_at") else _text(v)
+                for k, v in r.items()
+            }
+            for r in records
+        ]
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+WRITERS = {
+    writer.extension: writer for writer in (JsonlWriter, CsvWriter, ParquetWriter)
+}
+
+
+async def export_chunks(
+    batches: AsyncIterator[List[Row]], writer: Any
+) -> AsyncIterator[bytes]:
+    """
+    Serialise batches of result rows with `writer`, one chunk per batch.
+
+    Args:
+        batches (AsyncIterator[List[Row]]): Batches from crud.stream_results.
+        writer: A JsonlWriter, CsvWriter or ParquetWriter.
+
+    Yields:
+        bytes: The export, ending with the writer's trailer (if any).
+    """
+    async for rows in batches:
+        chunk = writer.write([export_record(row) for row in rows])
+        if chunk:
+            yield chunk
+    chunk = writer.close()
+    if chunk:
+        yield chunk
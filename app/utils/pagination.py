@@ -0,0 +1,35 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, result_id: uuid.UUID) -> str:
+    """
+    Encode the position after a row as an opaque page cursor.
+
+    Args:
+        created_at (datetime): Creation time of the last row on the page.
+        result_id (UUID): ID of that row, to break ties on created_at.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), str(result_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor made by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, result_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(result_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -1,6 +1,12 @@
+import re
+import unicodedata
+
 import httpx
 from bs4 import BeautifulSoup
 
+_HORIZONTAL_WHITESPACE = re.compile(r"[^\S\n]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
 
 def extract_text_from_url(url: str) -> str:
     response = httpx.get(url)
@@ -8,6 +14,25 @@ def extract_text_from_url(url: str) -> str:
     return " ".join(p.get_text() for p in soup.find_all("p"))
 
 
+def _normalize_line(line: str) -> str:
+    body = line.lstrip()
+    indent = line[: len(line) - len(body)]
+    return indent + _HORIZONTAL_WHITESPACE.sub(" ", body).rstrip() if body else ""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonicalise a prompt so that trivially different copies share a cache
+    entry: Unicode NFC, unified line endings, runs of spaces and tabs
+    collapsed, trailing spaces and more than one blank line removed.
+    Leading indentation is kept, since it is meaningful in code.
+    """
+    prompt = unicodedata.normalize("NFC", prompt)
+    prompt = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    prompt = "\n".join(_normalize_line(line) for line in prompt.split("\n"))
+    return _BLANK_LINES.sub("\n\n", prompt).strip()
+
+
 # Add more preprocessor functions here
 PREPROCESSORS = {
     "extract_text_from_url": extract_text_from_url,
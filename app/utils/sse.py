@@ -0,0 +1,16 @@
+import json
+from typing import Any
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a single Server-Sent Event.
+
+    Args:
+        event (str): The event name, e.g. "token" or "done".
+        data (Any): A JSON-serialisable payload for the event.
+
+    Returns:
+        str: The encoded event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
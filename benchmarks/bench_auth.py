@@ -0,0 +1,65 @@
+"""
+Benchmark the per-request cost of authentication.
+
+Times the auth dependency with warm token and user caches against
+verifying the JWT on every request (the user lookup is stubbed out, so the
+uncached figure leaves out the database round trip it would also cost).
+
+Usage:
+    python -m benchmarks.bench_auth --requests 100000 --users 100
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core import auth
+from app.core.security import create_access_token
+from app.schemas.user import User
+
+
+async def per_request_us(tokens, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await auth.get_current_user(tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def run(requests: int, users: int) -> None:
+    accounts = {
+        f"user{i}": User(id=i, username=f"user{i}", is_active=True)
+        for i in range(users)
+    }
+
+    async def load_user(username):
+        return accounts[username]
+
+    auth._load_user = load_user
+    tokens = [
+        create_access_token({"sub": name, "uid": u.id}) for name, u in accounts.items()
+    ]
+
+    auth.token_cache = auth.TokenCache(max_entries=0)
+    auth.user_cache = auth.UserCache(ttl=0)
+    uncached = await per_request_us(tokens, requests)
+
+    auth.token_cache = auth.TokenCache()
+    auth.user_cache = auth.UserCache()
+    await per_request_us(tokens, len(tokens))  # Warm up
+    cached = await per_request_us(tokens, requests)
+
+    print(f"{requests} requests over {users} users")
+    print(f"verify every token: {uncached:8.2f}us per request")
+    print(f"cached:             {cached:8.2f}us per request ({uncached / cached:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Load test: GET /v1/result latency during a burst of logins.
+
+Serves the API on a background thread with Postgres replaced by in-memory
+stand-ins, polls a result while a burst of concurrent /token logins runs,
+and reports the polling latency before and during the burst. Run once with
+bcrypt off the event loop (the default) and once with it inline, as
+authenticate_user used to call it.
+
+Usage:
+    python -m benchmarks.bench_login_burst --logins 50 --rounds 12
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+import uvicorn
+
+from app import main
+from app.core.login_limiter import login_limiter
+from app.core.passwords import PasswordHasher
+from app.db import crud
+from app.db.base import get_db
+
+PORT = 8765
+RESULT_ID = uuid.uuid4()
+PASSWORD = "correct horse battery staple"
+
+
+class FakeSession:
+    async def close(self):
+        pass
+
+    async def commit(self):
+        pass
+
+
+def install_fakes(rounds: int) -> PasswordHasher:
+    hasher = PasswordHasher(rounds=rounds, concurrency=2)
+    user = SimpleNamespace(
+        id=1,
+        username="alice",
+        is_active=True,
+        hashed_password=hasher.context.hash(PASSWORD),
+    )
+    row = SimpleNamespace(
+        id=RESULT_ID,
+        model="llama3:latest",
+        prompt="prompt",
+        options=None,
+        response="response",
+        status="completed",
+        created_at=datetime.now(timezone.utc),
+        completed_at=datetime.now(timezone.utc),
+    )
+
+    async def get_user(db, username):
+        return user
+
+    async def get_llm_result(db, result_id, load_text=False, fresh=False):
+        return row
+
+    crud.get_user = get_user
+    crud.get_llm_result = get_llm_result
+    crud.password_hasher = hasher
+    login_limiter.limits = {"user": 0, "ip": 0}
+    main.app.dependency_overrides[get_db] = lambda: FakeSession()
+    return hasher
+
+
+def start_server() -> uvicorn.Server:
+    config = uvicorn.Config(
+        main.app, host="127.0.0.1", port=PORT, log_level="warning", lifespan="off"
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def poll(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(f"/v1/result/{RESULT_ID}")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def measure(client: httpx.AsyncClient, logins: int, baseline: float):
+    before, during = [], []
+    stop = asyncio.Event()
+    poller = asyncio.create_task(poll(client, stop, before))
+    await asyncio.sleep(baseline)
+    stop.set()
+    await poller
+
+    stop = asyncio.Event()
+    poller = asyncio.create_task(poll(client, stop, during))
+    started = time.perf_counter()
+    responses = await asyncio.gather(
+        *(
+            client.post("/token", data={"username": "alice", "password": PASSWORD})
+            for _ in range(logins)
+        )
+    )
+    burst = time.perf_counter() - started
+    stop.set()
+    await poller
+    assert all(r.status_code == 200 for r in responses)
+    return before, during, burst
+
+
+def describe(latencies: list) -> str:
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return (
+        f"p50 {quantiles[49]:7.1f}ms  p95 {quantiles[94]:7.1f}ms  "
+        f"max {max(latencies):7.1f}ms"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    hasher = install_fakes(args.rounds)
+    off_loop = hasher._run
+
+    async def inline(func, *func_args):
+        return func(*func_args)
+
+    start_server()
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{PORT}", timeout=600
+    ) as client:
+        for name, runner in (("off-loop bcrypt", off_loop), ("inline bcrypt", inline)):
+            hasher._run = runner
+            before, during, burst = await measure(client, args.logins, args.baseline)
+            print(f"{name}: {args.logins} logins in {burst:.2f}s")
+            print(f"  /v1/result before burst: {describe(before)}")
+            print(f"  /v1/result during burst: {describe(during)}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--baseline", type=float, default=1.0, help="Seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,138 @@
+"""
+Benchmark the Ollama client against a local stub Ollama server.
+
+Compares the legacy client (a blocking httpx.Client opened per call inside an
+async function) with the pooled OllamaService, reporting requests/sec and the
+event-loop lag observed while the requests are in flight.
+
+Usage:
+    python -m benchmarks.bench_ollama_client --requests 200 --concurrency 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.services.ollama import OllamaService
+from tests.stub_ollama import create_stub_ollama
+
+
+def start_stub_server(port: int, latency: float) -> uvicorn.Server:
+    """
+    Serve the stub Ollama app on a background thread and wait until it is up.
+    """
+    config = uvicorn.Config(
+        create_stub_ollama(latency=latency),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def legacy_generate_text(base_url: str, model: str, prompt: str):
+    """
+    The pre-pooling implementation: a new blocking client for every call.
+    """
+    with httpx.Client() as client:
+        response = client.post(
+            f"{base_url}/api/generate",
+            json={"model": model, "prompt": prompt, "stream": False},
+            timeout=600,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+async def monitor_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    """
+    Record how late the event loop wakes up from a fixed-interval sleep.
+    """
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def run_load(generate, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    lag_samples = []
+    stop = asyncio.Event()
+
+    async def one(i: int):
+        async with semaphore:
+            await generate("llama3:latest", f"prompt {i}")
+
+    monitor = asyncio.create_task(monitor_loop_lag(stop, lag_samples))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    lag_samples = sorted(lag_samples) or [0.0]
+    p99_index = min(len(lag_samples) - 1, int(len(lag_samples) * 0.99))
+    return {
+        "rps": total / elapsed,
+        "lag_p50_ms": statistics.median(lag_samples) * 1000,
+        "lag_p99_ms": lag_samples[p99_index] * 1000,
+        "lag_max_ms": lag_samples[-1] * 1000,
+    }
+
+
+async def main_async(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    service = OllamaService(base_url=base_url)
+
+    async def legacy(model, prompt):
+        return await legacy_generate_text(base_url, model, prompt)
+
+    results = {
+        "legacy (httpx.Client per call)": await run_load(
+            legacy, args.requests, args.concurrency
+        ),
+        "pooled (shared AsyncClient)": await run_load(
+            service.generate_text, args.requests, args.concurrency
+        ),
+    }
+    await service.shutdown()
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"stub latency {args.latency * 1000:.0f} ms"
+    )
+    print(f"{'client':<32}{'req/s':>10}{'lag p50':>12}{'lag p99':>12}{'lag max':>12}")
+    for name, r in results.items():
+        print(
+            f"{name:<32}{r['rps']:>10.1f}{r['lag_p50_ms']:>10.1f}ms"
+            f"{r['lag_p99_ms']:>10.1f}ms{r['lag_max_ms']:>10.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=11499)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.latency)
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark compressed storage of prompts and responses.
+
+Encodes and decodes a corpus through CompressedText at several zstd levels
+and reports the stored size relative to plain UTF-8 and the per-value
+encode and decode latency. The corpus is a JSONL file of results (e.g. a
+run_batch output, using its prompt and response fields) or, by default,
+synthetic chat-style text. Requires zstandard.
+
+Usage:
+    python -m benchmarks.bench_result_storage --input results.jsonl --min-bytes 512
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from app.db.types import CompressedText
+
+WORDS = (
+    "the model response answer question context example function value data "
+    "request result cache token prompt system user python code error return "
+    "because however therefore which would could should first second finally"
+).split()
+
+
+def synthetic_corpus(count: int, seed: int = 0) -> List[str]:
+    """Responses of 50 to 800 words, with the repetition typical of LLM output."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(5, 80)):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+            sentences.append(sentence.capitalize() + ".")
+        corpus.append(" ".join(sentences))
+    return corpus
+
+
+def load_corpus(path: str) -> List[str]:
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            corpus.extend(
+                record[field]
+                for field in ("prompt", "response")
+                if isinstance(record.get(field), str)
+            )
+    return corpus
+
+
+def measure(corpus: List[str], column: CompressedText):
+    started = time.perf_counter()
+    stored = [column.process_bind_param(value, None) for value in corpus]
+    encoded = time.perf_counter()
+    for value in stored:
+        column.process_result_value(value, None)
+    decoded = time.perf_counter()
+    return {
+        "bytes": sum(len(value) for value in stored),
+        "encode_us": (encoded - started) / len(corpus) * 1e6,
+        "decode_us": (decoded - encoded) / len(corpus) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--input", help="JSONL file with prompt/response fields")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--min-bytes", type=int, default=512)
+    parser.add_argument("--levels", default="1,3,9")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.input) if args.input else synthetic_corpus(args.count)
+    plain = measure(corpus, CompressedText(min_bytes=0))
+    print(
+        f"{len(corpus)} values, {plain['bytes'] / len(corpus):.0f} bytes on average, "
+        f"compressing values of at least {args.min_bytes} bytes"
+    )
+    print(f"{'storage':<16}{'bytes':>12}{'ratio':>8}{'encode':>12}{'decode':>12}")
+    rows = [("plain", plain)] + [
+        (
+            f"zstd level {level}",
+            measure(corpus, CompressedText(min_bytes=args.min_bytes, level=level)),
+        )
+        for level in map(int, args.levels.split(","))
+    ]
+    for name, r in rows:
+        print(
+            f"{name:<16}{r['bytes']:>12}{r['bytes'] / plain['bytes']:>8.2f}"
+            f"{r['encode_us']:>10.1f}us{r['decode_us']:>10.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
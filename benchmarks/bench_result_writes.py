@@ -0,0 +1,129 @@
+"""
+Benchmark the result write path against a real Postgres database.
+
+Compares the legacy lookup-then-insert path (a SELECT for a cached result
+followed by an INSERT) with the create-or-get path, which claims the prompt
+hash with INSERT ... ON CONFLICT ... RETURNING, with many concurrent callers
+sending overlapping prompts. Reports calls/sec, latency percentiles and how
+many calls failed on an already claimed prompt hash (which the legacy path
+hits whenever two callers race on the same prompt).
+
+Needs a migrated database; rows are written under a throwaway model name and
+deleted afterwards.
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_result_writes \\
+        --calls 2000 --concurrency 50 --distinct 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import crud, models
+
+
+async def legacy_write(db: AsyncSession, model: str, prompt: str):
+    """The pre-upsert implementation: look up, then insert on a miss."""
+    existing = await crud.get_cached_result(db, model, prompt)
+    if existing is not None:
+        return existing
+    return await crud.create_llm_result(db, model, prompt)
+
+
+async def upsert_write(db: AsyncSession, model: str, prompt: str):
+    row, _ = await crud.create_or_get_llm_result(db, model, prompt)
+    return row
+
+
+async def run_load(sessions, write, model: str, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    conflicts = 0
+
+    async def one(i: int):
+        nonlocal conflicts
+        async with semaphore, sessions() as db:
+            started = time.perf_counter()
+            try:
+                await write(db, model, f"prompt {i % args.distinct}")
+            except IntegrityError:
+                conflicts += 1
+                await db.rollback()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "cps": args.calls / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "conflicts": conflicts,
+    }
+
+
+async def main_async(args):
+    engine = create_async_engine(
+        settings.DATABASE_URL, pool_size=args.concurrency, max_overflow=0
+    )
+    sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    results = {}
+    try:
+        for name, write in (
+            ("lookup then insert", legacy_write),
+            ("insert on conflict", upsert_write),
+        ):
+            model = f"bench-{uuid.uuid4().hex[:8]}"
+            try:
+                results[name] = await run_load(sessions, write, model, args)
+            finally:
+                async with sessions() as db:
+                    bench_ids = select(models.LLMResult.id).where(
+                        models.LLMResult.model == model
+                    )
+                    await db.execute(
+                        delete(models.LLMResultKey).where(
+                            models.LLMResultKey.result_id.in_(bench_ids)
+                        )
+                    )
+                    await db.execute(
+                        delete(models.LLMResult).where(models.LLMResult.model == model)
+                    )
+                    await db.commit()
+    finally:
+        await engine.dispose()
+
+    print(
+        f"{args.calls} calls, concurrency {args.concurrency}, "
+        f"{args.distinct} distinct prompts"
+    )
+    print(f"{'write path':<24}{'calls/s':>10}{'p50':>12}{'p99':>12}{'conflicts':>11}")
+    for name, r in results.items():
+        print(
+            f"{name:<24}{r['cps']:>10.1f}{r['p50_ms']:>10.1f}ms"
+            f"{r['p99_ms']:>10.1f}ms{r['conflicts']:>11}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
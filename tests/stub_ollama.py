@@ -0,0 +1,170 @@
+"""
+A minimal stand-in for the Ollama HTTP API, used by tests and benchmarks.
+
+It can be mounted in-process through httpx.ASGITransport, or served on a real
+port for benchmarks:
+
+    python -m tests.stub_ollama --port 11434 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from typing import Iterable
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_MODELS = ("llama3:latest", "mod_llama3:latest", "phi3:latest")
+DEFAULT_RESPONSE = "This is a canned response from the stub Ollama server."
+EMBEDDING_DIM = 64
+
+
+router = APIRouter()
+
+
+def create_stub_ollama(
+    models: Iterable[str] = DEFAULT_MODELS,
+    latency: float = 0.0,
+    response_text: str = DEFAULT_RESPONSE,
+    token_delay: float = 0.0,
+    max_loaded: int = 1,
+) -> FastAPI:
+    """
+    Build a stub Ollama application.
+
+    Args:
+        models: Model names reported by /api/tags.
+        latency: Seconds each generate/chat call takes to "run" the model.
+        response_text: Text returned by every generation.
+        token_delay: Seconds between streamed tokens when "stream" is true.
+        max_loaded: How many models stay resident before the oldest is evicted.
+    """
+    app = FastAPI()
+    app.state.models = list(models)
+    app.state.latency = latency
+    app.state.response_text = response_text
+    app.state.token_delay = token_delay
+    # When set, generate/chat calls fail with this HTTP status code
+    app.state.fail_status = None
+    app.state.max_loaded = max_loaded
+    app.state.loaded = []
+    # Number of times a model had to be loaded into memory
+    app.state.loads = 0
+    app.state.requests = {"tags": 0, "ps": 0, "generate": 0, "chat": 0, "embed": 0}
+    # Options sent with the most recent generate call
+    app.state.last_options = None
+    app.include_router(router)
+    return app
+
+
+def load_model(state, model: str):
+    """Mark a model as resident, evicting the least recently used one."""
+    if model in state.loaded:
+        state.loaded.remove(model)
+    else:
+        state.loads += 1
+    state.loaded.append(model)
+    del state.loaded[: -state.max_loaded]
+
+
+@router.get("/api/tags")
+async def tags(request: Request):
+    state = request.app.state
+    state.requests["tags"] += 1
+    return {"models": [{"name": name} for name in state.models]}
+
+
+@router.get("/api/ps")
+async def ps(request: Request):
+    state = request.app.state
+    state.requests["ps"] += 1
+    return {"models": [{"name": name} for name in state.loaded]}
+
+
+@router.post("/api/generate")
+async def generate(request: Request):
+    state = request.app.state
+    state.requests["generate"] += 1
+    if state.fail_status:
+        return JSONResponse({"error": "stub failure"}, state.fail_status)
+    body = await request.json()
+    state.last_options = body.get("options")
+    load_model(state, body["model"])
+    started = time.perf_counter()
+    await asyncio.sleep(state.latency)
+    if body.get("stream", True):
+        return StreamingResponse(
+            stream_tokens(state, body["model"]), media_type="application/x-ndjson"
+        )
+    return {
+        "model": body["model"],
+        "response": state.response_text,
+        "done": True,
+        "total_duration": int((time.perf_counter() - started) * 1e9),
+        "prompt_eval_count": len(body.get("prompt", "").split()),
+        "eval_count": len(state.response_text.split()),
+    }
+
+
+async def stream_tokens(state, model: str):
+    words = state.response_text.split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(state.token_delay)
+        token = word if i == 0 else " " + word
+        yield json.dumps({"model": model, "response": token, "done": False}) + "\n"
+    yield json.dumps(
+        {"model": model, "response": "", "done": True, "eval_count": len(words)}
+    ) + "\n"
+
+
+@router.post("/api/chat")
+async def chat(request: Request):
+    state = request.app.state
+    state.requests["chat"] += 1
+    if state.fail_status:
+        return JSONResponse({"error": "stub failure"}, state.fail_status)
+    body = await request.json()
+    load_model(state, body["model"])
+    await asyncio.sleep(state.latency)
+    return {
+        "model": body["model"],
+        "message": {"role": "assistant", "content": state.response_text},
+        "done": True,
+    }
+
+
+@router.post("/api/embeddings")
+async def embeddings(request: Request):
+    """
+    Bag-of-words embedding: prompts sharing most words get similar vectors.
+    """
+    state = request.app.state
+    state.requests["embed"] += 1
+    body = await request.json()
+    vector = [0.0] * EMBEDDING_DIM
+    for word in body["prompt"].lower().split():
+        vector[zlib.crc32(word.encode()) % EMBEDDING_DIM] += 1.0
+    return {"embedding": vector}
+
+
+def main():
+    """
+    Serve the stub on a local port.
+    """
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_stub_ollama(latency=args.latency)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core import admission, rate_limit
+from app.core.admission import AdmissionController, AdmissionPolicy
+from app.core.auth import get_current_user
+from app.core.scheduling import QueueStats
+from app.db.base import get_db
+from app.schemas.user import User
+from app.services.ollama import OllamaService
+from tests.stub_ollama import create_stub_ollama
+
+QUEUE = "llm_tasks.llama3"
+
+
+class SimulatedQueue:
+    """
+    A model queue drained by workers calling a stub Ollama, keeping the
+    statistics the scheduler's ledger keeps.
+    """
+
+    def __init__(self, service: OllamaService, alpha: float = 0.2):
+        self.service = service
+        self.alpha = alpha
+        self.tasks = asyncio.Queue()
+        self.interval = None
+        self.last_start = None
+        self.busy = False
+        self.max_depth = 0
+
+    async def queue_stats(self, queue):
+        since_start = time.monotonic() - self.last_start if self.last_start else None
+        depth = self.tasks.qsize()
+        return QueueStats(depth, depth, self.interval, since_start)
+
+    def submit(self, prompt):
+        self.tasks.put_nowait(prompt)
+        self.max_depth = max(self.max_depth, self.tasks.qsize())
+
+    async def worker(self):
+        while True:
+            prompt = await self.tasks.get()
+            now = time.monotonic()
+            if self.busy:
+                sample = now - self.last_start
+                if self.interval is not None:
+                    sample = self.alpha * sample + (1 - self.alpha) * self.interval
+                self.interval = sample
+            self.busy = self.tasks.qsize() > 0
+            self.last_start = now
+            await self.service.generate_text("llama3:latest", prompt)
+            self.tasks.task_done()
+
+
+def test_queue_states():
+    policy = AdmissionPolicy(max_wait=10, batch_share=0.5)
+    assert policy.state(QUEUE, None) == "unknown"
+    assert policy.state(QUEUE, QueueStats(3, 0, 1.0, 0.1)) == "open"
+    # Batch work is shed first; interactive requests skip the batch backlog
+    shedding = QueueStats(20, 2, 1.0, 0.1)
+    assert policy.state(QUEUE, shedding) == "shedding"
+    assert policy.decide(QUEUE, shedding, "interactive").admitted
+    refused = policy.decide(QUEUE, shedding, "batch")
+    assert not refused.admitted and refused.retry_after == 16
+    assert policy.state(QUEUE, QueueStats(20, 12, 1.0, 0.1)) == "closed"
+    # No task started for 30s while tasks wait: Ollama has stalled
+    assert policy.state(QUEUE, QueueStats(1, 1, 1.0, 30)) == "closed"
+
+
+def test_a_leaked_task_does_not_keep_the_queue_closed():
+    policy = AdmissionPolicy(max_wait=10, batch_share=0.5, stall_intervals=60)
+    # One task left in the ledger and nothing started for ten minutes: the
+    # task was lost, not a worker stuck on it
+    leaked = QueueStats(1, 1, 1.0, 600)
+    assert policy.state(QUEUE, leaked) == "open"
+    assert policy.decide(QUEUE, leaked, "interactive").projected_wait == 2
+    # The depth still bounds the wait
+    assert policy.state(QUEUE, QueueStats(20, 12, 1.0, 600)) == "closed"
+
+
+def test_per_queue_max_wait():
+    policy = AdmissionPolicy(max_wait=10, queue_max_waits={"llama3": 2})
+    assert policy.max_wait(QUEUE) == 2
+    assert policy.max_wait("llm_tasks.phi3") == 10
+
+
+def test_tasks_admitted_together_wait_for_the_last():
+    policy = AdmissionPolicy(max_wait=10, batch_share=0.5)
+    idle = QueueStats(0, 0, 1.0, 0.1)
+    assert policy.decide(QUEUE, idle, "batch", count=5).admitted
+    refused = policy.decide(QUEUE, idle, "batch", count=8)
+    assert not refused.admitted and refused.retry_after == 3
+
+
+def test_refusals_carry_retry_after(monkeypatch):
+    async def overloaded(queue):
+        return QueueStats(100, 100, 1.0, 0.5)
+
+    controller = AdmissionController(
+        AdmissionPolicy(max_wait=60, batch_share=0.5), queue_stats=overloaded
+    )
+    monkeypatch.setattr(admission, "admission_controller", controller)
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(admission.enforce_admission("llama3:latest", "interactive"))
+    assert refused.value.status_code == 503
+    assert refused.value.headers == {"Retry-After": "41"}
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(admission.enforce_admission("llama3:latest", "batch"))
+    assert refused.value.status_code == 429
+    assert controller.stats() == {"admitted": 0, "shed": 1, "rejected": 1}
+
+
+def test_backlog_stays_bounded_when_ollama_falls_behind():
+    # Two workers at 50ms per generation start a task every ~25ms, so a
+    # 0.5s maximum wait admits a backlog of about 20 tasks
+    stub = create_stub_ollama(models=["llama3:latest"], latency=0.05)
+    service = OllamaService(
+        base_url="http://ollama.test", transport=httpx.ASGITransport(app=stub)
+    )
+    queue = SimulatedQueue(service)
+    controller = AdmissionController(
+        AdmissionPolicy(max_wait=0.5), queue_stats=queue.queue_stats
+    )
+
+    async def run():
+        workers = [asyncio.create_task(queue.worker()) for _ in range(2)]
+        refusals = []
+        # Offer 200 generations per second, five times what Ollama serves
+        for i in range(200):
+            decision = await controller.check("llama3:latest", "interactive")
+            if decision.admitted:
+                queue.submit(f"prompt {i}")
+            else:
+                refusals.append(decision)
+            await asyncio.sleep(0.005)
+        await queue.tasks.join()
+        state = (await controller.queue_states())[QUEUE]["state"]
+        for worker in workers:
+            worker.cancel()
+        await service.shutdown()
+        return refusals, state
+
+    refusals, state = asyncio.run(run())
+    assert len(refusals) > 50
+    assert all(0 < refusal.retry_after < 5 for refusal in refusals)
+    assert queue.max_depth <= 30
+    assert stub.state.requests["generate"] == 200 - len(refusals)
+    # Once the backlog has drained the queue admits work again
+    assert state == "open"
+
+
+def _result(prompt, status):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        model="llama3:latest",
+        prompt=prompt,
+        options=None,
+        response="done" if status == "completed" else None,
+        status=status,
+        created_at=datetime.utcnow(),
+        completed_at=None,
+    )
+
+
+@pytest.fixture
+def saturated_batches(monkeypatch):
+    """
+    The batch endpoint with a saturated queue; returns the rows the next
+    create_batch call yields as (results, created), and the failed ones.
+    """
+    batch = {"results": [], "created": []}
+    failed = []
+
+    async def overloaded(queue):
+        return QueueStats(100, 100, 1.0, 0.5)
+
+    async def contains(model):
+        return True
+
+    async def create_batch(db, model, prompts, use_cache, options, user_id):
+        db_batch = SimpleNamespace(id=uuid.uuid4(), created_at=datetime.utcnow())
+        return db_batch, batch["results"], batch["created"]
+
+    async def update_llm_results(db, updates):
+        failed.extend(result_id for result_id, *_ in updates)
+
+    async def release(prompt_hash, result_id):
+        pass
+
+    controller = AdmissionController(
+        AdmissionPolicy(max_wait=60), queue_stats=overloaded
+    )
+    monkeypatch.setattr(admission, "admission_controller", controller)
+    monkeypatch.setattr(rate_limit.rate_limiter, "enabled", False)
+    monkeypatch.setattr(main.model_registry, "contains", contains)
+    monkeypatch.setattr(main, "create_batch", create_batch)
+    monkeypatch.setattr(main.crud, "update_llm_results", update_llm_results)
+    monkeypatch.setattr(main.request_coalescer, "release", release)
+    main.app.dependency_overrides[get_db] = lambda: None
+    main.app.dependency_overrides[get_current_user] = lambda: User(
+        id=7, username="alice", is_active=True
+    )
+    yield batch, failed
+    main.app.dependency_overrides.clear()
+
+
+def test_cached_batch_is_accepted_while_the_queue_is_saturated(saturated_batches):
+    batch, failed = saturated_batches
+    batch["results"] = [_result("a", "completed"), _result("b", "running")]
+
+    response = TestClient(main.app).post(
+        "/v1/generate/llama3/batch", json={"prompts": ["a", "b"]}
+    )
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == [
+        "completed",
+        "running",
+    ]
+    assert admission.admission_controller.stats()["shed"] == 0
+
+
+def test_new_batch_work_is_shed_and_failed(saturated_batches):
+    batch, failed = saturated_batches
+    new = _result("c", "pending")
+    batch["results"] = [_result("a", "completed"), new]
+    batch["created"] = [new]
+
+    response = TestClient(main.app).post(
+        "/v1/generate/llama3/batch", json={"prompts": ["a", "c"]}
+    )
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    # The refused result gives up its prompt hash
+    assert failed == [new.id]
@@ -0,0 +1,38 @@
+from app.core.affinity import AffinityPolicy, queue_for_model, route_task
+
+
+def test_models_are_routed_to_their_queue():
+    assert queue_for_model("llama3:latest") == "llm_tasks.llama3"
+    assert queue_for_model("phi3:mini") == "llm_tasks.phi3"
+    assert queue_for_model("unknown:latest") == "llm_tasks.default"
+    route = route_task(
+        "app.core.tasks.generate_text", ["id", "phi3:latest", "hi"], {}, {}
+    )
+    assert route == {"queue": "llm_tasks.phi3"}
+
+
+def test_worker_drains_current_queue_before_switching():
+    policy = AffinityPolicy(max_consecutive=100, max_seconds=600)
+    depths = {"q.llama3": 10, "q.phi3": 3}
+    assert policy.next_queue(None, depths, 0, 0) == "q.llama3"
+    assert policy.next_queue("q.llama3", depths, 20, 30) == "q.llama3"
+    assert (
+        policy.next_queue("q.llama3", {"q.llama3": 0, "q.phi3": 3}, 30, 30) == "q.phi3"
+    )
+
+
+def test_fairness_bound_prevents_starvation():
+    policy = AffinityPolicy(max_consecutive=5, max_seconds=600)
+    depths = {"q.llama3": 1000, "q.phi3": 1, "q.mistral": 1}
+    policy.mark_served("q.phi3")
+    assert policy.next_queue("q.llama3", depths, 5, 1) == "q.mistral"
+    assert policy.next_queue("q.llama3", depths, 4, 601) == "q.mistral"
+    assert policy.next_queue("q.llama3", depths, 4, 1) == "q.llama3"
+
+
+def test_idle_worker_stays_put():
+    policy = AffinityPolicy()
+    assert (
+        policy.next_queue("q.llama3", {"q.llama3": 0, "q.phi3": 0}, 0, 0) == "q.llama3"
+    )
+    assert policy.next_queue(None, {"q.llama3": 0}, 0, 0) is None
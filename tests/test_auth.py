@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import auth
+from app.core.security import create_access_token
+from app.schemas.user import User
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    loads = []
+
+    async def load_user(username):
+        loads.append(username)
+        return users.get(username)
+
+    users = {"alice": User(id=1, username="alice", is_active=True)}
+    monkeypatch.setattr(auth, "token_cache", auth.TokenCache(max_entries=2))
+    monkeypatch.setattr(auth, "user_cache", auth.UserCache(ttl=60, max_entries=2))
+    monkeypatch.setattr(auth, "_load_user", load_user)
+    return users, loads
+
+
+def authenticate(token):
+    return asyncio.run(auth.get_current_user(token))
+
+
+def test_repeat_requests_skip_verification_and_the_database(caches, monkeypatch):
+    _, loads = caches
+    token = create_access_token({"sub": "alice", "uid": 1})
+
+    assert authenticate(token).id == 1
+    monkeypatch.setattr(auth, "verify_token", pytest.fail)
+    assert authenticate(token).id == 1
+
+    assert loads == ["alice"]
+    assert auth.token_cache.counters == {"hits": 1, "misses": 1}
+
+
+def test_expired_tokens_are_verified_again(caches, monkeypatch):
+    token = create_access_token({"sub": "alice"})
+    authenticate(token)
+    verified = []
+
+    def verify_token(token):
+        verified.append(token)
+        raise HTTPException(status_code=401, detail="Token has expired")
+
+    monkeypatch.setattr(auth, "verify_token", verify_token)
+    monkeypatch.setattr(auth.time, "time", lambda: 4e9)  # Year 2096
+
+    with pytest.raises(HTTPException):
+        authenticate(token)
+    assert verified == [token]
+
+
+def test_deactivated_users_are_refused_after_invalidation(caches):
+    users, loads = caches
+    token = create_access_token({"sub": "alice"})
+    authenticate(token)
+
+    users["alice"] = User(id=1, username="alice", is_active=False)
+    assert authenticate(token).is_active  # Still cached
+    auth.user_cache.handle_invalidation({"username": "alice"})
+
+    with pytest.raises(HTTPException) as e:
+        authenticate(token)
+    assert e.value.status_code == 401
+    assert loads == ["alice", "alice"]
+
+
+def test_unknown_users_and_bad_tokens_are_refused(caches):
+    with pytest.raises(HTTPException):
+        authenticate(create_access_token({"sub": "mallory"}))
+    with pytest.raises(HTTPException):
+        authenticate("not-a-token")
+    assert len(auth.token_cache._entries) == 1
+
+
+def test_only_listed_admins_pass_the_admin_dependency(monkeypatch):
+    alice = User(id=1, username="alice", is_active=True)
+    bob = User(id=2, username="bob", is_active=True)
+    monkeypatch.setattr(auth.settings, "ADMIN_USERNAMES", "")
+    with pytest.raises(HTTPException) as refused:
+        asyncio.run(auth.get_admin_user(alice))
+    assert refused.value.status_code == 403
+
+    monkeypatch.setattr(auth.settings, "ADMIN_USERNAMES", "ops, alice")
+    assert asyncio.run(auth.get_admin_user(alice)) is alice
+    with pytest.raises(HTTPException):
+        asyncio.run(auth.get_admin_user(bob))
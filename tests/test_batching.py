@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.core import batching
+from app.db.models import LLMResult
+
+MODEL = "llama3:latest"
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+class FakeResults:
+    """In-memory stand-in for the crud functions used by create_batch."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.inserts = []
+
+    async def get_results_by_hashes(self, db, prompt_hashes, statuses):
+        return [
+            row
+            for row in reversed(self.rows)
+            if row.prompt_hash in prompt_hashes and row.status in statuses
+        ]
+
+    async def create_llm_results(
+        self, db, model, prompts, options=None, cacheable=True, user_id=None
+    ):
+        self.inserts.append(list(prompts))
+        created = [_row(prompt, "pending") for prompt in prompts]
+        self.rows.extend(created)
+        return created
+
+    async def create_or_get_llm_results(
+        self, db, model, prompts, options=None, user_id=None
+    ):
+        return [
+            (row, True) for row in await self.create_llm_results(db, model, prompts)
+        ]
+
+    async def create_llm_batch(self, db, model, result_ids):
+        return SimpleNamespace(id=uuid.uuid4(), result_ids=result_ids)
+
+
+def _row(prompt, status):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        prompt=prompt,
+        prompt_hash=LLMResult.generate_prompt_hash(MODEL, prompt),
+        status=status,
+    )
+
+
+def test_batch_reuses_existing_results_and_inserts_misses_once(monkeypatch):
+    done, running = _row("a", "completed"), _row("b", "running")
+    results = FakeResults([_row("a", "pending"), done, running])
+    monkeypatch.setattr(batching, "crud", results)
+    db = FakeSession()
+
+    batch, rows, created = asyncio.run(
+        batching.create_batch(db, MODEL, ["a", "b", "c", "c", "d"])
+    )
+
+    assert results.inserts == [["c", "d"]]
+    assert rows[0] is done and rows[1] is running
+    assert rows[2] is rows[3]
+    assert [row.prompt for row in created] == ["c", "d"]
+    assert batch.result_ids == [row.id for row in rows]
+    assert db.commits == 1
+
+
+def test_batch_without_cache_creates_every_prompt(monkeypatch):
+    results = FakeResults([_row("a", "completed")])
+    monkeypatch.setattr(batching, "crud", results)
+
+    _, rows, created = asyncio.run(
+        batching.create_batch(FakeSession(), MODEL, ["a", "a"], use_cache=False)
+    )
+
+    assert results.inserts == [["a", "a"]]
+    assert rows == created and rows[0] is not rows[1]
@@ -0,0 +1,138 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.core import coalescing
+from app.core.coalescing import RequestCoalescer
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def eval(self, script, numkeys, key, value):
+        if self.data.get(key) == value:
+            del self.data[key]
+            return 1
+        return 0
+
+
+class FakeResults:
+    """In-memory stand-in for the crud functions used by the coalescer."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def create_llm_result(self, db, model, prompt, result_id=None, options=None):
+        await asyncio.sleep(0.01)
+        row = SimpleNamespace(
+            id=result_id or uuid.uuid4(),
+            prompt_hash=coalescing.models.LLMResult.generate_prompt_hash(model, prompt),
+            status="pending",
+        )
+        self.rows[row.id] = row
+        return row
+
+    async def create_or_get_llm_result(
+        self, db, model, prompt, result_id=None, options=None, user_id=None
+    ):
+        # Emulates the prompt hash claim in llm_result_keys
+        prompt_hash = coalescing.models.LLMResult.generate_prompt_hash(model, prompt)
+        for row in self.rows.values():
+            if (
+                row.prompt_hash == prompt_hash
+                and row.status in coalescing.models.UNIQUE_HASH_STATUSES
+            ):
+                return row, False
+        return await self.create_llm_result(db, model, prompt, result_id), True
+
+    async def get_llm_result(self, db, result_id, load_text=False, fresh=False):
+        return self.rows.get(result_id)
+
+    async def get_inflight_result(self, db, prompt_hash):
+        for row in self.rows.values():
+            if row.prompt_hash == prompt_hash and row.status == "pending":
+                return row
+        return None
+
+
+def patch(monkeypatch, redis):
+    results = FakeResults()
+    monkeypatch.setattr(coalescing, "crud", results)
+    monkeypatch.setattr(coalescing, "get_redis", lambda: redis)
+    return results
+
+
+def test_concurrent_identical_prompts_share_one_result(monkeypatch):
+    results = patch(monkeypatch, FakeRedis())
+    coalescer = RequestCoalescer()
+
+    async def run():
+        return await asyncio.gather(
+            *(coalescer.get_or_create(None, "llama3:latest", "hi") for _ in range(20))
+        )
+
+    outcomes = asyncio.run(run())
+    assert len(results.rows) == 1
+    assert sum(created for _, created in outcomes) == 1
+    assert len({row.id for row, _ in outcomes}) == 1
+
+
+def test_claim_from_another_replica_is_joined(monkeypatch):
+    redis = FakeRedis()
+    results = patch(monkeypatch, redis)
+    coalescer = RequestCoalescer()
+
+    async def run():
+        # Another replica claimed the prompt and committed its row
+        other = await results.create_llm_result(None, "llama3:latest", "hi")
+        redis.data[coalescing.CLAIM_KEY_PREFIX + other.prompt_hash] = str(other.id)
+        other.status = "running"
+        row, created = await coalescer.get_or_create(None, "llama3:latest", "hi")
+        return other, row, created
+
+    other, row, created = asyncio.run(run())
+    assert row is other
+    assert created is False
+
+
+def test_finished_claim_is_released(monkeypatch):
+    redis = FakeRedis()
+    results = patch(monkeypatch, redis)
+    coalescer = RequestCoalescer()
+
+    async def run():
+        done = await results.create_llm_result(None, "llama3:latest", "hi")
+        done.status = "failed"
+        redis.data[coalescing.CLAIM_KEY_PREFIX + done.prompt_hash] = str(done.id)
+        return done, await coalescer.get_or_create(None, "llama3:latest", "hi")
+
+    done, (row, created) = asyncio.run(run())
+    assert created is True
+    assert row.id != done.id
+    assert redis.data[coalescing.CLAIM_KEY_PREFIX + done.prompt_hash] == str(row.id)
+
+
+def test_upsert_conflict_returns_existing_row_and_drops_claim(monkeypatch):
+    redis = FakeRedis()
+    results = patch(monkeypatch, redis)
+    coalescer = RequestCoalescer()
+
+    async def run():
+        # Completed after the caller's cache lookup, before its insert
+        done = await results.create_llm_result(None, "llama3:latest", "hi")
+        done.status = "completed"
+        return done, await coalescer.get_or_create(None, "llama3:latest", "hi")
+
+    done, (row, created) = asyncio.run(run())
+    assert row is done and created is False
+    assert coalescing.CLAIM_KEY_PREFIX + done.prompt_hash not in redis.data
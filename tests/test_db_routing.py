@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import base
+
+
+class FakeSession:
+    def __init__(self, rows, in_transaction=False):
+        self.rows = rows
+        self.reads = 0
+        self._in_transaction = in_transaction
+
+    def in_transaction(self):
+        return self._in_transaction
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    replica = FakeSession({1: "old"})
+    metrics = SimpleNamespace(reads=0, fallbacks=0)
+    monkeypatch.setattr(base, "replica_engine", object())
+    monkeypatch.setattr(base, "ReadSessionLocal", lambda: replica)
+    monkeypatch.setitem(base.pool_metrics, "replica", metrics)
+    return metrics
+
+
+@base.replica_read(retry_missing=True)
+async def get(db, key):
+    db.reads += 1
+    return db.rows.get(key)
+
+
+@base.replica_read()
+async def search(db, key):
+    db.reads += 1
+    return db.rows.get(key)
+
+
+def test_reads_go_to_replica_unless_fresh_or_in_transaction(replica):
+    primary = FakeSession({1: "new"})
+
+    assert asyncio.run(get(primary, 1)) == "old"
+    assert asyncio.run(get(primary, 1, fresh=True)) == "new"
+    writing = FakeSession({1: "new"}, in_transaction=True)
+    assert asyncio.run(get(writing, 1)) == "new"
+    assert replica.reads == 1
+
+
+def test_missing_rows_are_retried_on_primary_only_when_asked(replica):
+    primary = FakeSession({2: "new"})
+
+    assert asyncio.run(get(primary, 2)) == "new"
+    assert asyncio.run(search(primary, 2)) is None
+    assert primary.reads == 1
+    assert (replica.reads, replica.fallbacks) == (2, 1)
+
+
+def test_pgbouncer_mode_disables_prepared_statement_reuse(monkeypatch):
+    monkeypatch.setattr(base.settings, "DB_PGBOUNCER", True)
+
+    connect_args = base.engine_options()["connect_args"]
+
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert connect_args["statement_cache_size"] == 0
+    name = connect_args["prepared_statement_name_func"]
+    assert name() != name()
+
+
+def test_pool_stats_report_the_primary_pool():
+    stats = base.db_stats()
+
+    assert stats["primary"]["size"] == base.settings.DB_POOL_SIZE
+    assert stats["primary"]["checked_out"] == 0
@@ -0,0 +1,33 @@
+import asyncio
+
+from app.core.events import RESULTS_CHANNEL, EventBus
+
+
+def test_result_event_wakes_only_matching_waiters():
+    bus = EventBus()
+
+    async def scenario():
+        with bus.wait_for_result("a") as first, bus.wait_for_result("a") as second:
+            with bus.wait_for_result("b") as other:
+                assert bus.waiting == 3
+                bus.dispatch(RESULTS_CHANNEL, {"result_id": "a", "status": "completed"})
+                assert (await first)["status"] == "completed"
+                assert (await second)["status"] == "completed"
+                assert not other.done()
+        assert bus.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_failing_handler_does_not_block_others():
+    bus = EventBus()
+    seen = []
+
+    def broken(payload):
+        raise RuntimeError("boom")
+
+    bus.on("llm_hub:test", broken)
+    bus.on("llm_hub:test", seen.append)
+    bus.dispatch("llm_hub:test", {"value": 1})
+
+    assert seen == [{"value": 1}]
@@ -0,0 +1,47 @@
+import hashlib
+
+import pytest
+from pydantic import ValidationError
+
+from app.db.models import LLMResult
+from app.schemas.base import GenerationOptions
+from app.utils.preprocessors import normalize_prompt
+
+
+def test_prompt_hash_without_options_is_unchanged():
+    legacy = hashlib.sha256(b"llama3:latest:hello").hexdigest()
+    assert LLMResult.generate_prompt_hash("llama3:latest", "hello") == legacy
+    assert LLMResult.generate_prompt_hash("llama3:latest", "hello", {}) == legacy
+    # num_thread only affects speed, so it must not split the cache
+    assert (
+        LLMResult.generate_prompt_hash("llama3:latest", "hello", {"num_thread": 4})
+        == legacy
+    )
+
+
+def test_prompt_hash_is_canonical_over_output_affecting_options():
+    def key(**options):
+        return LLMResult.generate_prompt_hash("llama3:latest", "hello", options)
+
+    assert key(temperature=0.2, seed=1) == key(seed=1, temperature=0.2)
+    assert key(seed=1, num_thread=8) == key(seed=1)
+    assert key(seed=1) != key(seed=2)
+    assert key(num_predict=16) != key()
+
+
+def test_generation_options_validation():
+    options = GenerationOptions(num_predict=32, temperature=0)
+    assert options.to_ollama() == {"num_predict": 32, "temperature": 0.0}
+    assert GenerationOptions().to_ollama() is None
+    with pytest.raises(ValidationError):
+        GenerationOptions(top_p=2)
+    with pytest.raises(ValidationError):
+        GenerationOptions(mirostat=1)
+
+
+def test_normalize_prompt():
+    composed = "café"
+    decomposed = "café"
+    assert normalize_prompt(f"  {decomposed}\r\n\r\n\r\n  tab\t\tthere  ") == (
+        f"{composed}\n\n  tab there"
+    )
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app import main
+from app.core import rate_limit
+from app.core.auth import get_current_user
+from app.db.base import get_db
+from app.schemas.user import User
+
+RESULT_ID = uuid.uuid4()
+
+
+class FakeSession:
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def stream_app(monkeypatch):
+    """The streaming endpoint with its database and Ollama replaced."""
+    updates = []
+
+    async def create_result(db, model, prompt, options, use_cache, user_id=None):
+        return SimpleNamespace(id=RESULT_ID, status="pending"), True
+
+    async def contains(model):
+        return True
+
+    async def stream_text(model, prompt, options=None):
+        for word in ("one", "two", "three"):
+            yield {"response": word}
+            await asyncio.sleep(0.05)
+
+    async def update_llm_result(db, result_id, response, status):
+        # Yield to the loop, as a real database round trip would
+        await asyncio.sleep(0.01)
+        updates.append((result_id, response, status))
+
+    monkeypatch.setattr(main, "_create_result", create_result)
+    monkeypatch.setattr(main.model_registry, "contains", contains)
+    monkeypatch.setattr(main.ollama_service, "stream_text", stream_text)
+    monkeypatch.setattr(main.crud, "update_llm_result", update_llm_result)
+    monkeypatch.setattr(main, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(rate_limit.rate_limiter, "enabled", False)
+    main.app.dependency_overrides[get_db] = lambda: FakeSession()
+    main.app.dependency_overrides[get_current_user] = lambda: User(
+        id=7, username="alice", is_active=True
+    )
+    yield updates
+    main.app.dependency_overrides.clear()
+
+
+def test_client_disconnect_still_finishes_the_result(stream_app):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/v1/generate/llama3/stream",
+        "raw_path": b"/v1/generate/llama3/stream",
+        "query_string": b"use_cache=false",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+    async def run():
+        first_token = asyncio.Event()
+        sent_request = False
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                body = json.dumps({"prompt": "count"}).encode()
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Hang up after the first token
+            await first_token.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if b"event: token" in message.get("body", b""):
+                first_token.set()
+
+        await main.app(scope, receive, send)
+        # Let anything still running settle
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert stream_app == [(RESULT_ID, "Error: stream aborted", "failed")]
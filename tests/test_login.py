@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import login_limiter as limiter_module
+from app.core.login_limiter import LoginLimiter
+from app.core.passwords import PasswordHasher
+
+
+class FakeRedis:
+    def __init__(self):
+        self.counts = {}
+        self.ttls = {}
+
+    async def mget(self, keys):
+        return [self.counts.get(key) for key in keys]
+
+    async def ttl(self, key):
+        return self.ttls.get(key, -2)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.counts.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def incr(self, key):
+        self.redis.counts[key] = self.redis.counts.get(key, 0) + 1
+
+    def expire(self, key, ttl):
+        self.redis.ttls[key] = ttl
+
+    async def execute(self):
+        pass
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(limiter_module, "get_redis", lambda: redis)
+    return redis
+
+
+def test_usernames_are_locked_out_after_repeated_failures(redis):
+    limiter = LoginLimiter(max_user_failures=2, max_ip_failures=3, window=60)
+
+    async def run():
+        await limiter.record_failure("alice", "10.0.0.1")
+        assert await limiter.retry_after("alice", "10.0.0.1") is None
+        await limiter.record_failure("alice", "10.0.0.2")
+        assert await limiter.retry_after("alice", "10.0.0.3") == 60
+        # Other usernames from the same IPs are not locked out yet
+        assert await limiter.retry_after("bob", "10.0.0.1") is None
+        await limiter.reset("alice")
+        assert await limiter.retry_after("alice", "10.0.0.3") is None
+
+    asyncio.run(run())
+
+
+def test_ips_are_locked_out_across_usernames(redis):
+    limiter = LoginLimiter(max_user_failures=0, max_ip_failures=2, window=60)
+
+    async def run():
+        await limiter.record_failure("alice", "10.0.0.1")
+        await limiter.record_failure("bob", "10.0.0.1")
+        assert await limiter.retry_after("carol", "10.0.0.1") == 60
+        assert await limiter.retry_after("carol", "10.0.0.2") is None
+
+    asyncio.run(run())
+
+
+def test_hashes_of_another_cost_are_replaced():
+    old = PasswordHasher(rounds=4)
+    new = PasswordHasher(rounds=5)
+
+    async def run():
+        hashed = await old.hash("secret")
+        assert await old.verify_and_update("secret", hashed) == (True, None)
+        assert await new.verify_and_update("wrong", hashed) == (False, None)
+        valid, rehashed = await new.verify_and_update("secret", hashed)
+        assert valid and rehashed.startswith("$2b$05$")
+
+    asyncio.run(run())
+
+
+def test_hashing_does_not_block_the_event_loop():
+    hasher = PasswordHasher(rounds=10, concurrency=1)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticker = asyncio.create_task(tick())
+        started = time.perf_counter()
+        await asyncio.gather(*(hasher.hash("secret") for _ in range(3)))
+        elapsed = time.perf_counter() - started
+        ticker.cancel()
+        # The loop kept turning for most of the time spent hashing
+        assert ticks > elapsed / 0.001 / 4
+
+    asyncio.run(run())
+    hasher.shutdown()
@@ -0,0 +1,119 @@
+"""
+Migration round trips against a real Postgres.
+
+Skipped unless TEST_MIGRATIONS_DB names an empty scratch database, reached
+with the POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST and POSTGRES_PORT
+settings alembic/env.py uses. Every table in it is dropped afterwards.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+
+SCRATCH_DB = os.getenv("TEST_MIGRATIONS_DB")
+ROOT = Path(__file__).resolve().parent.parent
+BEFORE_PARTITIONING = "7a4b1c0e2f58"
+PARTITIONING = "b3e7d2a41c96"
+
+pytestmark = pytest.mark.skipif(not SCRATCH_DB, reason="TEST_MIGRATIONS_DB is not set")
+
+
+@pytest.fixture
+def alembic_config(monkeypatch):
+    monkeypatch.setenv("POSTGRES_DB", SCRATCH_DB)
+    monkeypatch.chdir(ROOT)
+    config = Config(str(ROOT / "alembic.ini"))
+    yield config
+    command.downgrade(config, "base")
+
+
+@pytest.fixture
+def engine(alembic_config):
+    url = sa.engine.URL.create(
+        "postgresql",
+        username=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        host=os.getenv("POSTGRES_HOST", "db"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        database=SCRATCH_DB,
+    )
+    engine = sa.create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def _insert(conn, prompt_hash, status, created_at):
+    result_id = uuid.uuid4()
+    conn.execute(
+        sa.text(
+            "INSERT INTO llm_results "
+            "(id, model, prompt, prompt_hash, response, status, created_at) "
+            "VALUES (:id, 'llama3:latest', :prompt, :hash, 'an answer', "
+            ":status, :created_at)"
+        ),
+        {
+            "id": result_id,
+            "prompt": f"prompt for {status}",
+            "hash": prompt_hash,
+            "status": status,
+            "created_at": created_at,
+        },
+    )
+    return result_id
+
+
+def test_partitioning_round_trip_keeps_results_and_claims(alembic_config, engine):
+    command.upgrade(alembic_config, BEFORE_PARTITIONING)
+    with engine.begin() as conn:
+        completed = _insert(conn, "a" * 64, "completed", "2024-01-15T10:00:00+00")
+        _insert(conn, "a" * 64, "failed", "2024-01-16T10:00:00+00")
+        pending = _insert(conn, "b" * 64, "pending", "2024-03-01T00:00:00+00")
+        _insert(conn, None, "completed", "2024-03-02T00:00:00+00")
+
+    command.upgrade(alembic_config, PARTITIONING)
+    with engine.connect() as conn:
+        keys = dict(
+            conn.execute(sa.text("SELECT prompt_hash, result_id FROM llm_result_keys"))
+        )
+        assert keys == {"a" * 64: completed, "b" * 64: pending}
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, convert_from(prompt, 'UTF8'), tableoid::regclass::text "
+                "FROM llm_results"
+            )
+        ).all()
+        assert len(rows) == 4
+        partitions = {row[0]: row[2] for row in rows}
+        assert partitions[completed] == "llm_results_p202401"
+        assert partitions[pending] == "llm_results_p202403"
+        assert {row[1] for row in rows} == {
+            "prompt for completed",
+            "prompt for failed",
+            "prompt for pending",
+        }
+        primary_key = sa.inspect(conn).get_pk_constraint("llm_results")
+        assert primary_key["constrained_columns"] == ["id", "created_at"]
+
+    command.downgrade(alembic_config, BEFORE_PARTITIONING)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            sa.text("SELECT id, prompt, status FROM llm_results ORDER BY created_at")
+        ).all()
+        assert [row[2] for row in rows] == [
+            "completed",
+            "failed",
+            "pending",
+            "completed",
+        ]
+        assert rows[0][:2] == (completed, "prompt for completed")
+        indexes = {
+            index["name"]: index
+            for index in sa.inspect(conn).get_indexes("llm_results")
+        }
+        assert indexes["uq_llm_results_prompt_hash_active"]["unique"]
+        assert not sa.inspect(conn).has_table("llm_result_keys")
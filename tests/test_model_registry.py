@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+
+from app.services.model_registry import ModelRegistry
+from app.services.ollama import OllamaService
+from tests.stub_ollama import create_stub_ollama
+
+
+def make_registry(stub, **kwargs):
+    service = OllamaService(
+        base_url="http://ollama.test", transport=httpx.ASGITransport(app=stub)
+    )
+    return ModelRegistry(service=service, use_redis=False, **kwargs)
+
+
+def test_cold_cache_is_refreshed_once_for_concurrent_callers():
+    stub = create_stub_ollama(models=["llama3:latest"], latency=0.01)
+    registry = make_registry(stub)
+
+    async def run():
+        return await asyncio.gather(
+            *(registry.contains("llama3:latest") for _ in range(50))
+        )
+
+    assert all(asyncio.run(run()))
+    assert stub.state.requests["tags"] == 1
+
+
+def test_stale_catalogue_is_served_while_refreshing():
+    stub = create_stub_ollama(models=["llama3:latest"])
+    registry = make_registry(stub, ttl=0)
+
+    async def run():
+        await registry.refresh()
+        stub.state.models = ["llama3:latest", "phi3:latest"]
+        stale = await registry.get_models()
+        await registry._background_refresh
+        fresh = await registry.get_models()
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert stale == ["llama3:latest"]
+    assert fresh == ["llama3:latest", "phi3:latest"]
+
+
+def test_unknown_model_refreshes_only_when_catalogue_is_old():
+    stub = create_stub_ollama(models=["llama3:latest"])
+    registry = make_registry(stub, miss_refresh_age=3600)
+
+    async def run():
+        await registry.refresh()
+        return await registry.contains("missing:latest")
+
+    assert asyncio.run(run()) is False
+    assert stub.state.requests["tags"] == 1
@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+
+from app.core.config import Settings
+from app.services.ollama import OllamaService
+from app.services.ollama_pool import BackendPool
+from tests.stub_ollama import create_stub_ollama
+
+
+class HostRouter(httpx.AsyncBaseTransport):
+    """Send each request to the stub registered for its host."""
+
+    def __init__(self, stubs):
+        self.transports = {
+            host: httpx.ASGITransport(app=stub) for host, stub in stubs.items()
+        }
+
+    async def handle_async_request(self, request):
+        return await self.transports[request.url.host].handle_async_request(request)
+
+
+def make_service(stubs, **pool_kwargs):
+    pool = BackendPool([f"http://{host}" for host in stubs], **pool_kwargs)
+    return OllamaService(transport=HostRouter(stubs), pool=pool)
+
+
+def test_concurrent_calls_spread_by_outstanding_requests():
+    stubs = {"a.test": create_stub_ollama(latency=0.02)}
+    stubs["b.test"] = create_stub_ollama(latency=0.02)
+    service = make_service(stubs, residency_slack=0)
+
+    async def run():
+        await asyncio.gather(
+            *(service.generate_text("llama3:latest", "hi") for _ in range(10))
+        )
+        await service.shutdown()
+
+    asyncio.run(run())
+    assert stubs["a.test"].state.requests["generate"] == 5
+    assert stubs["b.test"].state.requests["generate"] == 5
+
+
+def test_backend_with_model_loaded_is_preferred():
+    stubs = {"a.test": create_stub_ollama(), "b.test": create_stub_ollama()}
+    service = make_service(stubs)
+
+    async def run():
+        stubs["b.test"].state.loaded = ["phi3:latest"]
+        await service.pool.check_health(service.client)
+        for _ in range(3):
+            await service.generate_text("phi3:latest", "hi")
+        await service.shutdown()
+
+    asyncio.run(run())
+    assert stubs["a.test"].state.requests["generate"] == 0
+    assert stubs["b.test"].state.requests["generate"] == 3
+    assert stubs["b.test"].state.loads == 0
+
+
+def test_failing_backend_is_ejected_and_readmitted_gradually():
+    stubs = {"a.test": create_stub_ollama(), "b.test": create_stub_ollama()}
+    stubs["a.test"].state.fail_status = 500
+    service = make_service(stubs, eject_after=2, slow_start=60)
+    backend_a = service.pool.backends[0]
+
+    async def run():
+        for _ in range(6):
+            try:
+                await service.generate_text("llama3:latest", "hi")
+            except Exception:
+                pass
+        ejected = not backend_a.healthy
+        stubs["a.test"].state.fail_status = None
+        await service.pool.check_health(service.client)
+        await service.shutdown()
+        return ejected
+
+    assert asyncio.run(run()) is True
+    assert stubs["a.test"].state.requests["generate"] == 2
+    assert backend_a.healthy
+    assert backend_a.weight(60) < 1
+    stats = {s["url"]: s for s in service.pool.stats()}
+    assert stats["http://a.test"]["failures"] == 2
+    assert stats["http://b.test"]["in_flight"] == 0
+
+
+def test_connect_errors_fail_over_to_next_backend():
+    stubs = {"b.test": create_stub_ollama()}
+    pool = BackendPool(["http://down.test", "http://b.test"])
+
+    class Router(HostRouter):
+        async def handle_async_request(self, request):
+            if request.url.host == "down.test":
+                raise httpx.ConnectError("connection refused", request=request)
+            return await super().handle_async_request(request)
+
+    service = OllamaService(transport=Router(stubs), pool=pool)
+
+    async def run():
+        try:
+            return await service.generate_text("llama3:latest", "hi")
+        finally:
+            await service.shutdown()
+
+    assert asyncio.run(run())["done"] is True
+    assert pool.backends[0].failures == 1
+
+
+def test_backend_urls_from_environment(monkeypatch):
+    monkeypatch.setenv("OLLAMA_URLS", "http://a.test:11434, http://b.test:11434")
+    service = OllamaService(base_url=Settings().OLLAMA_URLS)
+    assert [backend.url for backend in service.pool.backends] == [
+        "http://a.test:11434",
+        "http://b.test:11434",
+    ]
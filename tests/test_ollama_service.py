@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.exceptions import OllamaServiceException
+from app.services.ollama import OllamaService
+from tests.stub_ollama import create_stub_ollama
+
+
+def make_service(stub):
+    return OllamaService(
+        base_url="http://ollama.test", transport=httpx.ASGITransport(app=stub)
+    )
+
+
+def test_get_available_models():
+    stub = create_stub_ollama(models=["llama3:latest"])
+    service = make_service(stub)
+
+    async def run():
+        try:
+            return await service.get_available_models()
+        finally:
+            await service.shutdown()
+
+    assert asyncio.run(run()) == ["llama3:latest"]
+
+
+def test_client_is_reused_across_calls():
+    stub = create_stub_ollama()
+    service = make_service(stub)
+
+    async def run():
+        first = service.client
+        await service.generate_text("llama3:latest", "hello")
+        await service.chat("llama3:latest", [{"role": "user", "content": "hi"}])
+        second = service.client
+        await service.shutdown()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert first.is_closed
+    assert stub.state.requests["generate"] == 1
+    assert stub.state.requests["chat"] == 1
+
+
+def test_generate_text_http_error():
+    stub = create_stub_ollama()
+    stub.state.fail_status = 500
+    service = make_service(stub)
+
+    async def run():
+        try:
+            await service.generate_text("llama3:latest", "hello")
+        finally:
+            await service.shutdown()
+
+    with pytest.raises(OllamaServiceException):
+        asyncio.run(run())
+
+
+def test_stream_text_yields_tokens_until_done():
+    stub = create_stub_ollama(response_text="one two three")
+    service = make_service(stub)
+
+    async def run():
+        try:
+            return [chunk async for chunk in service.stream_text("llama3:latest", "hi")]
+        finally:
+            await service.shutdown()
+
+    chunks = asyncio.run(run())
+    assert "".join(chunk["response"] for chunk in chunks) == "one two three"
+    assert chunks[-1]["done"] is True
+
+
+def test_generate_text_forwards_options():
+    stub = create_stub_ollama()
+    service = make_service(stub)
+
+    async def run():
+        try:
+            await service.generate_text("llama3:latest", "hello")
+            assert stub.state.last_options is None
+            await service.generate_text(
+                "llama3:latest", "hello", {"num_predict": 8, "seed": 1}
+            )
+        finally:
+            await service.shutdown()
+
+    asyncio.run(run())
+    assert stub.state.last_options == {"num_predict": 8, "seed": 1}
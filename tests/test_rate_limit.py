@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core import rate_limit
+from app.core.auth import get_current_user
+from app.core.rate_limit import (
+    RateLimiter,
+    RateLimitExceeded,
+    Tier,
+    estimate_tokens,
+    parse_tiers,
+)
+from app.db.base import get_db
+from app.schemas.user import User
+
+ALICE = User(id=7, username="alice", is_active=True)
+TIERS = {"default": Tier(2, 1000), "unlimited": Tier(0, 0)}
+
+
+class FakeSession:
+    async def close(self):
+        pass
+
+
+def test_tiers_and_token_estimates():
+    assert parse_tiers("default=60:1000, pro=600:0") == {
+        "default": Tier(60, 1000),
+        "pro": Tier(600, 0),
+    }
+    assert estimate_tokens("x" * 10, {"num_predict": 100}) == 103
+    assert estimate_tokens("x" * 8) == 2 + 512
+
+
+def test_requests_are_refused_once_the_bucket_is_empty():
+    limiter = RateLimiter(tiers=TIERS, backend="memory")
+
+    async def run():
+        headers = await limiter.take(ALICE)
+        assert headers["RateLimit-Limit"] == "2"
+        assert headers["RateLimit-Remaining"] == "1"
+        await limiter.take(ALICE)
+        with pytest.raises(RateLimitExceeded) as refused:
+            await limiter.take(ALICE)
+        # One request refills every 30 seconds
+        assert refused.value.headers["Retry-After"] == "30"
+        assert refused.value.headers["RateLimit-Remaining"] == "0"
+        # Other users have their own buckets
+        await limiter.take(User(id=8, username="bob", is_active=True))
+
+    asyncio.run(run())
+
+
+def test_token_quota_is_charged_only_when_every_bucket_has_room():
+    limiter = RateLimiter(tiers=TIERS, backend="memory")
+
+    async def run():
+        await limiter.take(ALICE, tokens=900)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.take(ALICE, tokens=200)
+        # The refused request took nothing from the requests bucket
+        headers = await limiter.take(ALICE, tokens=50)
+        assert headers["RateLimit-Policy"] == "2;w=60, 1000;w=86400"
+        with pytest.raises(RateLimitExceeded) as refused:
+            await limiter.take(ALICE, tokens=5000)
+        assert refused.value.headers["RateLimit-Limit"] == "1000"
+
+    asyncio.run(run())
+
+
+def test_unlimited_tier_and_redis_failures(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limit, "get_redis", unavailable)
+    limiter = RateLimiter(tiers=TIERS, backend="redis")
+
+    async def run():
+        vip = User(id=9, username="vip", is_active=True, tier="unlimited")
+        for _ in range(5):
+            assert await limiter.take(vip, tokens=10**6) == {}
+        # Falls back to this process's buckets
+        await limiter.take(ALICE)
+        await limiter.take(ALICE)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.take(ALICE)
+
+    asyncio.run(run())
+
+
+def test_endpoints_send_rate_limit_headers(monkeypatch):
+    monkeypatch.setattr(
+        rate_limit, "rate_limiter", RateLimiter(tiers=TIERS, backend="memory")
+    )
+
+    async def list_user_results(*args, **filters):
+        return []
+
+    monkeypatch.setattr(
+        main, "crud", SimpleNamespace(list_user_results=list_user_results)
+    )
+    main.app.dependency_overrides[get_db] = lambda: FakeSession()
+    main.app.dependency_overrides[get_current_user] = lambda: ALICE
+    try:
+        client = TestClient(main.app)
+        response = client.get("/v1/results")
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Remaining"] == "1"
+        client.get("/v1/results")
+        response = client.get("/v1/results")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+    finally:
+        main.app.dependency_overrides.clear()
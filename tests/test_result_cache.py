@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from app.core import events, result_cache as result_cache_module
+from app.core.result_cache import ResultCache
+from app.schemas.llm import LLMResultSchema
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.append(channel)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    def set(self, key, value, ex=None):
+        self.redis.data[key] = value
+
+    def sadd(self, key, member):
+        self.redis.data.setdefault(key, set()).add(member)
+
+    def expire(self, key, ttl):
+        pass
+
+    async def execute(self):
+        pass
+
+
+def _result(model="llama3:latest", response="hello"):
+    return LLMResultSchema(
+        id=uuid.uuid4(),
+        model=model,
+        prompt="prompt",
+        response=response,
+        status="completed",
+        created_at=datetime.now(timezone.utc),
+        completed_at=datetime.now(timezone.utc),
+    )
+
+
+def _patch(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(result_cache_module, "get_redis", lambda: redis)
+    monkeypatch.setattr(events, "get_redis", lambda: redis)
+    return redis
+
+
+def test_lru_evicts_oldest_and_falls_back_to_redis(monkeypatch):
+    _patch(monkeypatch)
+    cache = ResultCache(max_entries=2, max_bytes=10**6, ttl=60, redis_ttl=60)
+
+    async def scenario():
+        for name in ("a", "b", "c"):
+            await cache.put(name, _result(response=name))
+        assert cache.stats()["entries"] == 2
+        assert cache.counters["evictions"] == 1
+        assert (await cache.get("c")).response == "c"
+        # Evicted locally but still in Redis, and promoted back into the LRU
+        assert (await cache.get("a")).response == "a"
+        assert await cache.get("missing") is None
+
+    asyncio.run(scenario())
+    assert cache.counters["memory_hits"] == 1
+    assert cache.counters["redis_hits"] == 1
+    assert cache.counters["misses"] == 1
+
+
+def test_byte_limit_and_ttl(monkeypatch):
+    _patch(monkeypatch)
+    cache = ResultCache(max_entries=100, max_bytes=600, ttl=0, redis_ttl=60)
+
+    async def scenario():
+        await cache.put("big", _result(response="x" * 1000))
+        await cache.put("small", _result())
+
+    asyncio.run(scenario())
+    assert "big" not in cache._entries
+    assert cache.bytes <= 600
+    # A zero TTL expires the entry on its next lookup
+    assert cache._get_local("small") is None
+    assert cache.counters["expirations"] == 1
+
+
+def test_invalidate_removes_only_that_model(monkeypatch):
+    redis = _patch(monkeypatch)
+    cache = ResultCache(max_entries=10, max_bytes=10**6, ttl=60, redis_ttl=60)
+
+    async def scenario():
+        await cache.put("a", _result(model="llama3:latest"))
+        await cache.put("b", _result(model="phi3:latest"))
+        assert await cache.invalidate("llama3:latest") == 1
+        assert await cache.get("a") is None
+        assert await cache.get("b") is not None
+
+    asyncio.run(scenario())
+    assert redis.published == [result_cache_module.INVALIDATION_CHANNEL]
@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from app.core import tasks
+from app.db import crud, models
+
+
+class FakeSession:
+    def __init__(self, rows=()):
+        self.statements = []
+        self.rows = list(rows)
+        self.rolled_back = False
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        return FakeResult(self.rows)
+
+    async def rollback(self):
+        self.rolled_back = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def test_database_error_fails_the_result(monkeypatch):
+    session = FakeSession()
+    writes = []
+    released = []
+
+    async def set_status(db, result_id, status):
+        raise OperationalError("UPDATE llm_results", {}, Exception("connection lost"))
+
+    async def write(db, result_id, response, status):
+        writes.append((result_id, status, db.rolled_back))
+
+    async def remove(model, result_id, started=True):
+        pass
+
+    async def release(prompt_hash, result_id):
+        released.append((prompt_hash, result_id))
+
+    monkeypatch.setattr(tasks, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(tasks.task_scheduler, "remove", remove)
+    monkeypatch.setattr(tasks.result_writer, "set_status", set_status)
+    monkeypatch.setattr(tasks.result_writer, "write", write)
+    monkeypatch.setattr(tasks.request_coalescer, "release", release)
+    result_id = uuid.uuid4()
+
+    with pytest.raises(OperationalError):
+        tasks.generate_text.run(str(result_id), "llama3:latest", "hello")
+
+    assert writes == [(result_id, "failed", True)]
+    assert released == [
+        (
+            models.LLMResult.generate_prompt_hash("llama3:latest", "hello", None),
+            result_id,
+        )
+    ]
+
+
+def test_stale_claims_are_failed_before_claiming(monkeypatch):
+    stale = uuid.uuid4()
+    removed = []
+
+    async def remove(model, result_id, started=True):
+        removed.append((model, result_id, started))
+
+    monkeypatch.setattr(crud.task_scheduler, "remove", remove)
+    session = FakeSession([stale])
+    asyncio.run(crud._fail_stale_claims(session, "llama3:latest", ["abc"]))
+
+    # The failed result's task leaves the queue ledger too
+    assert removed == [("llama3:latest", stale, False)]
+    statement, release = session.statements
+    assert "DELETE FROM llm_result_keys" in str(release)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE llm_results SET")
+    assert "FROM llm_result_keys" in sql
+    assert "llm_result_keys.created_at < now() -" in sql
+    assert "RETURNING llm_results.id" in sql
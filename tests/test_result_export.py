@@ -0,0 +1,139 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.auth import get_current_user
+from app.db.base import get_db
+from app.schemas.user import User
+from app.utils.export import CsvWriter, JsonlWriter, ParquetWriter, export_chunks
+from app.utils.pagination import decode_cursor
+
+START = datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+
+class FakeRow:
+    """Stand-in for the Rows crud.stream_results yields."""
+
+    def __init__(self, i):
+        self._mapping = {
+            "id": uuid.uuid4(),
+            "model": "llama3:latest",
+            "status": "completed",
+            "created_at": START + timedelta(minutes=i),
+            "completed_at": None,
+            "user_id": 7,
+            "options": {"temperature": 0.2} if i % 2 else None,
+            "prompt": f"prompt {i}",
+            "response": f'response, with "quotes" {i}',
+        }
+        self.__dict__.update(self._mapping)
+
+
+def make_rows(count):
+    return [FakeRow(i) for i in range(count)]
+
+
+async def in_batches(rows, size=2):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def export(rows, writer):
+    async def run():
+        return [chunk async for chunk in export_chunks(in_batches(rows), writer)]
+
+    return asyncio.run(run())
+
+
+def test_jsonl_export_streams_one_chunk_per_batch():
+    rows = make_rows(5)
+
+    chunks = export(rows, JsonlWriter())
+
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [r["id"] for r in records] == [str(row.id) for row in rows]
+    assert decode_cursor(records[-1]["cursor"]) == (rows[-1].created_at, rows[-1].id)
+
+
+def test_csv_export_writes_header_once():
+    rows = make_rows(3)
+
+    text = b"".join(export(rows, CsvWriter())).decode()
+
+    records = list(csv.DictReader(io.StringIO(text)))
+    assert [r["response"] for r in records] == [row.response for row in rows]
+    assert json.loads(records[1]["options"]) == {"temperature": 0.2}
+    assert b"".join(export([], CsvWriter())).decode().startswith("id,model,status")
+
+
+def test_parquet_export_is_readable_with_a_row_group_per_batch():
+    pq = pytest.importorskip("pyarrow.parquet")
+    rows = make_rows(5)
+
+    data = b"".join(export(rows, ParquetWriter()))
+
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("prompt").to_pylist() == [row.prompt for row in rows]
+    assert table.column("created_at").to_pylist()[0] == START
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeExport:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = None
+
+    def stream_results(self, db, batch_size, **filters):
+        self.filters = filters
+        after = filters["after"]
+        rows = [r for r in self.rows if after is None or (r.created_at, r.id) > after]
+        return in_batches(rows)
+
+
+@pytest.fixture
+def exports(monkeypatch):
+    exports = FakeExport(make_rows(4))
+    monkeypatch.setattr(main, "crud", exports)
+    monkeypatch.setattr(main, "ReadSessionLocal", FakeSession)
+    main.app.dependency_overrides[get_db] = lambda: FakeSession()
+    main.app.dependency_overrides[get_current_user] = lambda: User(
+        id=7, username="alice", is_active=True
+    )
+    yield exports
+    main.app.dependency_overrides.clear()
+
+
+def test_export_endpoint_resumes_from_cursor(exports):
+    client = TestClient(main.app)
+
+    response = client.get("/v1/results/export?status=completed")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    resumed = client.get(f"/v1/results/export?cursor={records[1]['cursor']}")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(records) == 4
+    assert exports.filters["user_id"] == 7
+    assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == [
+        r["id"] for r in records[2:]
+    ]
+    assert client.get("/v1/results/export?format=xml").status_code == 422
@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.auth import get_current_user
+from app.db.base import get_db
+from app.schemas.user import User
+from app.utils.pagination import decode_cursor, encode_cursor
+
+START = datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+
+class FakeSession:
+    async def close(self):
+        pass
+
+
+class FakeHistory:
+    """In-memory stand-in for crud.list_user_results, newest first."""
+
+    def __init__(self, count):
+        self.calls = []
+        self.rows = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                model="llama3:latest",
+                status="completed",
+                created_at=START - timedelta(minutes=i),
+                completed_at=None,
+            )
+            for i in range(count)
+        ]
+
+    async def list_user_results(
+        self, db, user_id, limit, before=None, model=None, status=None, load_text=False
+    ):
+        self.calls.append((user_id, before, model))
+        rows = self.rows
+        if before is not None:
+            rows = [r for r in rows if (r.created_at, r.id) < before]
+        return rows[:limit]
+
+
+@pytest.fixture
+def history(monkeypatch):
+    history = FakeHistory(5)
+    monkeypatch.setattr(main, "crud", history)
+    main.app.dependency_overrides[get_db] = lambda: FakeSession()
+    main.app.dependency_overrides[get_current_user] = lambda: User(
+        id=7, username="alice", is_active=True
+    )
+    yield history
+    main.app.dependency_overrides.clear()
+
+
+def test_cursor_round_trip():
+    result_id = uuid.uuid4()
+
+    assert decode_cursor(encode_cursor(START, result_id)) == (START, result_id)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_results_are_paged_by_cursor(history):
+    client = TestClient(main.app)
+
+    first = client.get("/v1/results?limit=3&model=llama3").json()
+    second = client.get(f"/v1/results?limit=3&cursor={first['next_cursor']}").json()
+
+    seen = [item["id"] for item in first["items"] + second["items"]]
+    assert seen == [str(row.id) for row in history.rows]
+    assert second["next_cursor"] is None
+    assert "prompt" not in first["items"][0]
+    assert history.calls[0] == (7, None, "llama3:latest")
+    assert client.get("/v1/results?cursor=garbage").status_code == 400
@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.db.base import get_db
+
+RESULT_ID = uuid.uuid4()
+
+
+class FakeSession:
+    async def close(self):
+        pass
+
+
+class FakeResults:
+    """In-memory stand-in for the crud lookups used by the result endpoints."""
+
+    def __init__(self):
+        self.loads = []
+        self.row = SimpleNamespace(
+            id=RESULT_ID,
+            model="llama3:latest",
+            status="running",
+            created_at=datetime(2026, 10, 17, tzinfo=timezone.utc),
+            completed_at=None,
+        )
+
+    async def get_llm_result_status(self, db, result_id):
+        self.loads.append("status")
+        return self.row if result_id == RESULT_ID else None
+
+    async def get_llm_result(self, db, result_id, load_text=False):
+        self.loads.append("text" if load_text else "no text")
+        return self.row if result_id == RESULT_ID else None
+
+
+@pytest.fixture
+def results(monkeypatch):
+    results = FakeResults()
+    monkeypatch.setattr(main, "crud", results)
+    main.app.dependency_overrides[get_db] = lambda: FakeSession()
+    yield results
+    main.app.dependency_overrides.clear()
+
+
+def test_status_endpoint_returns_projection(results):
+    response = TestClient(main.app).get(f"/v1/result/{RESULT_ID}/status")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "running"
+    assert "prompt" not in response.json()
+    assert results.loads == ["status"]
+
+
+def test_fields_skip_loading_text_unless_selected(results):
+    client = TestClient(main.app)
+
+    response = client.get(f"/v1/result/{RESULT_ID}?fields=status,completed_at")
+    assert response.json() == {"status": "running", "completed_at": None}
+    assert results.loads == ["no text"]
+
+    assert client.get(f"/v1/result/{RESULT_ID}?fields=status,secret").status_code == 400
+    assert client.get(f"/v1/result/{uuid.uuid4()}/status").status_code == 404
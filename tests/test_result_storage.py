@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db import crud, partitions
+from app.db.partitions import (
+    add_months,
+    create_partition_sql,
+    created_at_window,
+    expired_partitions,
+    months_between,
+    new_result_id,
+)
+from app.db.types import ZSTD_MAGIC, CompressedText
+
+
+def test_month_ranges_and_partition_sql():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert months_between(date(2026, 11, 20), date(2027, 1, 1)) == [
+        date(2026, 11, 1),
+        date(2026, 12, 1),
+        date(2027, 1, 1),
+    ]
+    assert create_partition_sql(date(2026, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS llm_results_p202612 PARTITION OF llm_results "
+        "FOR VALUES FROM ('2026-12-01+00') TO ('2027-01-01+00')"
+    )
+
+
+def test_only_partitions_entirely_before_the_cutoff_expire():
+    names = [
+        "llm_results_p202609",
+        "llm_results_default",
+        "llm_results_p202607",
+        "llm_results_p202608",
+    ]
+    assert expired_partitions(names, date(2026, 9, 1)) == [
+        ("llm_results_p202607", date(2026, 7, 1)),
+        ("llm_results_p202608", date(2026, 8, 1)),
+    ]
+
+
+def test_result_ids_bound_their_created_at(monkeypatch):
+    created = datetime(2026, 11, 30, 23, 30, tzinfo=timezone.utc)
+    monkeypatch.setattr(
+        partitions.time, "time_ns", lambda: int(created.timestamp()) * 10**9
+    )
+    result_id = new_result_id()
+    assert result_id.version == 7 and result_id.variant == uuid.RFC_4122
+    assert result_id != new_result_id()
+    assert created_at_window([result_id]) == (
+        datetime(2026, 11, 29, 23, 30, tzinfo=timezone.utc),
+        datetime(2026, 12, 1, 23, 30, tzinfo=timezone.utc),
+    )
+    # Results created before ids were UUIDv7 can be in any partition
+    assert created_at_window([result_id, uuid.uuid4()]) is None
+    assert created_at_window([]) is None
+
+
+def test_lookups_by_id_prune_partitions():
+    class FakeSession:
+        statements = []
+
+        async def execute(self, statement, *args, **kwargs):
+            self.statements.append(statement)
+
+        async def commit(self):
+            pass
+
+    session = FakeSession()
+    asyncio.run(crud.set_llm_result_status(session, new_result_id(), "running"))
+    asyncio.run(crud.set_llm_result_status(session, uuid.uuid4(), "running"))
+    bounded, legacy = (
+        str(statement.compile(dialect=postgresql.dialect()))
+        for statement in session.statements
+    )
+    assert "llm_results.created_at >= " in bounded
+    assert "llm_results.created_at < " in bounded
+    assert "created_at" not in legacy
+
+
+def test_compressed_text_round_trip():
+    pytest.importorskip("zstandard")
+    column = CompressedText(min_bytes=64)
+    short, long = "hello", "a long response, repeated. " * 20
+
+    assert column.process_bind_param(short, None) == short.encode()
+    stored = column.process_bind_param(long, None)
+    assert stored.startswith(ZSTD_MAGIC) and len(stored) < len(long)
+    assert column.process_result_value(stored, None) == long
+    # Values written while compression was off still read back
+    plain = CompressedText(min_bytes=0).process_bind_param(long, None)
+    assert column.process_result_value(plain, None) == long
@@ -0,0 +1,82 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.core import result_writer as result_writer_module
+from app.core.result_writer import ResultWriter
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeResults:
+    """In-memory stand-in for the crud functions used by ResultWriter."""
+
+    def __init__(self):
+        self.statements = []
+        self.announced = []
+
+    async def update_llm_results(self, db, updates):
+        self.statements.append(updates)
+        return [
+            SimpleNamespace(id=result_id, status=status)
+            for result_id, status, _, _ in updates
+        ]
+
+    async def announce_result(self, db_result):
+        self.announced.append(db_result.id)
+
+
+def test_concurrent_writes_share_one_statement(monkeypatch):
+    results = FakeResults()
+    monkeypatch.setattr(result_writer_module, "crud", results)
+    writer = ResultWriter(
+        enabled=True, flush_interval=0.05, session_factory=FakeSession
+    )
+    ids = [uuid.uuid4() for _ in range(5)]
+
+    async def scenario():
+        for result_id in ids:
+            await writer.set_status(None, result_id, "running")
+        await asyncio.gather(
+            *(writer.write(None, result_id, "done", "completed") for result_id in ids)
+        )
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+    # The running updates are superseded by the completions of the same rows
+    [statement] = results.statements
+    assert [update[:3] for update in statement] == [
+        (result_id, "completed", "done") for result_id in ids
+    ]
+    assert results.announced == ids
+
+
+def test_full_buffer_flushes_early_and_stop_flushes_the_rest(monkeypatch):
+    results = FakeResults()
+    monkeypatch.setattr(result_writer_module, "crud", results)
+    writer = ResultWriter(
+        enabled=True, flush_interval=10, batch_size=2, session_factory=FakeSession
+    )
+
+    async def scenario():
+        await asyncio.wait_for(
+            asyncio.gather(
+                writer.write(None, uuid.uuid4(), "a", "completed"),
+                writer.write(None, uuid.uuid4(), "b", "completed"),
+            ),
+            1,
+        )
+        await writer.set_status(None, uuid.uuid4(), "running")
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+    assert [len(statement) for statement in results.statements] == [2, 1]
+    assert len(results.announced) == 2
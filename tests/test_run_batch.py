@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from app.scripts import run_batch
+from app.scripts.run_batch import (
+    Checkpoint,
+    JsonlSink,
+    Progress,
+    make_processor,
+    read_records,
+    run,
+)
+
+
+def _records(count):
+    return [(i, {"id": f"r{i}", "prompt": f"prompt {i}"}) for i in range(1, count + 1)]
+
+
+def _fake_processor(calls):
+    async def process(record):
+        calls.append(record["id"])
+        # Finish out of input order
+        await asyncio.sleep(0.001 * (hash(record["id"]) % 5))
+        return {"id": record["id"], "status": "completed", "eval_count": 3}
+
+    return process
+
+
+def _run(tmp_path, records, calls):
+    output = tmp_path / "out.jsonl"
+    asyncio.run(
+        run(
+            iter(records),
+            JsonlSink(output),
+            Checkpoint(tmp_path / "out.checkpoint"),
+            _fake_processor(calls),
+            concurrency=3,
+            checkpoint_every=2,
+        )
+    )
+    return [json.loads(line) for line in output.read_text().splitlines()]
+
+
+def test_resume_skips_finished_lines_and_drops_uncommitted_output(tmp_path):
+    calls = []
+    rows = _run(tmp_path, _records(10), calls)
+    assert sorted(row["line"] for row in rows) == list(range(1, 11))
+    assert len(calls) == 10
+
+    # A row written after the last checkpoint, as if the run crashed
+    with open(tmp_path / "out.jsonl", "a") as f:
+        f.write('{"line": 11, "id": "r11"}\n')
+
+    calls.clear()
+    rows = _run(tmp_path, _records(12), calls)
+    assert sorted(calls) == ["r11", "r12"]
+    assert sorted(row["line"] for row in rows) == list(range(1, 13))
+
+
+def test_checkpoint_watermark_advances_over_contiguous_lines(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint")
+    for line in (2, 3, 5):
+        checkpoint.mark_done(line)
+    assert checkpoint.watermark == 0
+    checkpoint.mark_done(1)
+    assert checkpoint.watermark == 3 and checkpoint.done == {5}
+    assert checkpoint.is_done(2) and not checkpoint.is_done(4)
+
+
+def test_bad_records_are_written_as_failed_and_the_run_continues(tmp_path, monkeypatch):
+    async def generate_record(model, prompt, use_cache=True, options=None):
+        return {"status": "completed", "cached": False, "response": prompt.upper()}
+
+    monkeypatch.setattr(run_batch, "generate_record", generate_record)
+    source = tmp_path / "in.jsonl"
+    source.write_text(
+        '{"id": "a", "prompt": "first"}\n'
+        "{not json\n"
+        '{"id": "b", "text": "no prompt field"}\n'
+        '{"id": "c", "prompt": "bad options", "options": {"temperature": -1}}\n'
+        '{"id": "d", "prompt": "last"}\n'
+    )
+    output = tmp_path / "out.jsonl"
+    checkpoint = Checkpoint(tmp_path / "out.checkpoint")
+    progress = Progress(interval=3600)
+    asyncio.run(
+        run(
+            read_records(source),
+            JsonlSink(output),
+            checkpoint,
+            make_processor("llama3", "prompt", "id", use_cache=True),
+            concurrency=2,
+            progress=progress,
+        )
+    )
+
+    rows = {
+        row["line"]: row for row in map(json.loads, output.read_text().splitlines())
+    }
+    assert rows[1]["response"] == "FIRST" and rows[5]["response"] == "LAST"
+    assert [rows[line]["status"] for line in (2, 3, 4)] == ["failed"] * 3
+    assert rows[2]["error"].startswith("JSONDecodeError")
+    assert rows[3]["error"] == "KeyError: 'prompt'"
+    assert rows[4]["error"].startswith("ValidationError")
+    assert checkpoint.watermark == 5
+    assert (progress.prompts, progress.failed) == (5, 3)
@@ -0,0 +1,163 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app import main
+from app.core import scheduling
+from app.core.affinity import queue_for_model
+from app.core.scheduling import QueuePosition, TaskScheduler, parse_weights
+from app.schemas.user import User
+
+ALICE = User(id=7, username="alice", is_active=True)
+IDS = [uuid.uuid4() for _ in range(3)]
+
+
+class FakePipeline:
+    def __init__(self, ranks, interval):
+        self.ranks = ranks
+        self.interval = interval
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def zrank(self, key, member):
+        self.calls.append(key)
+
+    def hget(self, key, field):
+        self.calls.append(key)
+
+    async def execute(self):
+        return self.ranks + [self.interval]
+
+
+class FakeRedis:
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+
+    def pipeline(self, transaction=True):
+        return self._pipeline
+
+
+def test_tier_weights():
+    scheduler = TaskScheduler(weights=parse_weights("pro=4, unlimited=8"))
+    assert scheduler.weight(ALICE) == 1.0
+    assert scheduler.weight(User(id=8, username="bob", is_active=True, tier="pro")) == 4
+
+
+def test_positions_and_eta(monkeypatch):
+    pipe = FakePipeline([0, None, 4], "2.5")
+    monkeypatch.setattr(scheduling, "get_redis", lambda: FakeRedis(pipe))
+    positions = asyncio.run(TaskScheduler().positions("llama3:latest", IDS))
+    # The second task has already left the queue
+    assert positions == {
+        IDS[0]: QueuePosition(0, 2.5),
+        IDS[2]: QueuePosition(4, 12.5),
+    }
+    assert pipe.calls[0] == "llm_hub:scheduler:llm_tasks.llama3:queue"
+
+    pipe = FakePipeline([3], None)
+    monkeypatch.setattr(scheduling, "get_redis", lambda: FakeRedis(pipe))
+    positions = asyncio.run(TaskScheduler().positions("llama3:latest", IDS[:1]))
+    assert positions == {IDS[0]: QueuePosition(3, None)}
+
+
+def test_lane_priorities_without_redis(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(scheduling, "get_redis", unavailable)
+    scheduler = TaskScheduler()
+
+    async def run():
+        assert await scheduler.enqueue("llama3:latest", ALICE, IDS, "batch") == [5] * 3
+        assert (
+            await scheduler.enqueue("llama3:latest", ALICE, IDS, "interactive")
+            == [0] * 3
+        )
+        assert await scheduler.positions("llama3:latest", IDS) == {}
+
+    asyncio.run(run())
+
+
+def test_unpublished_tasks_leave_the_queue(monkeypatch):
+    removed = []
+
+    class FakeScheduler:
+        async def enqueue(self, model, user, result_ids, lane):
+            return [5, 6, 7][: len(result_ids)]
+
+        async def remove(self, model, result_id, started=True):
+            removed.append((result_id, started))
+
+    class FakeGroup:
+        def __init__(self, signatures):
+            self.priorities = [s.options["priority"] for s in signatures]
+
+        def apply_async(self):
+            assert self.priorities == [5, 6, 7]
+            raise ConnectionError("broker down")
+
+    failed = []
+
+    async def update_llm_results(db, updates):
+        failed.extend(update[:3] for update in updates)
+
+    async def release(prompt_hash, result_id):
+        released.append(result_id)
+
+    released = []
+    monkeypatch.setattr(main, "task_scheduler", FakeScheduler())
+    monkeypatch.setattr(main, "group", FakeGroup)
+    monkeypatch.setattr(main.crud, "update_llm_results", update_llm_results)
+    monkeypatch.setattr(main.request_coalescer, "release", release)
+    tasks = [(result_id, "hi") for result_id in IDS]
+    with pytest.raises(ConnectionError):
+        asyncio.run(
+            main._publish_generations(
+                None, "llama3:latest", ALICE, tasks, None, "batch"
+            )
+        )
+    assert removed == [(result_id, False) for result_id in IDS]
+    # The results are failed, so their prompt hashes can be claimed again
+    assert failed == [
+        (result_id, "failed", "Error: could not enqueue generation")
+        for result_id in IDS
+    ]
+    assert released == IDS
+
+
+def test_tasks_that_never_start_are_swept(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(scheduling, "get_redis", lambda: redis)
+    scheduler = TaskScheduler(max_age=1)
+    queue = queue_for_model("llama3:latest")
+
+    async def run():
+        # The first task is lost: no worker ever starts or removes it
+        await scheduler.enqueue("llama3:latest", ALICE, IDS[:1], "batch")
+        await asyncio.sleep(1.1)
+        await scheduler.enqueue("llama3:latest", ALICE, IDS[1:], "interactive")
+        stats = await scheduler.queue_stats(queue)
+        assert (stats.depth, stats.interactive_depth) == (2, 2)
+        assert stats.interval is None and stats.since_start is None
+        # A lost task would have sunk ALICE's new tasks to a lower level
+        assert await redis.hgetall(scheduler._keys("llama3:latest", "backlog")[0]) == {
+            str(ALICE.id): "2"
+        }
+        positions = await scheduler.positions("llama3:latest", IDS)
+        assert sorted(p.position for p in positions.values()) == [0, 1]
+
+        for result_id in IDS[1:]:
+            await scheduler.remove("llama3:latest", result_id, started=False)
+        stats = await scheduler.queue_stats(queue)
+        assert stats.depth == 0
+        assert await redis.exists(*scheduler._keys("llama3:latest", "owners")) == 0
+
+    asyncio.run(run())
@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+
+import httpx
+import numpy as np
+
+from app.core import semantic_cache as semantic_cache_module
+from app.core.semantic_cache import SemanticCache, VectorIndex
+from app.services.ollama import OllamaService
+from tests.stub_ollama import create_stub_ollama
+
+MODEL = "llama3:latest"
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_vector_index_ring_and_persistence(tmp_path):
+    path = tmp_path / "index"
+    index = VectorIndex(dim=2, max_entries=2, path=path, key="k")
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    index.add(ids[0], _unit(1, 0))
+    index.add(ids[1], _unit(0, 1))
+    # Full: overwrites the oldest entry
+    index.add(ids[2], _unit(1, 1))
+    index.close()
+
+    reopened = VectorIndex(dim=2, max_entries=2, path=path, key="k")
+    assert reopened.count == 2
+    score, best = reopened.search(_unit(1, 0.9))
+    assert best == ids[2] and score > 0.99
+    assert ids[0] not in reopened.ids
+
+
+def test_lookup_matches_similar_prompt_only(monkeypatch):
+    stub = create_stub_ollama()
+    service = OllamaService("http://ollama.test", transport=httpx.ASGITransport(stub))
+    monkeypatch.setattr(semantic_cache_module, "ollama_service", service)
+    cache = SemanticCache(enabled=True, threshold=0.8, budget=1.0, max_entries=10)
+    result_id = uuid.uuid4()
+
+    async def scenario():
+        vector = await cache.embed("rewrite this article about rust in plain words")
+        cache.add(cache.index_key(MODEL), str(result_id), vector)
+
+        similar = cache.start_lookup("rewrite this article about rust in plain words!")
+        different = cache.start_lookup("what is the capital of france")
+        other_options = cache.start_lookup(
+            "rewrite this article about rust in plain words"
+        )
+        try:
+            return (
+                await cache.lookup(similar, MODEL),
+                await cache.lookup(different, MODEL),
+                await cache.lookup(other_options, MODEL, {"temperature": 0.1}),
+            )
+        finally:
+            await service.shutdown()
+
+    similar, different, other_options = asyncio.run(scenario())
+    assert similar[0] == result_id and similar[1] >= 0.8
+    assert different[0] is None
+    assert other_options[0] is None
+    assert cache.counters["hits"] == 1
+
+
+def test_lookup_over_budget_is_a_miss():
+    cache = SemanticCache(enabled=True, budget=0.001, max_entries=10)
+
+    async def slow_embedding():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        pending = asyncio.create_task(slow_embedding())
+        return await cache.lookup(pending, MODEL)
+
+    assert asyncio.run(scenario()) == (None, 0.0)
+    assert cache.counters["over_budget"] == 1
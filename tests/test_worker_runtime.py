@@ -0,0 +1,52 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.worker_runtime import WorkerRuntime
+
+
+def test_tasks_from_many_threads_share_one_loop():
+    runtime = WorkerRuntime()
+    state = {"running": 0, "peak": 0, "loops": set()}
+
+    async def job():
+        state["loops"].add(id(asyncio.get_running_loop()))
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.02)
+        state["running"] -= 1
+        return True
+
+    try:
+        # The thread pool bounds how many tasks are in flight
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: runtime.run(job()), range(16)))
+    finally:
+        runtime.stop()
+
+    assert all(results)
+    assert state["peak"] == 4
+    assert len(state["loops"]) == 1
+
+
+def test_hooks_run_on_start_and_stop():
+    runtime = WorkerRuntime()
+    calls = []
+
+    async def startup():
+        calls.append("startup")
+
+    async def shutdown():
+        calls.append("shutdown")
+
+    runtime.on_startup(startup)
+    runtime.on_shutdown(shutdown)
+
+    async def noop():
+        return None
+
+    runtime.run(noop())
+    runtime.run(noop())
+    runtime.stop()
+    runtime.stop()
+    assert calls == ["startup", "shutdown"]
+    assert not runtime.running